@@ -0,0 +1,99 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+from Python.catalog import TrackCatalog
+from Python.keys import key_label
+
+#Synthetic tag dicts with library-like repetition: a few hundred genres, thousands of artists, some untagged fields
+def synthetic_metas(count, rng):
+    genres = [f"Genre {n}" for n in range(300)]
+    artists = [f"Artist {n}" for n in range(count // 20 + 1)]
+    for n in range(count):
+        meta = {"Genre": rng.choice(genres), "Artist": rng.choice(artists)}
+        if rng.random() < 0.9:
+            meta["BPM"] = round(rng.uniform(70, 180), 2)
+        if rng.random() < 0.8:
+            meta["Key"] = key_label(rng.randrange(24))
+        if rng.random() < 0.5:
+            meta["Duration"] = round(rng.uniform(120, 600), 1)
+        yield f"/music/{meta['Artist']}/{n:06d}.mp3", meta, rng.randrange(3_000_000, 15_000_000)
+
+#The per-file record tuples and Counters the stats panel kept before the catalog
+def legacy_build(rows):
+    records = {}
+    for path, meta, size in rows:
+        bpm = meta.get("BPM")
+        records[path] = ((size, 0), size, meta.get("Genre", "Unknown Genre"), meta.get("Artist", "Unknown Artist"),
+                         f"{(int(bpm) // 10) * 10}-{(int(bpm) // 10) * 10 + 9} BPM" if bpm else None)
+    return records
+
+def legacy_aggregate(records):
+    genres, artists, bpm_ranges = Counter(), Counter(), Counter()
+    total = 0
+    for _, size, genre, artist, bpm_range in records.values():
+        genres[genre] += 1
+        artists[artist] += 1
+        if bpm_range:
+            bpm_ranges[bpm_range] += 1
+        total += size
+    return genres, artists, bpm_ranges, total
+
+def catalog_build(rows):
+    catalog = TrackCatalog()
+    for path, meta, size in rows:
+        catalog.add(path, meta, size)
+    return catalog
+
+def catalog_aggregate(catalog):
+    return (catalog.genre_counts(), catalog.artist_counts(), catalog.bpm_histogram(), catalog.key_counts(),
+            catalog.total_size())
+
+#Returns (result, MB still allocated by building it)
+def measure_memory(build, rows):
+    tracemalloc.start()
+    result = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / (1024 * 1024)
+
+#Returns the median milliseconds of aggregate(table) over repeats
+def measure_time(aggregate, table, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        aggregate(table)
+        times.append((time.perf_counter() - start) * 1000)
+    return sorted(times)[len(times) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory and aggregation time of the track catalog against "
+                                                 "per-file records and Counters.")
+    parser.add_argument("--count", type=int, default=100_000, help="Number of synthetic tracks")
+    parser.add_argument("--repeats", type=int, default=5, help="Aggregation runs; the median is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = list(synthetic_metas(args.count, random.Random(args.seed)))
+    records, legacy_mb = measure_memory(legacy_build, rows)
+    catalog, catalog_mb = measure_memory(catalog_build, rows)
+    legacy_genres, legacy_artists, legacy_bpm, legacy_total = legacy_aggregate(records)
+    genres, artists, bpm, _, total = catalog_aggregate(catalog)
+    per_100k = 100_000 / args.count
+    report = {
+        "tracks": args.count,
+        "legacy": {"mb": round(legacy_mb, 2), "mb_per_100k": round(legacy_mb * per_100k, 2),
+                   "aggregate_ms": round(measure_time(legacy_aggregate, records, args.repeats), 2)},
+        "catalog": {"mb": round(catalog_mb, 2), "mb_per_100k": round(catalog_mb * per_100k, 2),
+                    "column_mb": round(catalog.nbytes() / (1024 * 1024), 2),
+                    "aggregate_ms": round(measure_time(catalog_aggregate, catalog, args.repeats), 2)},
+        "same_counts": (legacy_genres == Counter(genres) and legacy_artists == Counter(artists)
+                        and legacy_bpm == Counter(bpm) and legacy_total == total),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import sys
+
+from Python.metadata import analyze_audio, EXCERPT_DURATION, EXCERPT_COUNT
+from Python.utils import scan_folder
+
+#Treats half/double tempo as agreeing, since beat trackers often flip octaves
+def bpm_agrees(full_bpm, fast_bpm, tolerance, octave_tolerant):
+    candidates = [full_bpm]
+    if octave_tolerant:
+        candidates += [full_bpm / 2, full_bpm * 2]
+    return any(abs(fast_bpm - c) <= c * tolerance for c in candidates)
+
+#Runs full-track and excerpt analysis on every file and compares speed and agreement
+def run_benchmark(folder, excerpt, tolerance, octave_tolerant):
+    rows = []
+    for file_path in scan_folder(folder):
+        try:
+            #The reference decodes the whole track, never the streaming approximation used for long files
+            full = analyze_audio(file_path, ("BPM", "Key"), streaming=False)
+            fast = analyze_audio(file_path, ("BPM", "Key"), excerpt)
+        except Exception as e:
+            print(f"⚠️ Skipped: {os.path.basename(file_path)} ({e})", file=sys.stderr)
+            continue
+        full_time = full["decode_time"] + full["feature_time"]
+        fast_time = fast["decode_time"] + fast["feature_time"]
+        row = {
+            "file": file_path,
+            "full_bpm": full["BPM"],
+            "fast_bpm": fast["BPM"],
+            "full_key": full["Key"],
+            "fast_key": fast["Key"],
+            "full_time": round(full_time, 3),
+            "fast_time": round(fast_time, 3),
+            "bpm_match": bpm_agrees(full["BPM"], fast["BPM"], tolerance, octave_tolerant),
+            "key_match": full["Key"] == fast["Key"],
+        }
+        rows.append(row)
+        print(f"{os.path.basename(file_path)}: BPM {row['full_bpm']} / {row['fast_bpm']}, "
+              f"key {row['full_key']} / {row['fast_key']}, {row['full_time']}s / {row['fast_time']}s",
+              file=sys.stderr)
+
+    total_full = sum(r["full_time"] for r in rows)
+    total_fast = sum(r["fast_time"] for r in rows)
+    count = len(rows)
+    return {
+        "excerpt_seconds": excerpt[0],
+        "excerpt_count": excerpt[1],
+        "files": count,
+        "full_time": round(total_full, 3),
+        "fast_time": round(total_fast, 3),
+        "speedup": round(total_full / total_fast, 2) if total_fast else None,
+        "bpm_agreement": round(sum(r["bpm_match"] for r in rows) / count, 4) if count else None,
+        "key_agreement": round(sum(r["key_match"] for r in rows) / count, 4) if count else None,
+        "tracks": rows,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare excerpt (fast) BPM/key analysis against full-track analysis.")
+    parser.add_argument("folder", help="Folder of audio files to use as the test corpus")
+    parser.add_argument("--seconds", type=float, default=EXCERPT_DURATION, help="Length of each excerpt window")
+    parser.add_argument("--count", type=int, default=EXCERPT_COUNT, help="Number of excerpt windows per track")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Relative BPM difference still counted as a match")
+    parser.add_argument("--strict-octave", action="store_true", help="Do not count half/double tempo as a match")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.folder, (args.seconds, args.count), args.tolerance, not args.strict_octave)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    print(f"Speedup {report['speedup']}x, BPM agreement {report['bpm_agreement']}, "
+          f"key agreement {report['key_agreement']} over {report['files']} files", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
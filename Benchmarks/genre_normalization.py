@@ -0,0 +1,62 @@
+import argparse
+import json
+import random
+import time
+
+from Python.genre_aliases import GENRE_ALIASES
+from Python.genres import GenreNormalizer
+
+#Messy spellings seen in real tags, built from each built-in alias
+def variants(alias, rng):
+    yield alias
+    yield alias.title()
+    yield alias.upper()
+    yield f"  {alias}  "
+    yield alias.replace(" and ", " & ").replace(" & ", " n ")
+    yield f"{alias.title()} / {rng.choice(list(GENRE_ALIASES)).title()}"
+    yield f"{alias}, {rng.choice(list(GENRE_ALIASES))}"
+    yield f"https://www.example-promo.com {alias.title()}"
+    yield f"Melodic {alias.title()}"
+    if len(alias) > 5:
+        i = rng.randrange(1, len(alias) - 2)
+        yield alias[:i] + alias[i + 1] + alias[i] + alias[i + 2:]
+
+#The exact lookup build_sort_path used before the normalizer
+def legacy_normalize(raw):
+    genre = str(raw or "Unknown Genre").strip().lower()
+    return GENRE_ALIASES.get(genre, genre.title())
+
+#Normalises every string once and returns throughput plus the number of distinct folders produced
+def measure(normalize, strings):
+    start = time.perf_counter()
+    folders = {normalize(raw) for raw in strings}
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 4), "strings_per_second": round(len(strings) / elapsed) if elapsed else None,
+            "distinct_folders": len(folders)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalise a large synthetic stream of genre tags.")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of genre strings to normalise")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = [variant for alias in GENRE_ALIASES for variant in variants(alias, rng)]
+    strings = [rng.choice(pool) for _ in range(args.count)]
+
+    start = time.perf_counter()
+    normalizer = GenreNormalizer()
+    build_time = time.perf_counter() - start
+    cold = measure(normalizer.normalize, pool)
+    report = {
+        "strings": args.count,
+        "distinct_raw": len(set(pool)),
+        "build_seconds": round(build_time, 4),
+        "legacy": measure(legacy_normalize, strings),
+        "cold_distinct": cold,
+        "memoised": measure(normalizer.normalize, strings),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
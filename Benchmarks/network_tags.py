@@ -0,0 +1,84 @@
+import argparse
+import io
+import itertools
+import json
+import time
+
+from Python import tag_readers
+from Python.library_stats import compute_statistics
+from Python.metadata import get_metadata
+from Python.utils import map_concurrent, scan_folder
+
+class LatentFileIO(io.FileIO):
+    #A local file that behaves like one on a share: opening it and every read that reaches the "server" first
+    #waits latency seconds, the way each SMB/NFS request costs a round trip
+    latency = 0.0
+    requests = itertools.count()
+
+    def __init__(self, path):
+        next(self.requests)
+        time.sleep(self.latency)
+        super().__init__(path, "r")
+
+    def readinto(self, buffer):
+        next(self.requests)
+        time.sleep(self.latency)
+        return super().readinto(buffer)
+
+    def readall(self):
+        next(self.requests)
+        time.sleep(self.latency)
+        return super().readall()
+
+#Stands in for open() inside Python.tag_readers, so every tag read goes through the latent file
+def latent_open(path, mode="rb", buffering=-1):
+    return io.BufferedReader(LatentFileIO(path), buffering if buffering > 0 else io.DEFAULT_BUFFER_SIZE)
+
+#Reads every file's tags with the given concurrency and read-ahead; returns (seconds, requests, tags by path)
+def measure(files, threads, read_ahead):
+    LatentFileIO.requests = itertools.count()
+    start = time.perf_counter()
+    tags = dict(map_concurrent(lambda path: get_metadata(path, read_ahead), files, threads))
+    elapsed = time.perf_counter() - start
+    return elapsed, next(LatentFileIO.requests), tags
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure concurrent tag reading against a local folder that "
+                                                 "answers with injected network latency.")
+    parser.add_argument("folder", help="Folder of tagged audio files, e.g. one made by Benchmarks.synthetic_library")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Delay added to every open and read request")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 32], help="Concurrency levels to try")
+    parser.add_argument("--read-ahead", type=int, nargs="+", default=[8, tag_readers.TAG_READ_AHEAD // 1024],
+                        metavar="KIB", help="Read-ahead sizes to try, in KiB (8 KiB is Python's default buffer)")
+    args = parser.parse_args()
+
+    files = scan_folder(args.folder)
+    LatentFileIO.latency = args.latency_ms / 1000
+    tag_readers.open = latent_open
+    try:
+        runs = []
+        baseline = None
+        for read_ahead, threads in itertools.product(args.read_ahead, args.threads):
+            seconds, requests, tags = measure(files, threads, read_ahead * 1024)
+            if baseline is None:
+                baseline = (seconds, tags)
+            runs.append({"threads": threads, "read_ahead_kib": read_ahead, "seconds": round(seconds, 3),
+                         "files_per_second": round(len(files) / seconds, 1) if seconds else None,
+                         "requests_per_file": round(requests / len(files), 2) if files else None,
+                         "speedup": round(baseline[0] / seconds, 2) if seconds else None,
+                         "same_tags": tags == baseline[1]})
+
+        #The stats panel reads tags through the same stage, so its refresh is timed serially and at full width
+        stats = {}
+        for threads in (1, max(args.threads)):
+            start = time.perf_counter()
+            compute_statistics(files, tag_threads=threads, read_ahead=max(args.read_ahead) * 1024)
+            stats[f"threads_{threads}"] = round(time.perf_counter() - start, 3)
+    finally:
+        del tag_readers.open
+
+    report = {"files": len(files), "latency_ms": args.latency_ms, "runs": runs, "stats_refresh_seconds": stats}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
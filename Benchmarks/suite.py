@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from Benchmarks.synthetic_library import generate_library
+from Python.engine import SortEngine, undo_last_sort
+from Python.keys import KEY_NAMES, parse_key
+from Python.library_stats import compute_statistics
+from Python.metadata import get_metadata, get_bpm, get_key
+from Python.options import SortOptions
+from Python.utils import scan_folder
+
+SORT_ORDER = ["Genre", "BPM Range", "Key"]
+
+#Runs fn and returns (result, seconds)
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def rate(count, seconds):
+    return round(count / seconds, 2) if seconds else None
+
+#Beat trackers often lock onto half or double tempo; those count as octave matches, not misses
+def bpm_matches(expected, detected, tolerance=0.02):
+    exact = abs(detected - expected) <= expected * tolerance
+    octave = any(abs(detected - expected * factor) <= expected * factor * tolerance for factor in (0.5, 2.0))
+    return exact, octave
+
+#Times every stage on a fresh synthetic library of count files
+def run_size(count, args):
+    with tempfile.TemporaryDirectory() as folder:
+        manifest, generate_time = timed(generate_library, folder, count, args.seed, args.seconds)
+        files, scan_time = timed(scan_folder, folder)
+        metas, tag_time = timed(lambda: [get_metadata(path) for path in files])
+
+        sample = files[:args.analysis_sample]
+        bpm_exact = bpm_octave = key_hits = 0
+        bpm_time = key_time = 0.0
+        for path in sample:
+            truth = manifest[os.path.relpath(path, folder)]
+            bpm, seconds = timed(get_bpm, path)
+            bpm_time += seconds
+            exact, octave = bpm_matches(truth["bpm"], bpm)
+            bpm_exact += exact
+            bpm_octave += exact or octave
+            key, seconds = timed(get_key, path)
+            key_time += seconds
+            expected = KEY_NAMES.index(truth["key"]) + (12 if truth["mode"] == "minor" else 0)
+            key_hits += parse_key(key) == expected
+
+        engine = SortEngine(folder, SortOptions(SORT_ORDER, bpm_enabled=True, workers=args.workers))
+        (plan, summary), sort_time = timed(engine.run, scan_folder(folder), False)
+        restored, undo_time = timed(undo_last_sort, folder)
+        _, stats_time = timed(compute_statistics, scan_folder(folder))
+
+    return {
+        "files": len(files),
+        "generate_seconds": round(generate_time, 3),
+        "scan": {"seconds": round(scan_time, 4), "files_per_second": rate(len(files), scan_time)},
+        "get_metadata": {"seconds": round(tag_time, 4), "files_per_second": rate(len(files), tag_time),
+                         "errors": sum("error" in meta for meta in metas)},
+        "get_bpm": {"files": len(sample), "seconds": round(bpm_time, 3), "files_per_second": rate(len(sample), bpm_time),
+                    "accuracy": rate(bpm_exact, len(sample)), "octave_tolerant_accuracy": rate(bpm_octave, len(sample))},
+        "get_key": {"files": len(sample), "seconds": round(key_time, 3), "files_per_second": rate(len(sample), key_time),
+                    "accuracy": rate(key_hits, len(sample))},
+        "sort": {"seconds": round(sort_time, 3), "files_per_second": rate(len(files), sort_time),
+                 "moved": summary.get("moved", 0), "skipped": summary["skipped"], "analysed": summary["analysed"],
+                 "decode_seconds": round(summary["decode_time"], 3), "feature_seconds": round(summary["feature_time"], 3)},
+        "undo": {"seconds": round(undo_time, 3), "restored": restored or 0},
+        "stats": {"seconds": round(stats_time, 4), "files_per_second": rate(len(files), stats_time)},
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+#Prints new/old ratios of every seconds figure in two reports (below 1.0 means faster)
+def compare(old, new):
+    for size, stages in new["sizes"].items():
+        for stage, values in stages.items():
+            before = old["sizes"].get(size, {}).get(stage)
+            if isinstance(values, dict) and isinstance(before, dict) and before.get("seconds"):
+                ratio = values["seconds"] / before["seconds"]
+                print(f"{size:>6} files  {stage:<14} {before['seconds']:>9.3f}s → {values['seconds']:>9.3f}s  ×{ratio:.2f}",
+                      file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time scan, tag reading, analysis, sorting, undo and stats on synthetic libraries.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 100], help="Library sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of every synthetic track")
+    parser.add_argument("--analysis-sample", type=int, default=10, help="Files per size timed with get_bpm/get_key")
+    parser.add_argument("--workers", type=int, default=1, help="Analysis workers for the sort run")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--compare", metavar="REPORT", help="Earlier JSON report to compare timings against")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "seconds_per_track": args.seconds,
+        "sizes": {str(count): run_size(count, args) for count in args.sizes},
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import random
+import sys
+
+import numpy as np
+import soundfile as sf
+
+from Python.keys import KEY_NAMES, key_label
+
+MANIFEST_NAME = "manifest.json"
+FORMATS = {".mp3": "MP3", ".flac": "FLAC", ".wav": "WAV", ".aiff": "AIFF"}
+ARTISTS = ["Calibre", "Bicep", "Burial", "Four Tet", "Sub Focus", "Nia Archives", "Floating Points", "Skee Mask",
+           "Overmono", "Kelly Lee Owens", "Pinch", "Shy FX", "Jayda G", "DJ Koze", "Objekt", "Loraine James"]
+#Messy on purpose: aliases, several genres per tag and promo URLs, like real downloads
+GENRES = ["Drum & Bass", "dnb", "Drum n Bass / Jungle", "Deep House", "Techno", "UKG, Bassline", "Hip Hop",
+          "Trance", "Dubstep", "https://promo.example.com House", "Lo-Fi", "Electronica", "Breaks", ""]
+FOLDERS = ["Inbox", "Downloads", "Promos", "Bandcamp", "Old Crates", "Vinyl Rips"]
+
+#Frequency of a pitch class in the octave starting at C4
+def pitch_hz(pitch_class, octave_shift=0):
+    return 440.0 * 2 ** ((pitch_class - 9) / 12 + octave_shift)
+
+#Renders a click track at bpm over a sustained triad, so tempo and key are known exactly
+def render_track(bpm, pitch_class, minor, seconds, sr):
+    t = np.arange(int(seconds * sr)) / sr
+    third = 3 if minor else 4
+    y = 0.25 * np.sin(2 * np.pi * pitch_hz(pitch_class, -1) * t)
+    for interval, level in ((0, 0.2), (third, 0.12), (7, 0.12)):
+        y += level * np.sin(2 * np.pi * pitch_hz(pitch_class + interval) * t)
+    click = np.hanning(int(sr * 0.01)) * 0.8
+    beat_every = 60.0 / bpm
+    for beat in np.arange(0, seconds, beat_every):
+        start = int(beat * sr)
+        end = min(len(y), start + len(click))
+        y[start:end] += click[:end - start]
+    return (y / np.abs(y).max() * 0.9).astype(np.float32)
+
+#Writes artist/genre (and optionally BPM/key) tags the way common taggers do for each format
+def write_tags(path, tags):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".flac":
+        from mutagen.flac import FLAC
+        audio = FLAC(path)
+        names = {"Artist": "ARTIST", "Genre": "GENRE", "BPM": "BPM", "Key": "INITIALKEY"}
+        for field, value in tags.items():
+            audio[names[field]] = [str(value)]
+        audio.save()
+        return
+
+    from mutagen.id3 import ID3, TPE1, TCON, TBPM, TKEY
+    frames = {"Artist": TPE1, "Genre": TCON, "BPM": TBPM, "Key": TKEY}
+    if extension == ".mp3":
+        audio = None
+        id3 = ID3()
+    else:
+        from mutagen.wave import WAVE
+        from mutagen.aiff import AIFF
+        audio = (WAVE if extension == ".wav" else AIFF)(path)
+        audio.add_tags()
+        id3 = audio.tags
+    for field, value in tags.items():
+        id3.add(frames[field](encoding=3, text=[str(value)]))
+    if audio is None:
+        id3.save(path)
+    else:
+        audio.save()
+
+#Creates count files under folder and returns the manifest of ground truth per relative path
+def generate_library(folder, count, seed=1, seconds=20.0, sr=22050, tagged_bpm=0.3, formats=tuple(FORMATS)):
+    rng = random.Random(seed)
+    formats = list(formats)
+    if ".mp3" in formats and "MP3" not in sf.available_formats():
+        print("⚠️ This libsndfile cannot encode MP3; writing WAV instead.", file=sys.stderr)
+        formats = [f for f in formats if f != ".mp3"] or [".wav"]
+
+    manifest = {}
+    for i in range(count):
+        bpm = float(rng.choice(range(80, 176)))
+        pitch_class = rng.randrange(12)
+        minor = rng.random() < 0.5
+        extension = formats[i % len(formats)]
+        depth = rng.randrange(0, 3)
+        parts = [rng.choice(FOLDERS)] + [f"Disc {rng.randrange(1, 4)}" for _ in range(depth)]
+        relative = os.path.join(*parts, f"track_{i:05d}{extension}")
+        path = os.path.join(folder, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        sf.write(path, render_track(bpm, pitch_class, minor, seconds, sr), sr, format=FORMATS[extension])
+
+        tags = {"Artist": rng.choice(ARTISTS)}
+        genre = rng.choice(GENRES)
+        if genre:
+            tags["Genre"] = genre
+        if rng.random() < tagged_bpm:
+            tags["BPM"] = int(bpm)
+            tags["Key"] = key_label(pitch_class + (12 if minor else 0))
+        write_tags(path, tags)
+        manifest[relative] = {"bpm": bpm, "key": KEY_NAMES[pitch_class], "mode": "minor" if minor else "major",
+                              "tags": tags}
+
+    with open(os.path.join(folder, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"seed": seed, "seconds": seconds, "sample_rate": sr, "files": manifest}, f, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic music library with known tempos and keys.")
+    parser.add_argument("folder")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of every track")
+    parser.add_argument("--sr", type=int, default=22050, help="Sample rate of every track")
+    parser.add_argument("--tagged-bpm", type=float, default=0.3, help="Fraction of files that already carry BPM/key tags")
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS))
+    args = parser.parse_args()
+
+    manifest = generate_library(args.folder, args.count, args.seed, args.seconds, args.sr, args.tagged_bpm, args.formats)
+    print(json.dumps({"folder": os.path.abspath(args.folder), "files": len(manifest)}))
+
+if __name__ == "__main__":
+    main()
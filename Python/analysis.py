@@ -0,0 +1,56 @@
+import os
+import time
+
+from Python.metadata import get_metadata, analyze_audio
+
+#Lists the audio features the sort order (and duplicate detection, with fingerprint=True) still needs
+def required_features(meta, sort_order, bpm_enabled, fingerprint=False):
+    features = []
+    if "BPM Range" in sort_order and "BPM" not in meta and bpm_enabled:
+        features.append("BPM")
+    if "Key" in sort_order and "Key" not in meta:
+        features.append("Key")
+    if fingerprint and "Fingerprint" not in meta:
+        features.append("Fingerprint")
+    return features
+
+#Reads tags (unless already cached) and runs the audio analysis the sort order needs
+#Kept free of Qt so it can run inside process pool workers
+#With profile=True, meta["spans"] lists (stage, start, seconds) for StageProfiler.add
+def analyze_track(file_path, sort_order, bpm_enabled, meta=None, excerpt=None, profile=False, fingerprint=False):
+    spans = []
+    if meta is None:
+        start = time.perf_counter()
+        meta = get_metadata(file_path)
+        if profile:
+            spans.append(("tags", start, time.perf_counter() - start))
+    if profile:
+        meta["spans"] = spans
+        meta["pid"] = os.getpid()
+    if "error" in meta:
+        return meta
+
+    features = required_features(meta, sort_order, bpm_enabled, fingerprint)
+    if not features:
+        return meta
+    start = time.perf_counter()
+    try:
+        analysis = analyze_audio(file_path, features, excerpt, classify=False)
+    except Exception as e:
+        meta["analysis_error"] = str(e)
+        return meta
+    #The key itself is classified by the engine, many tracks' mean chroma at a time
+    meta.update({feature: analysis[feature] for feature in features if feature != "Key"})
+    if "Key" in features:
+        meta["Chroma"] = analysis["Chroma"]
+    meta["timings"] = (analysis["decode_time"], analysis["feature_time"])
+    #Tag write-back is left to the engine so files are rewritten once, after analysis
+    meta["detected"] = [feature for feature in features if feature != "Fingerprint"]
+    if profile:
+        spans.append(("decode", start, analysis["decode_time"]))
+        start += analysis["decode_time"]
+        for stage, key in (("beat_tracking", "bpm_time"), ("chroma", "key_time")):
+            if analysis[key]:
+                spans.append((stage, start, analysis[key]))
+                start += analysis[key]
+    return meta
@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+CACHE_FILENAME = "analysis_cache.sqlite3"
+
+#Fields worth persisting, everything else is derived from the path
+CACHED_FIELDS = ("Artist", "Genre", "BPM", "Key", "KeyConfidence", "Fingerprint", "Duration")
+
+#Returns the per-user cache directory for Sortify
+def default_cache_dir():
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    elif os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~\\AppData\\Local"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(base, "Sortify")
+
+#Returns the (size, mtime) signature used to invalidate cache entries
+def file_signature(file_path):
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+class AnalysisCache:
+    #Opens (or creates) the SQLite cache of tags, BPM and key per file
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = os.path.join(default_cache_dir(), CACHE_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, meta TEXT NOT NULL)"
+        )
+        #Content hashes for collision checks, kept apart so they survive re-analysis and vice versa
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, partial TEXT, full TEXT)"
+        )
+        self._conn.commit()
+
+    #Returns cached metadata for an unchanged file, or None on a miss
+    def lookup(self, file_path):
+        try:
+            size, mtime_ns = file_signature(file_path)
+        except OSError:
+            self.misses += 1
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, meta FROM analysis WHERE path = ?", (file_path,)
+            ).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            self.misses += 1
+            return None
+        self.hits += 1
+        meta = {"filename": os.path.basename(file_path), "path": file_path}
+        meta.update(json.loads(row[2]))
+        return meta
+
+    #Stores tags and detected values for a file at its current size and mtime
+    def store(self, file_path, meta):
+        if "error" in meta:
+            return
+        try:
+            size, mtime_ns = file_signature(file_path)
+        except OSError:
+            return
+        payload = json.dumps({k: meta[k] for k in CACHED_FIELDS if k in meta})
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis (path, size, mtime_ns, meta) VALUES (?, ?, ?, ?)",
+                (file_path, size, mtime_ns, payload),
+            )
+            self._conn.commit()
+
+    #Returns the cached (partial, full) content hashes of an unchanged file; either may be None
+    def lookup_hashes(self, file_path):
+        try:
+            size, mtime_ns = file_signature(file_path)
+        except OSError:
+            return None, None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, partial, full FROM hashes WHERE path = ?", (file_path,)
+            ).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None, None
+        return row[2], row[3]
+
+    #Stores content hashes for a file at its current size and mtime, keeping any hash not given
+    def store_hashes(self, file_path, partial=None, full=None):
+        try:
+            size, mtime_ns = file_signature(file_path)
+        except OSError:
+            return
+        old_partial, old_full = self.lookup_hashes(file_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, partial, full) VALUES (?, ?, ?, ?, ?)",
+                (file_path, size, mtime_ns, partial or old_partial, full or old_full),
+            )
+            self._conn.commit()
+
+    #Re-stamps an entry with the file's current size and mtime after Sortify rewrote its tags
+    def restat(self, file_path):
+        try:
+            size, mtime_ns = file_signature(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._conn.execute("UPDATE analysis SET size = ?, mtime_ns = ? WHERE path = ?", (size, mtime_ns, file_path))
+            self._conn.commit()
+
+    #Re-keys an entry after a file move so sorted files stay cached
+    def move(self, src_path, dest_path):
+        with self._lock:
+            for table in ("analysis", "hashes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE path = ?", (dest_path,))
+                self._conn.execute(f"UPDATE {table} SET path = ? WHERE path = ?", (dest_path, src_path))
+            self._conn.commit()
+
+    #Removes entries whose file is gone or has changed, returns the number of analysis entries removed
+    def prune(self):
+        removed = 0
+        for table in ("analysis", "hashes"):
+            with self._lock:
+                rows = self._conn.execute(f"SELECT path, size, mtime_ns FROM {table}").fetchall()
+            stale = []
+            for path, size, mtime_ns in rows:
+                try:
+                    if file_signature(path) != (size, mtime_ns):
+                        stale.append((path,))
+                except OSError:
+                    stale.append((path,))
+            with self._lock:
+                self._conn.executemany(f"DELETE FROM {table} WHERE path = ?", stale)
+                self._conn.commit()
+            if table == "analysis":
+                removed = len(stale)
+        return removed
+
+    #Drops every entry and resets the hit/miss counters
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis")
+            self._conn.execute("DELETE FROM hashes")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        self.hits = 0
+        self.misses = 0
+
+    #Returns hit/miss counters and the number of stored entries
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
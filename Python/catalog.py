@@ -0,0 +1,178 @@
+import threading
+
+import numpy as np
+
+from Python.keys import format_key
+
+#Width of the BPM Range folders and of the stats panel's BPM histogram bins
+BPM_BIN_WIDTH = 10
+
+UNKNOWN_ARTIST = "Unknown Artist"
+UNKNOWN_GENRE = "Unknown Genre"
+
+#Formats a BPM value into the label of its bin, e.g. "120-129 BPM"
+#The BPM is rounded first, as the integer BPM tags of ID3 and MP4 store it, so 129.6 is filed under 130-139 both
+#when it is detected and when it is read back from the tag written afterwards
+def bpm_range_label(bpm, width=BPM_BIN_WIDTH):
+    start = int(round(bpm)) // width * width
+    return f"{start}-{start + width - 1} BPM"
+
+class StringPool:
+    #Interns strings as small integer ids so each distinct artist, genre or key is stored once
+    #Id 0 stands for a missing value
+    __slots__ = ("names", "ids")
+
+    def __init__(self):
+        self.names = [None]
+        self.ids = {None: 0}
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, text):
+        found = self.ids.get(text)
+        if found is None:
+            found = self.ids[text] = len(self.names)
+            self.names.append(text)
+        return found
+
+#Column name -> dtype; BPM and duration are NaN when unknown
+#BPM stays float64 as tagged; BPM Range folders and the histogram bin it rounded, see bpm_range_label
+COLUMNS = {"artist": np.int32, "genre": np.int32, "key": np.int32, "bpm": np.float64, "duration": np.float32,
+           "size": np.int64, "mtime_ns": np.int64, "duplicate": np.bool_, "alive": np.bool_}
+
+class TrackCatalog:
+    #Compact in-memory table of tracks: one row per file, numeric columns in NumPy arrays and text columns as
+    #StringPool ids, so a 100k-track library takes a few MB and every aggregate is one vectorised pass
+    #Rows of removed tracks are reused; rows maps each path to its row
+    #Adds, removals and aggregates hold lock, so the stats panel can aggregate while a worker adds rows
+    def __init__(self, capacity=1024):
+        self.lock = threading.RLock()
+        self.artists = StringPool()
+        self.genres = StringPool()
+        self.keys = StringPool()
+        self.paths = []
+        self.rows = {}
+        self.free = []
+        for name, dtype in COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, path):
+        return path in self.rows
+
+    #Builds every doubled column before swapping any in, so the columns never differ in length
+    def _grow(self):
+        grown = {}
+        for name in COLUMNS:
+            old = getattr(self, name)
+            grown[name] = np.zeros(len(old) * 2, dtype=old.dtype)
+            grown[name][:len(old)] = old
+        for name, column in grown.items():
+            setattr(self, name, column)
+
+    #Adds a track, or updates it in place, from a metadata dict; returns its row
+    def add(self, path, meta, size=0, mtime_ns=0):
+        with self.lock:
+            return self._add(path, meta, size, mtime_ns)
+
+    def _add(self, path, meta, size, mtime_ns):
+        row = self.rows.get(path)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+                self.paths[row] = path
+            else:
+                row = len(self.paths)
+                self.paths.append(path)
+                if row >= len(self.alive):
+                    self._grow()
+            self.rows[path] = row
+        self.artist[row] = self.artists.intern(meta.get("Artist"))
+        self.genre[row] = self.genres.intern(meta.get("Genre"))
+        self.key[row] = self.keys.intern(meta.get("Key"))
+        self.bpm[row] = meta.get("BPM") or np.nan
+        self.duration[row] = meta.get("Duration") or np.nan
+        self.size[row] = size
+        self.mtime_ns[row] = mtime_ns
+        self.duplicate[row] = bool(meta.get("DuplicateOf"))
+        self.alive[row] = True
+        return row
+
+    def remove(self, path):
+        with self.lock:
+            row = self.rows.pop(path)
+            self.alive[row] = False
+            self.paths[row] = None
+            self.free.append(row)
+
+    #Returns the (size, mtime_ns) a track was added with, or None for unknown paths
+    def signature(self, path):
+        row = self.rows.get(path)
+        if row is None:
+            return None
+        return int(self.size[row]), int(self.mtime_ns[row])
+
+    def artist_name(self, row):
+        return self.artists.names[self.artist[row]]
+
+    def genre_name(self, row):
+        return self.genres.names[self.genre[row]]
+
+    def key_name(self, row):
+        return self.keys.names[self.key[row]]
+
+    #Values of a column for live rows only, given its name
+    def live(self, name):
+        with self.lock:
+            used = len(self.paths)
+            return getattr(self, name)[:used][self.alive[:used]]
+
+    #Tracks per pooled value, most common first; missing values are counted under missing
+    #label maps each stored name (None when missing) to the name it is counted under
+    def _counts(self, name, pool, missing, label=None):
+        counts = np.bincount(self.live(name), minlength=len(pool))
+        totals = {}
+        for index in np.flatnonzero(counts):
+            label_name = label(pool.names[index]) if label else pool.names[index] or missing
+            totals[label_name] = totals.get(label_name, 0) + int(counts[index])
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def artist_counts(self):
+        return self._counts("artist", self.artists, UNKNOWN_ARTIST)
+
+    #Tracks per genre; with normalize (e.g. GenreNormalizer.normalize) tags are counted under their folder genre,
+    #so "DnB" and "Drum & Bass" count as one genre, as the sort files them
+    def genre_counts(self, normalize=None):
+        return self._counts("genre", self.genres, UNKNOWN_GENRE, normalize)
+
+    #Tracks per key in the given notation, so "Am", "8A" and "A minor" tags count as one key
+    def key_counts(self, notation="camelot"):
+        counts = np.bincount(self.live("key"), minlength=len(self.keys))
+        totals = {}
+        for index in np.flatnonzero(counts):
+            name = format_key(self.keys.names[index], notation)
+            totals[name] = totals.get(name, 0) + int(counts[index])
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    #Tracks per BPM bin of the given width in ascending order; tracks without a BPM are left out
+    def bpm_histogram(self, width=BPM_BIN_WIDTH):
+        bpm = self.live("bpm")
+        starts = (np.round(bpm[~np.isnan(bpm)]) // width * width).astype(np.int64)
+        values, counts = np.unique(starts, return_counts=True)
+        return {f"{start}-{start + width - 1} BPM": int(count) for start, count in zip(values, counts)}
+
+    def total_size(self):
+        return int(self.live("size").sum())
+
+    #Returns (seconds, tracks) summed over tracks whose duration is known
+    def total_duration(self):
+        duration = self.live("duration")
+        known = ~np.isnan(duration)
+        return float(duration[known].sum(dtype=np.float64)), int(known.sum())
+
+    #Bytes held by the column arrays
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in COLUMNS)
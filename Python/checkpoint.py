@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import time
+
+from Python.cache import CACHED_FIELDS, file_signature
+from Python.genres import default_config_dir
+from Python.utils import prune_empty_dirs
+
+JOBS_DIR = os.path.join(".sortify", "jobs")
+
+#Checkpoint lines are fsynced after this many files or this many seconds, whichever comes first
+CHECKPOINT_EVERY = 100
+CHECKPOINT_SECONDS = 15.0
+
+#A sort keeps its checkpoint in the library beside its journals; a preview must not write into the library,
+#so its checkpoint lives in the per-user config directory under a name derived from the library's path
+def jobs_dir(folder_path, preview=False):
+    if not preview:
+        return os.path.join(folder_path, JOBS_DIR)
+    library = hashlib.sha1(os.path.abspath(folder_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(default_config_dir(), "jobs", library)
+
+class JobCheckpoint:
+    #Append-only record of an unfinished sort or preview: a settings line, then one line per finished file
+    #settings holds the SortOptions plan settings plus preview, so the job can be resumed as it was started
+    def __init__(self, path, settings, results=None):
+        self.path = path
+        self.settings = settings
+        self.results = results or {}
+        self._file = None
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    @classmethod
+    def create(cls, folder_path, options, preview):
+        directory = jobs_dir(folder_path, preview)
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() % 1_000_000_000:09d}"
+        settings = {"folder": folder_path, **options.plan_settings(), "preview": preview, "started": time.time()}
+        checkpoint = cls(os.path.join(directory, f"{stamp}.jsonl"), settings)
+        checkpoint.write({"op": "job", **settings})
+        checkpoint.sync()
+        return checkpoint
+
+    #Reads a checkpoint back; a torn final line from a crash is ignored
+    @classmethod
+    def load(cls, path):
+        settings = None
+        results = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record.get("op") == "job":
+                    settings = {k: v for k, v in record.items() if k != "op"}
+                elif record.get("op") == "file":
+                    results[record["path"]] = (record["signature"], record["fields"])
+        if settings is None:
+            raise ValueError(f"{path} has no job header")
+        return cls(path, settings, results)
+
+    #Returns options with the plan settings this job was started with; workers and tag reading stay as given
+    def resume_options(self, options):
+        return options.with_plan_settings(self.settings)
+
+    def __len__(self):
+        return len(self.results)
+
+    #Returns the checkpointed metadata of an unchanged file, or None
+    def lookup(self, file_path):
+        entry = self.results.get(file_path)
+        if entry is None:
+            return None
+        try:
+            if list(file_signature(file_path)) != entry[0]:
+                return None
+        except OSError:
+            return None
+        meta = {"filename": os.path.basename(file_path), "path": file_path}
+        meta.update(entry[1])
+        return meta
+
+    #Remembers a finished file; lines reach the disk in batches
+    def record(self, file_path, meta):
+        try:
+            signature = list(file_signature(file_path))
+        except OSError:
+            return
+        fields = {k: meta[k] for k in CACHED_FIELDS if k in meta}
+        self.results[file_path] = (signature, fields)
+        self.write({"op": "file", "path": file_path, "signature": signature, "fields": fields})
+        if self._unsynced >= CHECKPOINT_EVERY or time.monotonic() - self._synced_at >= CHECKPOINT_SECONDS:
+            self.sync()
+
+    def write(self, record):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+
+    def sync(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    #Flushes what is left and keeps the checkpoint on disk for a later resume
+    def close(self):
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    #Deletes the checkpoint once the job no longer needs resuming, along with the job folders that leaves empty,
+    #so a finished sort or preview leaves no trace behind
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        root = default_config_dir() if self.settings.get("preview") else self.settings["folder"]
+        prune_empty_dirs([os.path.dirname(self.path)], root)
+
+#Returns the unfinished sorts and previews of a library root, newest first; unreadable checkpoints are skipped
+def find_checkpoints(folder_path):
+    paths = []
+    for directory in (jobs_dir(folder_path), jobs_dir(folder_path, preview=True)):
+        if os.path.isdir(directory):
+            paths += [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".jsonl")]
+    checkpoints = []
+    for path in sorted(paths, key=os.path.basename, reverse=True):
+        try:
+            checkpoints.append(JobCheckpoint.load(path))
+        except (OSError, ValueError, KeyError):
+            continue
+    return checkpoints
@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import signal
+import sys
+
+from Python.cache import AnalysisCache
+from Python.catalog import BPM_BIN_WIDTH
+from Python.checkpoint import JobCheckpoint, find_checkpoints
+from Python.collisions import IDENTICAL_POLICIES
+from Python.engine import SORT_CRITERIA, SortEngine, undo_last_sort, recover_interrupted
+from Python.journal import find_interrupted
+from Python.keys import KEY_NOTATIONS
+from Python.plan import SortPlan
+from Python.library_stats import LibraryStats
+from Python.options import SortOptions
+from Python.profiling import StageProfiler
+from Python.tag_readers import TAG_READ_AHEAD, TAG_THREADS
+from Python.utils import BackgroundScan, iter_music_files
+from Python.views import DEFAULT_LINK_KIND, LINK_KINDS, find_views
+from Python.watch import watch_folder, FILE_CHECK_INTERVAL, POLL_INTERVAL, SETTLE_SECONDS
+
+#Accepts "bpm", "bpm-range" or "BPM Range" style spellings for sort criteria
+CRITERIA_ALIASES = {c.lower().replace(" ", "-"): c for c in SORT_CRITERIA}
+CRITERIA_ALIASES["bpm"] = "BPM Range"
+
+#Prints one JSON object per line so other tools can follow the run
+def emit(event):
+    print(json.dumps(event, ensure_ascii=False), flush=True)
+
+def parse_criterion(value):
+    key = value.strip().lower().replace(" ", "-")
+    if key not in CRITERIA_ALIASES:
+        raise argparse.ArgumentTypeError(f"unknown sort criterion {value!r} (choose from {', '.join(SORT_CRITERIA)})")
+    return CRITERIA_ALIASES[key]
+
+#Tag reading is latency-bound on network shares, so both knobs are offered wherever tags are read
+def add_tag_reading_arguments(command):
+    command.add_argument("--tag-threads", type=int, default=TAG_THREADS,
+                         help="Files whose tags are read at the same time; raise it for SMB/NFS shares")
+    command.add_argument("--read-ahead", type=int, default=TAG_READ_AHEAD // 1024, metavar="KIB",
+                         help="KiB fetched by the first read of each file, enough to cover its tag header")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sortify", description="Sort a music library without the GUI. Output is JSON lines.")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the analysis cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="List the music files Sortify would process")
+    scan.add_argument("folder")
+    scan.add_argument("--follow-symlinks", action="store_true", help="Descend into symlinked folders")
+
+    for name, text in (("preview", "Show where each file would go"), ("sort", "Move files into sorted folders"),
+                       ("watch", "Keep running and sort new files as they arrive"),
+                       ("views", "Leave files in place and link them into sorted views")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument("folder")
+        command.add_argument("--order", nargs="+", type=parse_criterion,
+                             help=f"Sort criteria in order: {', '.join(SORT_CRITERIA)}")
+        command.add_argument("--bpm", action="store_true", help="Detect BPM for files without a BPM tag")
+        command.add_argument("--workers", type=int, default=1, help="Processes used for audio analysis")
+        add_tag_reading_arguments(command)
+        command.add_argument("--fast", type=float, metavar="SECONDS",
+                             help="Analyse excerpts of this many seconds instead of whole tracks")
+        command.add_argument("--excerpts", type=int, default=1, help="Number of excerpts per track with --fast")
+        command.add_argument("--no-write-tags", action="store_true",
+                             help="Do not write detected BPM and key back into the files' tags")
+        command.add_argument("--key-notation", choices=KEY_NOTATIONS, default="camelot",
+                             help="Name Key folders as Camelot (8A), Open Key (1m) or standard (A minor) keys")
+        command.add_argument("--duplicates", action="store_true",
+                             help="Fingerprint every track and report repeated recordings")
+        command.add_argument("--duplicates-folder", action="store_true",
+                             help="Like --duplicates, and plan the extra copies into a Duplicates folder")
+        if name != "views":
+            command.add_argument("--identical", choices=IDENTICAL_POLICIES, default="skip",
+                                 help="What to do with a file whose exact bytes are already at its destination: "
+                                      "leave it where it is, or also replace it with a hardlink to that file")
+            command.add_argument("--save-plan", metavar="PATH", help="Write the move plan as JSON for a later 'apply'")
+        command.add_argument("--follow-symlinks", action="store_true", help="Descend into symlinked folders")
+        if name != "watch":
+            command.add_argument("--analyse-first", metavar="PATH", action="append", default=[],
+                                 help="Analyse files in this subfolder before any others; repeat for more")
+
+    for name in ("preview", "sort"):
+        commands.choices[name].add_argument("--resume", action="store_true",
+                                            help="Continue the newest cancelled or crashed job of this folder with its "
+                                                 "settings, skipping the files it already finished")
+        commands.choices[name].add_argument("--profile", action="store_true",
+                                            help="Report time per stage and the slowest files in the summary")
+        commands.choices[name].add_argument("--trace", metavar="PATH",
+                                            help="Write a Chrome trace-event file of every stage (implies --profile)")
+    commands.choices["views"].add_argument("--layout", nargs="+", type=parse_criterion, action="append", default=[],
+                                           help="Another view's criteria; repeat for more views. Without --order or "
+                                                "--layout every existing view is updated")
+    commands.choices["views"].add_argument("--link", choices=LINK_KINDS, default=DEFAULT_LINK_KIND,
+                                           help="Link type used in the views")
+    commands.choices["watch"].add_argument("--interval", type=float, default=POLL_INTERVAL,
+                                           help="Seconds between checks for new files")
+    commands.choices["watch"].add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                                           help="Seconds a new file must stop changing before it is sorted")
+    commands.choices["watch"].add_argument("--recheck", type=float, nargs="?", const=FILE_CHECK_INTERVAL,
+                                           metavar="SECONDS",
+                                           help="Also re-check every known file this often (default "
+                                                f"{FILE_CHECK_INTERVAL:g}) to catch files rewritten in place; "
+                                                "this stats the whole library each time")
+
+    apply = commands.add_parser("apply", help="Apply a saved move plan without reanalysing")
+    apply.add_argument("plan")
+
+    undo = commands.add_parser("undo", help="Move the files of the last sort back to their original paths")
+    undo.add_argument("folder")
+
+    recover = commands.add_parser("recover", help="Finish or roll back a sort or undo that was interrupted")
+    recover.add_argument("folder")
+    recover.add_argument("--rollback", action="store_true", help="Revert the interrupted moves instead of finishing them")
+
+    stats = commands.add_parser("stats", help="Print genre, artist, BPM and size statistics")
+    stats.add_argument("folder")
+    stats.add_argument("--bpm-width", type=int, default=BPM_BIN_WIDTH, help="Width of the BPM histogram bins")
+    stats.add_argument("--key-notation", choices=KEY_NOTATIONS, default="camelot", help="Notation of the key counts")
+    add_tag_reading_arguments(stats)
+
+    cache = commands.add_parser("cache", help="Inspect or maintain the analysis cache")
+    cache.add_argument("action", choices=["stats", "prune", "clear"])
+    return parser
+
+#Builds SortOptions from the arguments of preview, sort, watch or views; sort_order defaults to --order
+def sort_options(args, sort_order=None):
+    return SortOptions(sort_order or args.order, args.bpm, (args.fast, args.excerpts) if args.fast else None,
+                       args.key_notation, args.duplicates, args.duplicates_folder, getattr(args, "identical", "skip"),
+                       getattr(args, "analyse_first", ()), args.workers, not args.no_write_tags, args.tag_threads,
+                       args.read_ahead * 1024)
+
+#Ctrl+C stops a run after the current file, keeping its checkpoint; a second Ctrl+C exits at once
+def cancel_on_interrupt(engine):
+    def interrupt(signum, frame):
+        emit({"event": "cancelling"})
+        engine.cancel()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+    return signal.signal(signal.SIGINT, interrupt)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in ("preview", "sort", "watch") and not args.order and not getattr(args, "resume", False):
+        parser.error("--order is required")
+    folder = getattr(args, "folder", None)
+    if folder is not None:
+        folder = os.path.abspath(folder)
+        if not os.path.isdir(folder):
+            emit({"event": "error", "error": f"not a folder: {folder}"})
+            return 2
+
+    if args.command == "cache":
+        cache = AnalysisCache()
+        if args.action == "prune":
+            emit({"event": "cache", "pruned": cache.prune(), **cache.stats()})
+        elif args.action == "clear":
+            cache.clear()
+            emit({"event": "cache", "cleared": True, **cache.stats()})
+        else:
+            emit({"event": "cache", **cache.stats()})
+        return 0
+
+    if args.command in ("sort", "watch", "apply", "undo"):
+        root = folder if folder is not None else SortPlan.load(args.plan).folder_path
+        interrupted = find_interrupted(root)
+        if interrupted:
+            emit({"event": "error", "error": "an earlier run was interrupted; run 'sortify recover' first",
+                  "journals": [j["path"] for j in interrupted]})
+            return 3
+
+    cache = None if args.no_cache else AnalysisCache()
+    try:
+        if args.command == "scan":
+            found = 0
+            for file_path in iter_music_files(folder, follow_symlinks=args.follow_symlinks):
+                found += 1
+                emit({"event": "found", "file": file_path})
+            emit({"event": "summary", "files": found})
+
+        elif args.command in ("preview", "sort"):
+            preview = args.command == "preview"
+            if args.resume:
+                checkpoints = find_checkpoints(folder)
+                if not checkpoints:
+                    emit({"event": "error", "error": "no unfinished job to resume"})
+                    return 1
+                checkpoint = checkpoints[0]
+                options = checkpoint.resume_options(sort_options(args))
+                emit({"event": "resuming", "checkpoint": checkpoint.path, "done": len(checkpoint)})
+            else:
+                options = sort_options(args)
+                checkpoint = JobCheckpoint.create(folder, options, preview)
+            profiler = StageProfiler(trace=bool(args.trace)) if args.profile or args.trace else None
+            engine = SortEngine(folder, options, cache, on_progress=emit, profiler=profiler, checkpoint=checkpoint)
+            files = BackgroundScan(iter_music_files(folder, follow_symlinks=args.follow_symlinks))
+            previous_handler = cancel_on_interrupt(engine)
+            try:
+                plan, summary = engine.run(files, preview)
+            finally:
+                signal.signal(signal.SIGINT, previous_handler)
+            if args.trace:
+                summary["trace"] = os.path.abspath(profiler.write_trace(args.trace))
+            if args.save_plan and not summary.get("cancelled"):
+                plan.save(args.save_plan)
+                summary["plan"] = os.path.abspath(args.save_plan)
+            emit(dict(summary, event="summary"))
+            if summary.get("cancelled"):
+                return 130
+
+        elif args.command == "watch":
+            engine = SortEngine(folder, sort_options(args), cache, on_progress=emit)
+            emit({"event": "watching", "folder": folder})
+            try:
+                watch_folder(engine, args.interval, args.settle,
+                             on_batch=lambda plan, summary: emit(dict(summary, event="batch")),
+                             file_check_interval=args.recheck)
+            except KeyboardInterrupt:
+                emit({"event": "summary", "watching": False})
+
+        elif args.command == "views":
+            layouts = ([args.order] if args.order else []) + args.layout
+            for layout in find_views(folder):
+                if layout not in layouts:
+                    layouts.append(layout)
+            if not layouts:
+                emit({"event": "error", "error": "no views yet; give --order or --layout"})
+                return 1
+            engine = SortEngine(folder, sort_options(args, layouts[0]), cache, on_progress=emit)
+            files = BackgroundScan(iter_music_files(folder, follow_symlinks=args.follow_symlinks))
+            previous_handler = cancel_on_interrupt(engine)
+            try:
+                summary = engine.run_views(files, layouts, args.link)
+            finally:
+                signal.signal(signal.SIGINT, previous_handler)
+            emit(dict(summary, event="summary"))
+            if summary.get("cancelled"):
+                return 130
+
+        elif args.command == "apply":
+            plan = SortPlan.load(args.plan)
+            engine = SortEngine(plan.folder_path, SortOptions(plan.sort_order), cache, on_progress=emit)
+            emit(dict(engine.apply(plan), event="summary"))
+
+        elif args.command == "undo":
+            restored = undo_last_sort(folder, cache, on_progress=emit)
+            if restored is None:
+                emit({"event": "error", "error": "nothing to undo"})
+                return 1
+            emit({"event": "summary", "restored": restored})
+
+        elif args.command == "recover":
+            recovered = recover_interrupted(folder, not args.rollback, cache, on_progress=emit)
+            emit({"event": "summary", "recovered": recovered, "rolled_back": args.rollback})
+
+        elif args.command == "stats":
+            stats = LibraryStats(folder, args.bpm_width, args.key_notation)
+            stats.refresh(cache, tag_threads=args.tag_threads, read_ahead=args.read_ahead * 1024)
+            summary = stats.summary()
+            seconds, timed = summary.pop("duration")
+            emit(dict(summary, event="stats", duration_seconds=round(seconds, 1), timed_tracks=timed))
+    except Exception as e:
+        emit({"event": "error", "error": str(e)})
+        return 1
+    finally:
+        if cache:
+            cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import hashlib
+import os
+
+from Python.profiling import NULL_PROFILER
+
+#Head and tail blocks read for the cheap partial hash; files up to twice this size are hashed whole
+PARTIAL_BLOCK = 64 * 1024
+HASH_CHUNK = 1024 * 1024
+
+IDENTICAL_POLICIES = ("skip", "link")
+
+#Suffix added before the extension when a different file already has a name, e.g. "Track (2).mp3"
+def suffixed(path, n):
+    stem, ext = os.path.splitext(path)
+    return f"{stem} ({n}){ext}"
+
+#Destinations are compared case-insensitively so plans stay safe on macOS, Windows and exFAT drives
+def path_key(path):
+    return os.path.normcase(os.path.abspath(path)).casefold()
+
+class ContentHasher:
+    #Decides whether two files hold the same bytes: size first, then head/tail blocks, and only then every byte
+    #Hashes go through the analysis cache when one is given, so repeat runs do not reread unchanged files
+    def __init__(self, cache=None, profiler=NULL_PROFILER):
+        self.cache = cache
+        self.profiler = profiler
+        self.memo = {}
+        self.bytes_read = 0
+
+    def hashes(self, file_path):
+        if file_path not in self.memo:
+            self.memo[file_path] = list(self.cache.lookup_hashes(file_path)) if self.cache else [None, None]
+        return self.memo[file_path]
+
+    def partial(self, file_path):
+        known = self.hashes(file_path)
+        if known[0] is None:
+            with self.profiler.span("partial_hash", file_path):
+                digest = hashlib.blake2b(digest_size=16)
+                size = os.path.getsize(file_path)
+                with open(file_path, "rb") as f:
+                    head = f.read(PARTIAL_BLOCK)
+                    digest.update(head)
+                    self.bytes_read += len(head)
+                    if size > PARTIAL_BLOCK * 2:
+                        f.seek(-PARTIAL_BLOCK, os.SEEK_END)
+                    tail = f.read()
+                    digest.update(tail)
+                    self.bytes_read += len(tail)
+                known[0] = f"{size}:{digest.hexdigest()}"
+            if self.cache:
+                self.cache.store_hashes(file_path, partial=known[0])
+        return known[0]
+
+    def full(self, file_path):
+        known = self.hashes(file_path)
+        if known[1] is None:
+            with self.profiler.span("full_hash", file_path):
+                digest = hashlib.blake2b()
+                with open(file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                        digest.update(chunk)
+                        self.bytes_read += len(chunk)
+                known[1] = digest.hexdigest()
+            if self.cache:
+                self.cache.store_hashes(file_path, full=known[1])
+        return known[1]
+
+    def identical(self, a, b):
+        try:
+            if os.path.samefile(a, b):
+                return True
+            if os.path.getsize(a) != os.path.getsize(b):
+                return False
+            if self.partial(a) != self.partial(b):
+                return False
+            return self.full(a) == self.full(b)
+        except OSError:
+            return False
+
+#Gives every planned move a destination no other file uses, in a deterministic order
+#moves is a list of (source, destination) pairs; returns (destinations, identical) where destinations maps each
+#source to its final path and identical maps sources whose bytes already sit at their destination to that file
+def resolve_collisions(moves, hasher):
+    destinations = {}
+    identical = {}
+    #Key -> path whose bytes will end up there: another planned source, or a file already on disk
+    claimed = {}
+    #Sources are settled in path order, so the same library always gets the same suffixes
+    for source, destination in sorted(moves):
+        candidate = destination
+        n = 2
+        while True:
+            key = path_key(candidate)
+            holder = claimed.get(key)
+            if holder is None and not os.path.lexists(candidate):
+                claimed[key] = source
+                destinations[source] = candidate
+                break
+            occupant = holder if holder is not None else candidate
+            if hasher.identical(source, occupant):
+                identical[source] = occupant
+                break
+            claimed.setdefault(key, candidate)
+            candidate = suffixed(destination, n)
+            n += 1
+    return destinations, identical
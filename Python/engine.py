@@ -0,0 +1,588 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from Python.catalog import UNKNOWN_ARTIST, TrackCatalog, bpm_range_label
+from Python.collisions import ContentHasher, resolve_collisions
+from Python.fingerprint import DUPLICATES_FOLDER, find_duplicates
+from Python.genres import genre_normalizer
+from Python.analysis import analyze_track
+from Python.keys import UNKNOWN_KEY, classify_keys, format_key, key_label
+from Python.journal import JournalWriter, replay, completed_moves, find_undoable, find_interrupted, make_all_dirs
+from Python.plan import SortPlan
+from Python.profiling import NULL_PROFILER, format_profile
+from Python.options import SortOptions
+from Python.scheduling import TIER_POLL, TagTier
+from Python.tag_writers import WriteBackQueue
+from Python.utils import sanitize_filename, prune_empty_dirs
+from Python.views import DEFAULT_LINK_KIND, update_view, view_name
+
+SORT_CRITERIA = ["Artist", "Genre", "BPM Range", "Key", "Alphabetical"]
+
+#Analysed tracks wait for at most this many others, or this long, before their keys are classified together
+KEY_BATCH = 256
+KEY_BATCH_SECONDS = 0.5
+
+#Log filter status of each event kind; anything else is plain information
+EVENT_STATUS = {"planned": "moved", "moved": "moved", "restored": "moved", "skipped": "skipped",
+                "failed": "error", "tag_failed": "error", "duplicate": "duplicate", "linked": "moved",
+                "link_failed": "error", "identical": "duplicate", "renamed": "moved", "aliases_ignored": "error"}
+
+def event_status(event):
+    return EVENT_STATUS.get(event["event"], "info")
+
+#Turns an engine event into the one-line log message shown in the GUI
+def format_event(event):
+    kind = event["event"]
+    timing = ""
+    if "decode_time" in event:
+        timing = f" (decode {event['decode_time']:.2f}s, features {event['feature_time']:.2f}s)"
+    if kind == "skipped":
+        return f"⚠️ Skipped: {event['filename']} ({event['stage']} error: {event['error']})"
+    if kind == "planned":
+        return f"\U0001F4C2 {event['filename']} → {event['folder']}{timing}"
+    if kind == "moved":
+        return f"✅ Moved: {event['filename']} → {event['folder']}{timing}"
+    if kind == "restored":
+        return f"↩️ {event['filename']} → {event['folder']}"
+    if kind == "failed":
+        return f"❌ Failed to move: {event['file']} ({event['error']})"
+    if kind == "tag_failed":
+        return f"⚠️ Could not write tags: {event['filename']} ({event['error']})"
+    if kind == "aliases_ignored":
+        return f"⚠️ Ignoring genre aliases in {event['error']}"
+    if kind == "tier":
+        return (f"⚡ Tags placed {event['placed']} files; {event['queued']} more are waiting for audio analysis, "
+                "shortest first")
+    if kind == "read":
+        return f"🔎 {event['filename']}{timing}"
+    if kind == "linked":
+        return f"🔗 {event['filename']} → {event['folder']}"
+    if kind == "unlinked":
+        return f"✂️ Unlinked: {event['filename']} from {event['folder']}"
+    if kind == "link_failed":
+        return f"❌ Could not link: {event['filename']} ({event['error']})"
+    if kind == "identical":
+        return f"🧬 Identical: {event['filename']} is byte-for-byte {event['keeper']}, left in place"
+    if kind == "renamed":
+        return f"🏷️ Name taken: {event['filename']} → {event['folder']} as {os.path.basename(event['dest'])}"
+    if kind == "duplicate":
+        return f"🔁 Duplicate: {event['filename']} is a copy of {os.path.basename(event['keeper'])} → {event['folder']}"
+    return str(event)
+
+#Turns a run summary into the completion message shown in the GUI
+def format_summary(summary):
+    msg = "\nPreview Complete." if summary["preview"] else "\n✅ Sorting Complete."
+    if "views" in summary:
+        msg = "\n🔗 Views Updated."
+        for name, counts in summary["views"].items():
+            msg += (f"\n   {name}: {counts['links_added']} linked, {counts['links_removed']} unlinked, "
+                    f"{counts['links_kept']} unchanged")
+            if counts["link_errors"]:
+                msg += f", {counts['link_errors']} failed"
+    if summary.get("cancelled") and summary["preview"]:
+        msg = (f"\n⏹️ Cancelled after {summary['planned'] + summary['skipped']} files. "
+               "The analysis so far is saved and the job can be resumed.")
+    elif summary.get("cancelled"):
+        msg = (f"\n⏹️ Cancelled after {summary['moved']} moves. "
+               "The remaining moves can be finished or rolled back next time the folder is opened.")
+    if summary["analysed"]:
+        msg += (f"\n⏱️ Audio analysis of {summary['analysed']} tracks: "
+                f"decode {summary['decode_time']:.1f}s, features {summary['feature_time']:.1f}s")
+    if "duplicates" in summary:
+        msg += f"\n🔁 Duplicates: {summary['duplicates']} extra copies of {summary['duplicate_groups']} tracks"
+    if summary.get("identical") or summary.get("renamed"):
+        msg += (f"\n🧬 Collisions: {summary.get('identical', 0)} identical copies not moved, "
+                f"{summary.get('renamed', 0)} files renamed to avoid overwriting")
+    if summary.get("identical_linked"):
+        msg += f"\n🔗 {summary['identical_linked']} identical copies replaced with hardlinks"
+    if summary.get("failed"):
+        msg += f"\n❌ {summary['failed']} files could not be moved."
+    if summary.get("tags_written") or summary.get("tag_errors"):
+        msg += f"\n🏷️ Tags: {summary['tags_written']} files updated, {summary['tags_unchanged']} already up to date"
+        if summary["tag_errors"]:
+            msg += f", {summary['tag_errors']} failed"
+    if "cache_hits" in summary:
+        msg += f"\n🗄️ Cache: {summary['cache_hits']} hits, {summary['cache_misses']} misses"
+    if "profile" in summary:
+        msg += "\n" + format_profile(summary["profile"])
+    if "trace" in summary:
+        msg += f"\n📈 Trace written to {summary['trace']}"
+    return msg
+
+#The tag tier's threads are already running when the analysis pool starts, and forking a process that has threads
+#can leave a lock held forever in the child, so workers are started fresh instead
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+#Pool initializer: Ctrl+C goes to the parent, which cancels between files, instead of killing workers mid-analysis
+def ignore_interrupts():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+#How many files the scan has found so far; files may be a list or a still-running BackgroundScan
+def discovered_count(files, done):
+    if hasattr(files, "discovered"):
+        return max(files.discovered, done)
+    if hasattr(files, "__len__"):
+        return len(files)
+    return done
+
+class SortEngine:
+    #Runs a sort with the given SortOptions; on_progress receives one event dict per processed file
+    #A StageProfiler passed as profiler collects per-stage timings, see Python.profiling
+    #A JobCheckpoint records finished files so a cancelled or crashed run can resume, see Python.checkpoint
+    def __init__(self, folder_path, options=None, cache=None, on_progress=None, profiler=None, checkpoint=None):
+        options = options or SortOptions()
+        self.folder_path = folder_path
+        self.options = options
+        self.sort_order = list(options.sort_order)
+        self.bpm_enabled = options.bpm_enabled
+        self.cache = cache
+        self.workers = max(1, options.workers)
+        self.excerpt = options.excerpt
+        self.on_progress = on_progress or (lambda event: None)
+        self.last_sort_map = {}
+        self.genres = genre_normalizer()
+        self.writeback = WriteBackQueue() if options.write_tags else None
+        self.profiler = profiler or NULL_PROFILER
+        self.checkpoint = checkpoint
+        self.key_notation = options.key_notation
+        self.find_duplicates = options.find_duplicates or options.duplicates_folder
+        self.duplicates_folder = options.duplicates_folder
+        self.identical = options.identical
+        self.analyse_first = options.analyse_first
+        self.tag_threads = max(1, options.tag_threads)
+        self.read_ahead = options.read_ahead
+        self.hasher = ContentHasher(cache, self.profiler)
+        self.catalog = TrackCatalog()
+        self.stopping = False
+
+    #Asks a running plan or apply to stop after the file it is working on; safe to call from another thread
+    def cancel(self):
+        self.stopping = True
+
+    #Sorts songs into genres despite metadata aliases, reading the track's row of the catalog
+    #sort_order defaults to the engine's own; views pass their layouts here
+    def build_sort_path(self, row, sort_order=None):
+        catalog = self.catalog
+        parts = []
+        for crit in sort_order or self.sort_order:
+            if crit == "Artist":
+                parts.append(catalog.artist_name(row) or UNKNOWN_ARTIST)
+            elif crit == "Genre":
+                parts.append(self.genres.normalize(catalog.genre_name(row)))
+            elif crit == "BPM Range":
+                bpm = catalog.bpm[row]
+                parts.append("Unknown BPM" if np.isnan(bpm) else bpm_range_label(float(bpm)))
+            elif crit == "Alphabetical":
+                char = os.path.basename(catalog.paths[row])[0].upper()
+                parts.append(char if char.isalpha() else "#")
+            elif crit == "Key":
+                parts.append(format_key(catalog.key_name(row), self.key_notation))
+        if self.duplicates_folder and catalog.duplicate[row]:
+            parts.insert(0, DUPLICATES_FOLDER)
+        return os.path.join(*parts)
+
+    #Records a file's metadata in the catalog and returns its (destination path, folder structure)
+    def destination(self, file_path, meta):
+        folder_structure = self.build_sort_path(self.catalog.add(file_path, meta))
+        sanitized_name = sanitize_filename(os.path.basename(file_path))
+        return os.path.join(self.folder_path, folder_structure, sanitized_name), folder_structure
+
+    #Returns what an earlier attempt of this job or the analysis cache already knows about a file
+    def lookup(self, file_path):
+        if self.checkpoint is not None:
+            resumed = self.checkpoint.lookup(file_path)
+            if resumed is not None:
+                return resumed
+        if not self.cache:
+            return None
+        with self.profiler.span("cache_lookup", file_path):
+            return self.cache.lookup(file_path)
+
+    #Runs one queued analysis: in the pool when there is one, otherwise on the calling thread
+    def start_analysis(self, pool, pending, job):
+        i, file_path, meta = job
+        args = (file_path, self.sort_order, self.bpm_enabled, meta, self.excerpt, self.profiler.enabled,
+                self.find_duplicates)
+        if pool is None:
+            return [(i, file_path, analyze_track(*args), True)]
+        pending[pool.submit(analyze_track, *args)] = (i, file_path)
+        return []
+
+    #Yields (index, path, meta, fresh) in two tiers: files whose cached data or tags settle their folder come out
+    #as soon as the tag tier reads them, while files needing BPM, key or fingerprint analysis queue behind them
+    #shortest first (files under analyse_first before any other) and come out as their analysis finishes
+    #With workers > 1 analysis fans out to a process pool, otherwise it runs here between tag-tier results
+    def iter_tiered(self, files):
+        tier = TagTier(self, files, self.analyse_first)
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=ignore_interrupts,
+                                       mp_context=multiprocessing.get_context(POOL_START_METHOD))
+        capacity = self.workers * 2 if pool else 1
+        pending = {}
+        announced = False
+        try:
+            #Checked here as well as in plan_files, since key batching may pull many results before plan_files sees one
+            while not self.stopping:
+                finished = tier.finished
+                yield from tier.take_ready()
+                if finished and not announced and tier.queued:
+                    announced = True
+                    self.on_progress({"event": "tier", "placed": tier.placed, "queued": tier.queued})
+                job = tier.pop() if len(pending) < capacity else None
+                if job is not None:
+                    yield from self.start_analysis(pool, pending, job)
+                elif pending:
+                    yield from self.drain(pending, TIER_POLL)
+                elif tier.exhausted():
+                    return
+                else:
+                    tier.wait()
+        finally:
+            tier.stop()
+            #On cancel, queued files are dropped; only the ones already running are waited for
+            for future in pending:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    #Waits for at least one pool result, or at most timeout seconds, and yields every finished one
+    def drain(self, pending, timeout=None):
+        done, _ = wait(pending, timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            i, file_path = pending.pop(future)
+            try:
+                meta = future.result()
+            except Exception as e:
+                meta = {"filename": os.path.basename(file_path), "path": file_path, "analysis_error": str(e)}
+            yield i, file_path, meta, True
+
+    #Holds back analysed tracks that still need a key and classifies them together with one matrix product
+    #A batch goes out when full, when it has waited KEY_BATCH_SECONDS, or at once when results arrive slowly,
+    #so serial analysis is not held up while a parallel or mostly cached run gets large batches
+    def classify_batches(self, results):
+        batch = []
+        oldest = arrived = time.monotonic()
+        for item in results:
+            now = time.monotonic()
+            waited = now - arrived
+            arrived = now
+            if "Chroma" not in item[2]:
+                yield item
+                continue
+            if not batch:
+                oldest = now
+            batch.append(item)
+            if len(batch) >= KEY_BATCH or now - oldest >= KEY_BATCH_SECONDS or waited >= KEY_BATCH_SECONDS:
+                yield from self.classify_batch(batch)
+                batch = []
+        if batch:
+            yield from self.classify_batch(batch)
+
+    def classify_batch(self, batch):
+        with self.profiler.span("key_classification"):
+            indices, confidences = classify_keys([item[2].pop("Chroma") for item in batch])
+        for item, index, confidence in zip(batch, indices, confidences):
+            item[2]["Key"] = key_label(int(index)) if index >= 0 else UNKNOWN_KEY
+            item[2]["KeyConfidence"] = round(float(confidence), 3)
+            yield item
+
+    #Remembers where a file went once the journal has moved it
+    def record_move(self, file_path, dest_path):
+        self.last_sort_map[file_path] = dest_path
+        if self.cache:
+            self.cache.move(file_path, dest_path)
+
+    #Consumes analysis results into planned (index, source, destination, folder, meta) tuples and summary counts
+    def plan_files(self, files, results, summary, planned):
+        done = 0
+        for i, file_path, meta, fresh in results:
+            if self.stopping:
+                summary["cancelled"] = True
+                break
+            done += 1
+            for stage, start, seconds in meta.pop("spans", ()):
+                self.profiler.add(stage, seconds, file_path, start, meta.get("pid"))
+            meta.pop("pid", None)
+            event = {"done": done, "discovered": discovered_count(files, done), "file": file_path,
+                     "filename": meta["filename"]}
+            if "error" in meta or "analysis_error" in meta:
+                stage = "metadata" if "error" in meta else "analysis"
+                summary["skipped"] += 1
+                self.on_progress(dict(event, event="skipped", stage=stage,
+                                      error=meta.get("error", meta.get("analysis_error"))))
+                continue
+
+            if "timings" in meta:
+                decode_time, feature_time = meta.pop("timings")
+                summary["decode_time"] += decode_time
+                summary["feature_time"] += feature_time
+                summary["analysed"] += 1
+                event["decode_time"] = decode_time
+                event["feature_time"] = feature_time
+            detected = meta.pop("detected", ())
+            #A key too uncertain to name is sorted as unknown but never written into the file
+            detected = [feature for feature in detected if meta[feature] != UNKNOWN_KEY]
+            if self.writeback is not None and detected:
+                self.writeback.add(file_path, {feature: meta[feature] for feature in detected})
+
+            if self.cache and fresh:
+                with self.profiler.span("cache_store", file_path):
+                    self.cache.store(file_path, meta)
+            if self.checkpoint is not None and (fresh or file_path not in self.checkpoint.results):
+                self.checkpoint.record(file_path, meta)
+
+            dest_path, folder_structure = self.destination(file_path, meta)
+            planned.append((i, file_path, dest_path, folder_structure, meta))
+            summary["planned"] += 1
+            self.on_progress(dict(event, event="planned", folder=folder_structure, dest=dest_path))
+
+    #Finds repeated recordings among the planned files through an LSH index of their fingerprints
+    #The best copy of each group keeps its place; the others are reported and, with duplicates_folder, re-planned
+    def mark_duplicates(self, planned, summary):
+        fingerprints = {entry[1]: entry[4]["Fingerprint"] for entry in planned if "Fingerprint" in entry[4]}
+        with self.profiler.span("duplicate_search"):
+            duplicates = find_duplicates(fingerprints)
+        summary["duplicates"] = len(duplicates)
+        summary["duplicate_groups"] = len(set(duplicates.values()))
+        done = summary["planned"] + summary["skipped"]
+        for n, (i, file_path, dest_path, folder_structure, meta) in enumerate(planned):
+            keeper = duplicates.get(file_path)
+            if keeper is None:
+                continue
+            meta["DuplicateOf"] = keeper
+            if self.duplicates_folder:
+                dest_path, folder_structure = self.destination(file_path, meta)
+                planned[n] = (i, file_path, dest_path, folder_structure, meta)
+            self.on_progress({"event": "duplicate", "done": done, "file": file_path, "filename": meta["filename"],
+                              "keeper": keeper, "folder": folder_structure, "dest": dest_path})
+
+    #Analyses every file and returns (planned, summary) without moving anything
+    #planned holds (index, source, destination, folder, meta) tuples in scan order
+    def analyse(self, files):
+        self.catalog = TrackCatalog()
+        if self.genres.alias_error:
+            self.on_progress({"event": "aliases_ignored", "error": self.genres.alias_error})
+        cache_start = self.cache.stats() if self.cache else None
+        analysed = self.iter_tiered(files)
+        results = self.classify_batches(analysed)
+        summary = {"preview": True, "planned": 0, "moved": 0, "skipped": 0, "analysed": 0,
+                   "decode_time": 0.0, "feature_time": 0.0}
+        planned = []
+        try:
+            self.plan_files(files, results, summary, planned)
+        finally:
+            results.close()
+            analysed.close()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+        #A finished plan needs no checkpoint; from here on the move journal makes the run recoverable
+        if self.checkpoint is not None and not summary.get("cancelled"):
+            self.checkpoint.discard()
+        if self.find_duplicates and not summary.get("cancelled"):
+            self.mark_duplicates(planned, summary)
+        #Parallel results arrive out of order, so they are put back in scan order
+        planned.sort(key=lambda entry: entry[0])
+
+        if self.cache:
+            cache_end = self.cache.stats()
+            summary["cache_hits"] = cache_end["hits"] - cache_start["hits"]
+            summary["cache_misses"] = cache_end["misses"] - cache_start["misses"]
+        return planned, summary
+
+    #Analyses every file and returns (plan, summary) without touching the filesystem
+    #Destinations are then made collision-free: clashing names get " (2)" style suffixes and files whose exact
+    #bytes are already at the destination are left out of the plan
+    def plan(self, files):
+        planned, summary = self.analyse(files)
+        plan = SortPlan(self.folder_path, self.sort_order)
+        if self.writeback is not None:
+            plan.tags = self.writeback.take()
+        moving = [entry for entry in planned if entry[1] != entry[2]]
+        if summary.get("cancelled"):
+            return plan, summary
+        with self.profiler.span("collisions"):
+            destinations, identical = resolve_collisions([(entry[1], entry[2]) for entry in moving], self.hasher)
+        summary["identical"] = summary["renamed"] = 0
+        done = summary["planned"] + summary["skipped"]
+        for _, file_path, dest_path, folder_structure, meta in moving:
+            event = {"done": done, "file": file_path, "filename": meta["filename"], "folder": folder_structure}
+            if file_path in identical:
+                summary["identical"] += 1
+                if self.identical == "link":
+                    plan.links.append((file_path, identical[file_path]))
+                self.on_progress(dict(event, event="identical", keeper=identical[file_path]))
+                continue
+            if destinations[file_path] != dest_path:
+                summary["renamed"] += 1
+                self.on_progress(dict(event, event="renamed", dest=destinations[file_path]))
+            plan.add(file_path, destinations[file_path], folder_structure)
+        return plan, summary
+
+    #Applies a plan through a move journal: every directory the plan needs is created up front, files move in
+    #order, and only the source folders it emptied (and new folders left empty by failures) are pruned
+    def apply(self, plan):
+        summary = {"preview": False, "moved": 0, "failed": 0}
+        writer = JournalWriter.create(plan.folder_path, "sort", [(e.source, e.destination) for e in plan.entries])
+        with self.profiler.span("makedirs"):
+            ready, touched = make_all_dirs(plan.directories())
+        for seq, src, dst, error in replay(writer, writer.journal, self.record_move, profiler=self.profiler,
+                                           should_stop=lambda: self.stopping, created=ready):
+            entry = plan.entries[seq]
+            event = {"done": seq + 1, "discovered": len(plan), "file": src, "filename": os.path.basename(src),
+                     "folder": entry.reason, "dest": dst}
+            if error:
+                summary["failed"] += 1
+                self.on_progress(dict(event, event="failed", error=error))
+                continue
+            touched.add(os.path.dirname(src))
+            summary["moved"] += 1
+            self.on_progress(dict(event, event="moved"))
+        if summary["moved"] + summary["failed"] < len(plan):
+            summary["cancelled"] = True
+            writer.suspend()
+        else:
+            writer.close()
+
+        if plan.links and not summary.get("cancelled"):
+            summary["identical_linked"] = self.link_identical(plan.links)
+        #Tags are written once every move is journaled and done, so a slow rewrite never delays the moves
+        if plan.tags and not summary.get("cancelled"):
+            summary.update(self.write_back_tags(plan.tags))
+
+        prune_empty_dirs(touched, plan.folder_path)
+        return summary
+
+    #Replaces each identical copy with a hardlink to the kept file, wherever the sort moved it
+    #The link is made beside the copy and renamed over it, so the copy's path always holds the same bytes
+    def link_identical(self, links):
+        linked = 0
+        for done, (source, kept) in enumerate(links, 1):
+            kept = self.last_sort_map.get(kept, kept)
+            event = {"done": done, "discovered": len(links), "file": source, "filename": os.path.basename(source),
+                     "folder": os.path.relpath(os.path.dirname(kept), self.folder_path)}
+            temporary = source + ".sortify-link"
+            try:
+                if not self.hasher.identical(source, kept):
+                    raise ValueError(f"{os.path.basename(kept)} changed after planning")
+                os.link(kept, temporary)
+                os.replace(temporary, source)
+            except (OSError, ValueError) as e:
+                if os.path.lexists(temporary):
+                    os.remove(temporary)
+                self.on_progress(dict(event, event="link_failed", error=str(e)))
+                continue
+            linked += 1
+            self.on_progress(dict(event, event="linked"))
+        return linked
+
+    #Writes queued BPM/key values into each analysed file once, wherever the sort moved it
+    #pending maps files to values, such as a plan's tags; without it the values queued by run_views are written
+    #Cache entries are re-stamped so the rewritten files still hit on the next run
+    def write_back_tags(self, pending=None):
+        if self.writeback is None:
+            return {}
+        queue = self.writeback if pending is None else WriteBackQueue(pending)
+        if not len(queue):
+            return {}
+        done = [0]
+        def report_error(file_path, error):
+            done[0] += 1
+            self.on_progress({"event": "tag_failed", "done": done[0], "file": file_path,
+                              "filename": os.path.basename(file_path), "error": error})
+        return queue.flush(self.last_sort_map, self.cache.restat if self.cache else None, report_error, self.profiler)
+
+    #Leaves files in place and updates a link view per sort order in layouts, see Python.views
+    #Every file is analysed once for all layouts; each view then only relinks files whose folder changed
+    def run_views(self, files, layouts, link_kind=DEFAULT_LINK_KIND):
+        self.sort_order = list(dict.fromkeys(crit for layout in layouts for crit in layout))
+        report = self.on_progress
+
+        #Folders of the merged order mean nothing here, so analysed files are reported as read, not planned
+        def on_read(event):
+            if event["event"] == "planned":
+                event = {k: v for k, v in event.items() if k not in ("folder", "dest")}
+                event["event"] = "read"
+            report(event)
+
+        self.on_progress = on_read
+        try:
+            planned, summary = self.analyse(files)
+        finally:
+            self.on_progress = report
+        if not summary.get("cancelled"):
+            summary["views"] = {}
+            for layout in layouts:
+                entries = [(file_path, self.build_sort_path(self.catalog.rows[file_path], layout))
+                           for _, file_path, _, _, _ in planned]
+                with self.profiler.span("link"):
+                    summary["views"][view_name(layout)] = update_view(self.folder_path, layout, entries, link_kind,
+                                                                      self.on_progress)
+        summary.update(self.write_back_tags())
+        if self.profiler.enabled:
+            summary["profile"] = self.profiler.summary()
+        return summary
+
+    #Plans every file and, unless previewing, applies the plan straight away
+    #A preview leaves every file untouched: detected tags travel in the plan and are written when it is applied
+    #Returns (plan, summary), see format_summary
+    def run(self, files, preview):
+        plan, summary = self.plan(files)
+        if not preview and not summary.get("cancelled"):
+            summary.update(self.apply(plan))
+        if self.profiler.enabled:
+            summary["profile"] = self.profiler.summary()
+        return plan, summary
+
+#Moves every completed move of a journal back to its exact original path, through a new undo journal
+def reverse_journal(journal, cache=None, on_progress=None):
+    on_progress = on_progress or (lambda event: None)
+    folder_path = journal["folder"]
+    moves = [(dst, src) for _, src, dst in reversed(completed_moves(journal))]
+    writer = JournalWriter.create(folder_path, "undo", moves, undoes=journal["name"])
+    restored = 0
+    touched = set()
+    for seq, src, dst, error in replay(writer, writer.journal, cache.move if cache else None):
+        folder = os.path.relpath(os.path.dirname(dst), folder_path)
+        event = {"done": seq + 1, "file": src, "filename": os.path.basename(src), "dest": dst,
+                 "folder": "root" if folder == os.curdir else folder}
+        if error:
+            on_progress(dict(event, event="failed", error=error))
+            continue
+        restored += 1
+        touched.add(os.path.dirname(src))
+        on_progress(dict(event, event="restored"))
+    writer.close()
+    prune_empty_dirs(touched, folder_path)
+    return restored
+
+#Undoes the most recent sort of a folder, touching only the files it moved
+#Returns how many files were restored, or None when there is nothing to undo
+def undo_last_sort(folder_path, cache=None, on_progress=None):
+    journal = find_undoable(folder_path)
+    if journal is None:
+        return None
+    return reverse_journal(journal, cache, on_progress)
+
+#Finishes (roll_forward) or reverts every interrupted sort or undo, newest first
+#Returns the number of journals recovered
+def recover_interrupted(folder_path, roll_forward, cache=None, on_progress=None):
+    on_progress = on_progress or (lambda event: None)
+    interrupted = find_interrupted(folder_path)
+    for journal in interrupted:
+        if roll_forward:
+            writer = JournalWriter(journal["path"])
+            for seq, src, dst, error in replay(writer, journal, cache.move if cache else None, recovering=True):
+                event = {"done": seq + 1, "file": src, "filename": os.path.basename(src), "dest": dst,
+                         "folder": os.path.relpath(os.path.dirname(dst), folder_path)}
+                on_progress(dict(event, event="failed", error=error) if error else dict(event, event="moved"))
+            writer.close("commit")
+        else:
+            reverse_journal(journal, cache, on_progress)
+            JournalWriter(journal["path"]).close("abort")
+    return len(interrupted)
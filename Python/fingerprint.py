@@ -0,0 +1,131 @@
+import base64
+import os
+
+import numpy as np
+
+DUPLICATES_FOLDER = "Duplicates"
+
+#Each track is summarised as this many equal time segments of chroma and onset strength
+FINGERPRINT_SEGMENTS = 16
+FINGERPRINT_SIZE = FINGERPRINT_SEGMENTS * 13
+
+#Cosine similarity two fingerprints need to count as the same recording
+DUPLICATE_SIMILARITY = 0.97
+
+#Random-hyperplane LSH: a pair is compared when all bits of any one table agree
+LSH_BITS = 12
+LSH_TABLES = 10
+LSH_BLOCK_ROWS = 1024
+
+#When copies are found, the one kept in place is lossless if possible, then the largest file
+LOSSLESS_EXTENSIONS = (".flac", ".wav", ".aiff", ".aif")
+
+#Builds a fingerprint from the chroma (12 x frames) and onset envelope the key and BPM analysis already computed
+#The track's mean chroma is removed so tracks in the same key only match when their harmony moves the same way
+def compute_fingerprint(chroma, onset_env):
+    chroma = np.asarray(chroma, dtype=float)
+    chroma_segments = np.stack([part.mean(axis=1) if part.size else np.zeros(12)
+                                for part in np.array_split(chroma, FINGERPRINT_SEGMENTS, axis=1)])
+    chroma_segments -= chroma_segments.mean(axis=0)
+    onset_env = np.asarray(onset_env, dtype=float)
+    onset_segments = np.array([part.mean() if part.size else 0.0
+                               for part in np.array_split(onset_env, FINGERPRINT_SEGMENTS)])
+    onset_segments = onset_segments / onset_segments.mean() - 1.0 if onset_segments.mean() > 0 else onset_segments
+    vector = np.concatenate([chroma_segments.ravel(), onset_segments])
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+#Fingerprints are cached and checkpointed as base64 float16 text, about 560 characters each
+def encode_fingerprint(vector):
+    return base64.b64encode(np.asarray(vector, dtype="<f2").tobytes()).decode("ascii")
+
+def decode_fingerprint(text):
+    return np.frombuffer(base64.b64decode(text), dtype="<f2").astype(np.float32)
+
+class LSHIndex:
+    #Buckets unit vectors by the signs of random projections, so near-duplicates share a bucket in some table
+    #and only bucket-mates are ever compared, instead of every pair in the library
+    def __init__(self, dim=FINGERPRINT_SIZE, bits=LSH_BITS, tables=LSH_TABLES, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((dim, bits * tables)).astype(np.float32)
+        self.bits = bits
+        self.tables = tables
+        self.weights = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets = [{} for _ in range(tables)]
+        self.ids = []
+        self.vectors = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    #Adds a batch of vectors (n x dim) under the given ids with one projection for all tables
+    def add_many(self, ids, vectors):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        signs = (vectors @ self.planes > 0).reshape(len(vectors), self.tables, self.bits)
+        hashes = signs @ self.weights
+        for row, item_id in enumerate(ids):
+            position = len(self.ids)
+            self.ids.append(item_id)
+            self.vectors.append(vectors[row])
+            for table, bucket_hash in enumerate(hashes[row]):
+                self.buckets[table].setdefault(int(bucket_hash), []).append(position)
+
+    #Returns groups of ids whose vectors are at least threshold cosine-similar, linked transitively
+    def groups(self, threshold=DUPLICATE_SIMILARITY):
+        parent = list(range(len(self.ids)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        vectors = np.asarray(self.vectors, dtype=np.float32)
+        for table in self.buckets:
+            for members in table.values():
+                if len(members) < 2:
+                    continue
+                block = vectors[members]
+                #Rows are compared a slice at a time so one crowded bucket cannot exhaust memory
+                for start in range(0, len(members), LSH_BLOCK_ROWS):
+                    rows, cols = np.nonzero(block[start:start + LSH_BLOCK_ROWS] @ block.T >= threshold)
+                    for a, b in zip(rows + start, cols):
+                        if a >= b:
+                            continue
+                        root_a, root_b = find(members[a]), find(members[b])
+                        if root_a != root_b:
+                            parent[root_b] = root_a
+        grouped = {}
+        for position, item_id in enumerate(self.ids):
+            grouped.setdefault(find(position), []).append(item_id)
+        return [members for members in grouped.values() if len(members) > 1]
+
+#Orders a group of copies best first: lossless, then largest, then path
+def rank_copies(paths):
+    def quality(path):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        return (os.path.splitext(path)[1].lower() not in LOSSLESS_EXTENSIONS, -size, path)
+    return sorted(paths, key=quality)
+
+#Maps every redundant copy to the copy that is kept, given {path: fingerprint text}
+def find_duplicates(fingerprints, threshold=DUPLICATE_SIMILARITY):
+    index = LSHIndex()
+    paths = []
+    vectors = []
+    for path, text in fingerprints.items():
+        vector = decode_fingerprint(text)
+        #Silent or unreadable audio gives an empty fingerprint, which matches nothing
+        if vector.size == FINGERPRINT_SIZE and np.any(vector):
+            paths.append(path)
+            vectors.append(vector)
+    if paths:
+        index.add_many(paths, vectors)
+    duplicates = {}
+    for group in index.groups(threshold):
+        keeper, *copies = rank_copies(group)
+        for path in copies:
+            duplicates[path] = keeper
+    return duplicates
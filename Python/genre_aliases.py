@@ -1,23 +1,28 @@
 import re
 
-def clean_genre(raw):
-    if not raw:
-        return ""
-    raw = str(raw).lower()
-
-    # Remove URL-like text
-    raw = re.sub(r'https?://\S+', '', raw)
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+#Tags often hold several genres: "Drum & Bass / Jungle", "UKG, Bassline", "House; Techno"
+SEPARATOR_PATTERN = re.compile(r'\s*(?:[/,;|]|\s-\s)\s*')
+JUNK_PATTERN = re.compile(r'[^\w\s&-]|_')
+SPACE_PATTERN = re.compile(r'\s+')
 
-    # Remove punctuation, special symbols, and numbers
-    raw = re.sub(r'[^a-zA-Z\s&-]', '', raw)
+#Cleans a single genre: lowercase, no URLs, punctuation or repeated spaces
+#Digits stay, since they belong to genres like "2 Step" or "90s Hip Hop"
+def clean_genre_part(raw):
+    raw = JUNK_PATTERN.sub('', raw.lower())
+    return SPACE_PATTERN.sub(' ', raw).strip(' -')
 
-    # Replace multiple spaces with one
-    raw = re.sub(r'\s+', ' ', raw).strip()
+#A part without letters is a year or an old numeric genre code like "(17)", not a genre
+def is_genre_part(part):
+    return any(char.isalpha() for char in part)
 
-    # If multiple genres, just use the first one
-    raw = raw.split('/')[0].split(',')[0]
-
-    return raw
+#Splits a raw genre tag into its cleaned genres, in tag order
+def split_genres(raw):
+    if not raw:
+        return []
+    raw = URL_PATTERN.sub('', str(raw))
+    parts = (clean_genre_part(part) for part in SEPARATOR_PATTERN.split(raw))
+    return [part for part in parts if is_genre_part(part)]
 
 GENRE_ALIASES = {
     "acid house": "House",
@@ -0,0 +1,151 @@
+import difflib
+import json
+import os
+import re
+import sys
+
+from Python.genre_aliases import GENRE_ALIASES, URL_PATTERN, split_genres
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+UNKNOWN_GENRE = "Unknown Genre"
+USER_ALIAS_FILES = ("genre_aliases.json", "genre_aliases.yaml", "genre_aliases.yml")
+
+#Fuzzy matching is only tried for keys this long; short tags like "rap" or "pop" are too close to each other
+FUZZY_MIN_LENGTH = 5
+FUZZY_CUTOFF = 0.85
+
+#"and", "n", "'n'" and "+" all mean "&"; spaces and hyphens are ignored
+CONNECTOR_PATTERN = re.compile(r"\s*(?:\band\b|\bn\b|'n'|\+|&)\s*")
+GAP_PATTERN = re.compile(r"[\s-]+")
+#First letter of each word; unlike str.title() this leaves "90s" alone rather than making it "90S"
+WORD_START_PATTERN = re.compile(r"\b[a-z]")
+
+#Returns the per-user config directory for Sortify
+def default_config_dir():
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    elif os.name == "nt":
+        base = os.environ.get("APPDATA", os.path.expanduser("~\\AppData\\Roaming"))
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
+    return os.path.join(base, "Sortify")
+
+#Folds spelling variants onto one lookup key: "Drum n Bass", "drum&bass" and "Drum & Bass" all become "drum&bass"
+def alias_key(genre):
+    return GAP_PATTERN.sub("", CONNECTOR_PATTERN.sub("&", genre.lower()))
+
+#Capitalises an unrecognised cleaned genre for its folder name: "90s hip hop" -> "90s Hip Hop"
+def title_genre(genre):
+    return WORD_START_PATTERN.sub(lambda match: match.group().upper(), genre)
+
+#Reads a user alias file; entries are either "alias": "Genre" or "Genre": ["alias", ...]
+def load_alias_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ValueError(f"PyYAML is needed to read {path}; install it or use a .json alias file")
+            data = yaml.safe_load(f) or {}
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must map aliases to genres")
+    aliases = {}
+    for key, value in data.items():
+        if isinstance(value, str):
+            aliases[str(key).strip().lower()] = value
+        else:
+            for alias in value:
+                aliases[str(alias).strip().lower()] = str(key)
+    return aliases
+
+#Returns the first user alias file found in the config directory, or None
+def find_user_alias_file():
+    for name in USER_ALIAS_FILES:
+        path = os.path.join(default_config_dir(), name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+class GenreNormalizer:
+    #Builds the lookup tables once; user aliases take precedence over the built-in ones
+    #alias_error describes a user alias file that could not be read, for the caller to report
+    def __init__(self, aliases=None, user_aliases=None, alias_error=None):
+        self.alias_error = alias_error
+        self.aliases = dict(GENRE_ALIASES if aliases is None else aliases)
+        self.aliases.update(user_aliases or {})
+        self.keys = {}
+        for alias, genre in self.aliases.items():
+            self.keys.setdefault(alias_key(alias), genre)
+        self.fuzzy_keys = [key for key in self.keys if len(key) >= FUZZY_MIN_LENGTH]
+        self.max_tokens = max((len(alias.split()) for alias in self.aliases), default=1)
+        self.memo = {}
+
+    #Maps one cleaned genre to its canonical name, or None when nothing matches
+    def match(self, genre):
+        if genre in self.aliases:
+            return self.aliases[genre]
+        key = alias_key(genre)
+        if key in self.keys:
+            return self.keys[key]
+
+        #Longest known alias inside the tag: "melodic deep house" -> "deep house"
+        tokens = genre.split()
+        for size in range(min(len(tokens) - 1, self.max_tokens), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                found = self.keys.get(alias_key(" ".join(tokens[start:start + size])))
+                if found:
+                    return found
+
+        if len(key) >= FUZZY_MIN_LENGTH:
+            close = difflib.get_close_matches(key, self.fuzzy_keys, n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                return self.keys[close[0]]
+        return None
+
+    #Returns the folder genre for a raw tag: the first part that is a known genre, else the first part
+    #Results are memoised per raw string, since a library repeats the same few hundred tags
+    def normalize(self, raw):
+        try:
+            return self.memo[raw]
+        except (KeyError, TypeError):
+            pass
+        whole = URL_PATTERN.sub("", str(raw or "")).strip().lower()
+        genre = self.aliases.get(whole)
+        if genre is None:
+            parts = split_genres(raw)
+            matches = (self.match(part) for part in parts)
+            genre = next((found for found in matches if found), None)
+            if genre is None:
+                genre = title_genre(parts[0]) if parts else UNKNOWN_GENRE
+        try:
+            self.memo[raw] = genre
+        except TypeError:
+            pass
+        return genre
+
+_default_normalizer = None
+
+#Returns the shared normalizer with the user's alias file applied, built on first use
+#A broken alias file is ignored rather than stopping the sort; the reason is kept in alias_error
+def genre_normalizer():
+    global _default_normalizer
+    if _default_normalizer is None:
+        path = find_user_alias_file()
+        user_aliases = None
+        alias_error = None
+        if path:
+            try:
+                user_aliases = load_alias_file(path)
+            except Exception as e:
+                alias_error = f"{path}: {e}"
+        _default_normalizer = GenreNormalizer(user_aliases=user_aliases, alias_error=alias_error)
+    return _default_normalizer
+
+#Returns the folder genre of a raw tag with the shared normalizer: aliases, multi-genre tags and fuzzy matches
+#all resolve the same way the sort files them
+def clean_genre(raw):
+    return genre_normalizer().normalize(raw)
@@ -1,18 +1,24 @@
 import os
-import shutil
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QPushButton, QFileDialog, QListWidget, QListWidgetItem, QTextBrowser,
-    QCheckBox, QTextEdit, QHBoxLayout, QVBoxLayout, QProgressBar, QMessageBox, QAbstractItemView
+    QCheckBox, QSpinBox, QComboBox, QHBoxLayout, QVBoxLayout, QProgressBar, QMessageBox, QAbstractItemView
 )
 from PyQt6.QtGui import QPixmap, QFont, QPalette, QIcon
 from PyQt6.QtCore import Qt, QPropertyAnimation, QRect, QEasingCurve
-from collections import Counter
 
-from Python.sorting import SortWorker
-from Python.metadata import get_metadata
-from Python.utils import scan_folder, delete_empty_folders
-from Python.stats import toggle_stats_panel
+from Python.sorting import SortWorker, ViewWorker, WatchWorker
+from Python.engine import SORT_CRITERIA, undo_last_sort, recover_interrupted
+from Python.journal import find_interrupted, find_undoable
+from Python.checkpoint import JobCheckpoint, find_checkpoints
+from Python.cache import AnalysisCache
+from Python.metadata import EXCERPT_DURATION, EXCERPT_COUNT
+from Python.options import SortOptions
+from Python.tag_readers import TAG_THREADS
+from Python.utils import BackgroundScan, iter_music_files
+from Python.views import find_views
+from Python.stats import toggle_stats_panel, refresh_stats
 from Python.help_window import HelpWindow
+from Python.log_view import LogView
 
 class SortifyApp(QWidget):
     def dragEnterEvent(self, event):
@@ -23,6 +29,19 @@ class SortifyApp(QWidget):
         help_win = HelpWindow()
         help_win.exec()
 
+    #Stops running workers cleanly before the window closes, so no file is left half-moved
+    def closeEvent(self, event):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        if self.watch_worker is not None and self.watch_worker.isRunning():
+            self.watch_worker.stop()
+            self.watch_worker.wait()
+        if self.stats_worker is not None and self.stats_worker.isRunning():
+            self.stats_worker.stop()
+            self.stats_worker.wait()
+        event.accept()
+
     #Handles folder drop via drag-and-drop
     def dropEvent(self, event):
         paths = []
@@ -38,6 +57,7 @@ class SortifyApp(QWidget):
             self.folder_path = folders[0]
             self.folder_label.setText(f"Dropped: {os.path.basename(self.folder_path)}")
             self.animate_label(self.folder_label)
+            self.check_journals()
 
     def __init__(self):
         super().__init__()
@@ -52,6 +72,11 @@ class SortifyApp(QWidget):
         self.folder_path = None
         self.worker = None
         self.last_sort_map = {}
+        self.cache = AnalysisCache()
+        self.plan = None
+        self.plan_settings = None
+        self.library_stats = None
+        self.stats_worker = None
 
         # GUI setup
         logo = QPixmap("sortify_logo.png").scaledToHeight(50, Qt.TransformationMode.SmoothTransformation)
@@ -67,22 +92,73 @@ class SortifyApp(QWidget):
         self.select_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
 
         self.bpm_checkbox = QCheckBox("Enable BPM Analysis")
+        self.write_tags_checkbox = QCheckBox("Write Detected BPM/Key to Tags")
+        self.write_tags_checkbox.setChecked(True)
+        self.write_tags_checkbox.setToolTip("Save analysis results into the files so later sorts read them from the tags")
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, os.cpu_count() or 1)
+        self.workers_spinbox.setValue(1)
+        self.workers_spinbox.setToolTip("Number of processes used for audio analysis")
+        self.tag_threads_spinbox = QSpinBox()
+        self.tag_threads_spinbox.setRange(1, 128)
+        self.tag_threads_spinbox.setValue(TAG_THREADS)
+        self.tag_threads_spinbox.setToolTip("Files whose tags are read at the same time; raise it for libraries on "
+                                            "network shares (SMB/NFS)")
+        self.fast_checkbox = QCheckBox("Fast Analysis (excerpts)")
+        self.fast_checkbox.setToolTip("Detect BPM and key from short windows of each track instead of the whole file")
+        self.excerpt_seconds = QSpinBox()
+        self.excerpt_seconds.setRange(10, 120)
+        self.excerpt_seconds.setValue(int(EXCERPT_DURATION))
+        self.excerpt_seconds.setSuffix(" s")
+        self.excerpt_count = QSpinBox()
+        self.excerpt_count.setRange(1, 5)
+        self.excerpt_count.setValue(EXCERPT_COUNT)
+        self.excerpt_count.setPrefix("× ")
+        self.key_notation_box = QComboBox()
+        for label, notation in (("Camelot (8A)", "camelot"), ("Open Key (1m)", "open_key"), ("Standard (A minor)", "standard")):
+            self.key_notation_box.addItem(label, notation)
+        self.key_notation_box.setToolTip("How Key folders are named; Camelot and Open Key keep harmonic neighbours one number apart")
+        self.duplicates_checkbox = QCheckBox("Find Duplicates")
+        self.duplicates_checkbox.setToolTip("Fingerprint every track and list repeated recordings in the log, "
+                                            "even across formats and filenames")
+        self.duplicates_folder_checkbox = QCheckBox("Move Extra Copies to Duplicates")
+        self.duplicates_folder_checkbox.setToolTip("Sort all but the best copy of each track into a Duplicates folder")
+        self.duplicates_folder_checkbox.setEnabled(False)
+        self.duplicates_checkbox.toggled.connect(self.duplicates_folder_checkbox.setEnabled)
+        self.link_identical_checkbox = QCheckBox("Hardlink Identical Copies")
+        self.link_identical_checkbox.setToolTip("A file whose exact bytes are already in its destination folder is "
+                                                "never moved; tick this to also turn it into a hardlink to save space")
+        self.profile_checkbox = QCheckBox("Profile Run")
+        self.profile_checkbox.setToolTip("Report where the time went and save a trace to .sortify/traces (open it in chrome://tracing)")
         self.criteria_list = QListWidget()
         self.criteria_list.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
         self.criteria_list.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
-        for c in ["Artist", "Genre", "BPM Range", "Key", "Alphabetical"]:
+        for c in SORT_CRITERIA:
             self.criteria_list.addItem(QListWidgetItem(c))
 
         self.preview_button = QPushButton("Preview Sort")
         self.preview_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
         self.sort_button = QPushButton("Sort")
         self.sort_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
+        self.cancel_button = QPushButton("⏹ Cancel")
+        self.cancel_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
+        self.cancel_button.setToolTip("Stop after the current file; the work done so far can be resumed")
+        self.cancel_button.setEnabled(False)
         self.undo_button = QPushButton("Undo Last Sort")
         self.undo_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
         self.undo_button.setEnabled(False)
+        self.watch_button = QPushButton("👀 Watch Folder")
+        self.watch_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
+        self.watch_button.setCheckable(True)
+        self.watch_button.setToolTip("Automatically sort new files as they arrive in the folder")
+        self.watch_worker = None
+        self.views_button = QPushButton("🔗 Update Views")
+        self.views_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
+        self.views_button.setToolTip("Leave files where they are and link them into 'Sortify Views' by the selected "
+                                     "criteria; views built earlier are refreshed too")
 
-        self.output_box = QTextEdit()
-        self.output_box.setReadOnly(True)
+        self.output_box = LogView()
+        self.output_box.progress.connect(self.handle_progress)
         self.progress_bar = QProgressBar()
         self.progress_bar.setStyleSheet("QProgressBar::chunk { background-color: #5cb85c; } QProgressBar { text-align: center; }")
         self.stats_panel = QTextBrowser()
@@ -95,17 +171,47 @@ class SortifyApp(QWidget):
         self.stats_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
         self.stats_button.clicked.connect(lambda: toggle_stats_panel(self))
 
+        self.clear_cache_button = QPushButton("🧹 Clear Cache")
+        self.clear_cache_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
+        self.clear_cache_button.clicked.connect(self.clear_cache)
+
         # Layout
         controls = QVBoxLayout()
         controls.addWidget(self.folder_label)
         controls.addWidget(self.select_button)
         controls.addWidget(self.bpm_checkbox)
+        controls.addWidget(self.write_tags_checkbox)
+        workers_row = QHBoxLayout()
+        workers_row.addWidget(QLabel("Analysis workers:"))
+        workers_row.addWidget(self.workers_spinbox)
+        workers_row.addWidget(QLabel("Tag threads:"))
+        workers_row.addWidget(self.tag_threads_spinbox)
+        controls.addLayout(workers_row)
+        fast_row = QHBoxLayout()
+        fast_row.addWidget(self.fast_checkbox)
+        fast_row.addWidget(self.excerpt_seconds)
+        fast_row.addWidget(self.excerpt_count)
+        controls.addLayout(fast_row)
+        key_row = QHBoxLayout()
+        key_row.addWidget(QLabel("Key folders:"))
+        key_row.addWidget(self.key_notation_box)
+        controls.addLayout(key_row)
+        duplicates_row = QHBoxLayout()
+        duplicates_row.addWidget(self.duplicates_checkbox)
+        duplicates_row.addWidget(self.duplicates_folder_checkbox)
+        controls.addLayout(duplicates_row)
+        controls.addWidget(self.link_identical_checkbox)
+        controls.addWidget(self.profile_checkbox)
         controls.addWidget(QLabel("Select Sort Criteria (drag to reorder):"))
         controls.addWidget(self.criteria_list)
         controls.addWidget(self.preview_button)
         controls.addWidget(self.sort_button)
+        controls.addWidget(self.cancel_button)
         controls.addWidget(self.undo_button)
+        controls.addWidget(self.watch_button)
+        controls.addWidget(self.views_button)
         controls.addWidget(self.stats_button)
+        controls.addWidget(self.clear_cache_button)
 
         output = QVBoxLayout()
         output.addWidget(QLabel("Output:"))
@@ -135,7 +241,10 @@ class SortifyApp(QWidget):
         self.select_button.clicked.connect(self.select_folder)
         self.preview_button.clicked.connect(lambda: self.run_sort(preview=True))
         self.sort_button.clicked.connect(lambda: self.run_sort(preview=False))
+        self.cancel_button.clicked.connect(self.cancel_sort)
         self.undo_button.clicked.connect(self.undo_sort)
+        self.watch_button.toggled.connect(self.toggle_watch)
+        self.views_button.clicked.connect(self.run_views)
         self.set_dark_or_light_mode()
 
     def set_dark_or_light_mode(self):
@@ -149,43 +258,212 @@ class SortifyApp(QWidget):
             self.folder_path = folder
             self.folder_label.setText(f"Selected: {os.path.basename(folder)}")
             self.animate_label(self.folder_label)
+            self.check_journals()
 
+    #Offers to finish or roll back an interrupted sort, then enables Undo if the folder has a sort to undo
+    def check_journals(self):
+        interrupted = find_interrupted(self.folder_path)
+        if interrupted:
+            box = QMessageBox(self)
+            box.setWindowTitle("Interrupted Sort")
+            box.setText("The last sort or undo in this folder did not finish. Finish the remaining moves, "
+                        "or roll back the files that were already moved?")
+            finish = box.addButton("Finish", QMessageBox.ButtonRole.AcceptRole)
+            rollback = box.addButton("Roll Back", QMessageBox.ButtonRole.DestructiveRole)
+            box.addButton("Later", QMessageBox.ButtonRole.RejectRole)
+            box.exec()
+            if box.clickedButton() in (finish, rollback):
+                recover_interrupted(self.folder_path, box.clickedButton() is finish, self.cache,
+                                    on_progress=self.output_box.log_event)
+                self.output_box.append("🩹 Interrupted run recovered.")
+        self.undo_button.setEnabled(find_undoable(self.folder_path) is not None)
+        self.check_checkpoints()
+
+    #Offers to resume an analysis that was cancelled or cut short, skipping the files it already finished
+    def check_checkpoints(self):
+        checkpoints = find_checkpoints(self.folder_path)
+        if not checkpoints or (self.worker is not None and self.worker.isRunning()):
+            return
+        latest = checkpoints[0]
+        kind = "preview" if latest.settings["preview"] else "sort"
+        box = QMessageBox(self)
+        box.setWindowTitle("Unfinished Sort")
+        box.setText(f"A {kind} of this folder by {', '.join(latest.settings['sort_order'])} stopped after "
+                    f"{len(latest)} files. Resume it and skip the files already done?")
+        resume = box.addButton("Resume", QMessageBox.ButtonRole.AcceptRole)
+        discard = box.addButton("Discard", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton("Later", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        if box.clickedButton() in (resume, discard):
+            for checkpoint in checkpoints[1:]:
+                checkpoint.discard()
+        if box.clickedButton() is discard:
+            latest.discard()
+        elif box.clickedButton() is resume:
+            self.run_sort(latest.settings["preview"], latest)
     #Returns selected sort order from the drag-drop list
     def get_sort_order(self):
         return [item.text() for item in self.criteria_list.selectedItems()]
 
-    #Starts sort worker thread for preview or move
-    def run_sort(self, preview):
+    #Starts sort worker thread for preview or move; a checkpoint resumes an earlier run with its settings
+    def run_sort(self, preview, checkpoint=None):
         self.animate_label(self.output_box)
         self.output_box.clear()
-        sort_order = self.get_sort_order()
-        if not sort_order:
+        options = self.sort_options(self.get_sort_order())
+        if checkpoint is not None:
+            options = checkpoint.resume_options(options)
+            self.output_box.append(f"⏯️ Resuming: {len(checkpoint)} files already done.")
+        if not options.sort_order:
             self.output_box.append("⚠️ No sort criteria selected.")
             return
+        settings = (self.folder_path, options.plan_settings())
 
-        files = scan_folder(self.folder_path)
-        self.progress_bar.setMaximum(len(files))
+        #Sort applies the plan from the last Preview when nothing has changed since, without reanalysing
+        plan = self.plan if not preview and settings == self.plan_settings else None
+        #Files are analysed as the scan finds them, so the total is not known up front
+        files = [] if plan is not None else BackgroundScan(iter_music_files(self.folder_path))
+        self.progress_bar.setMaximum(len(plan) if plan is not None else 0)
         self.progress_bar.setValue(0)
+        self.progress_bar.resetFormat()
+        if plan is not None:
+            self.output_box.append(f"📋 Applying previewed plan ({len(plan)} moves).")
+        elif checkpoint is None:
+            checkpoint = JobCheckpoint.create(self.folder_path, options, preview)
 
-        self.worker = SortWorker(files, self.folder_path, sort_order, self.bpm_checkbox.isChecked(), preview)
-        self.worker.update_progress.connect(self.handle_progress)
+        self.worker = SortWorker(files, self.folder_path, options, preview, self.cache, plan, self.output_box.feed,
+                                 self.profile_checkbox.isChecked(), checkpoint)
+        self.plan = None
+        self.plan_settings = settings if preview else None
         self.worker.finished.connect(self.handle_finish)
+        for button in (self.preview_button, self.sort_button, self.select_button, self.views_button):
+            button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.worker.start()
+
+    #Links the library into the selected criteria order and refreshes every earlier view, without moving files
+    def run_views(self):
+        if not self.folder_path:
+            self.output_box.append("⚠️ Select a folder first.")
+            return
+        sort_order = self.get_sort_order()
+        layouts = [sort_order] if sort_order else []
+        layouts += [layout for layout in find_views(self.folder_path) if layout != sort_order]
+        if not layouts:
+            self.output_box.append("⚠️ No sort criteria selected.")
+            return
+        self.animate_label(self.output_box)
+        self.output_box.clear()
+        self.output_box.append(f"🔗 Updating {len(layouts)} view(s) in {os.path.basename(self.folder_path)}…")
+        self.progress_bar.setMaximum(0)
+        self.progress_bar.setValue(0)
+        self.worker = ViewWorker(BackgroundScan(iter_music_files(self.folder_path)), self.folder_path, layouts,
+                                 self.sort_options(layouts[0]), self.cache, self.output_box.feed)
+        self.worker.finished.connect(self.handle_views_finish)
+        for button in (self.preview_button, self.sort_button, self.select_button, self.views_button):
+            button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
         self.worker.start()
+
+    def handle_views_finish(self, msg):
+        self.output_box.append(msg)
+        for button in (self.preview_button, self.sort_button, self.select_button, self.views_button):
+            button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    #Builds the SortOptions the controls are set to, for the given criteria order
+    def sort_options(self, sort_order):
+        excerpt = None
+        if self.fast_checkbox.isChecked():
+            excerpt = (float(self.excerpt_seconds.value()), self.excerpt_count.value())
+        find_duplicates = self.duplicates_checkbox.isChecked()
+        return SortOptions(sort_order, self.bpm_checkbox.isChecked(), excerpt, self.key_notation_box.currentData(),
+                           find_duplicates, find_duplicates and self.duplicates_folder_checkbox.isChecked(),
+                           "link" if self.link_identical_checkbox.isChecked() else "skip",
+                           workers=self.workers_spinbox.value(), write_tags=self.write_tags_checkbox.isChecked(),
+                           tag_threads=self.tag_threads_spinbox.value())
+
+    def cancel_sort(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.cancel_button.setEnabled(False)
+            self.output_box.append("⏹️ Cancelling after the current file…")
+            self.worker.cancel()
     
-    #Updates progress bar and log during sorting
-    def handle_progress(self, value, msg):
+    #Updates the progress bar, at most once per log frame
+    def handle_progress(self, value, discovered):
+        self.progress_bar.setMaximum(discovered)
         self.progress_bar.setValue(value)
-        self.output_box.append(msg)
-        self.output_box.append("🌟 Sort complete. Tags: 🎵 Genre, 🎤 Artist, 🧠 Key, 🔊 BPM")
+        self.progress_bar.setFormat(f"{value} processed / {discovered} discovered")
 
     #Final handler once sorting is complete
     def handle_finish(self, msg):
         self.animate_label(self.output_box)
         self.output_box.append(msg)
-        delete_empty_folders(self.folder_path)
-        if not self.worker.preview:
+        for button in (self.preview_button, self.sort_button, self.select_button, self.views_button):
+            button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        if self.worker.cancelled:
+            self.plan = None
+            self.plan_settings = None
+            self.undo_button.setEnabled(find_undoable(self.folder_path) is not None)
+        elif self.worker.preview:
+            self.plan = self.worker.plan
+        else:
+            self.output_box.append("🌟 Sort complete. Tags: 🎵 Genre, 🎤 Artist, 🧠 Key, 🔊 BPM")
             self.last_sort_map = self.worker.last_sort_map
             self.undo_button.setEnabled(True)
+            if self.stats_panel.isVisible():
+                refresh_stats(self)
+
+    #Starts or stops sorting new arrivals in the selected folder
+    def toggle_watch(self, checked):
+        if not checked:
+            if self.watch_worker is not None:
+                self.watch_button.setEnabled(False)
+                self.watch_worker.stop()
+            return
+        sort_order = self.get_sort_order()
+        if not self.folder_path or not sort_order:
+            self.output_box.append("⚠️ Select a folder and sort criteria before watching.")
+            self.watch_button.setChecked(False)
+            return
+
+        self.watch_worker = WatchWorker(self.folder_path, self.sort_options(sort_order), self.cache,
+                                        self.output_box.feed)
+        self.watch_worker.batch_done.connect(self.handle_watch_batch)
+        self.watch_worker.finished.connect(self.handle_watch_finish)
+        for button in (self.preview_button, self.sort_button, self.undo_button, self.select_button, self.views_button):
+            button.setEnabled(False)
+        self.watch_button.setText("⏹ Stop Watching")
+        self.output_box.append(f"👀 Watching {os.path.basename(self.folder_path)} for new files…")
+        self.watch_worker.start()
+
+    def handle_watch_batch(self, msg):
+        self.output_box.append(msg)
+        self.plan = None
+        if self.stats_panel.isVisible():
+            refresh_stats(self)
+
+    def handle_watch_finish(self, msg):
+        self.output_box.append(msg)
+        for button in (self.preview_button, self.sort_button, self.select_button, self.watch_button,
+                       self.views_button):
+            button.setEnabled(True)
+        self.undo_button.setEnabled(find_undoable(self.folder_path) is not None)
+        self.watch_button.setText("👀 Watch Folder")
+        self.watch_button.setChecked(False)
+        self.watch_worker = None
+
+    #Prunes stale entries, then offers to wipe the whole analysis cache
+    def clear_cache(self):
+        removed = self.cache.prune()
+        stats = self.cache.stats()
+        self.output_box.append(f"🗄️ Cache pruned: {removed} stale entries removed, {stats['entries']} kept "
+                               f"({stats['hits']} hits, {stats['misses']} misses this session).")
+        confirm = QMessageBox.question(self, "Clear Cache", "Also clear all cached BPM, key and tag results?",
+                                       QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if confirm == QMessageBox.StandardButton.Yes:
+            self.cache.clear()
+            self.output_box.append("🗄️ Analysis cache cleared.")
 
     #Animation for ui feedback
     def animate_label(self, widget):
@@ -197,28 +475,16 @@ class SortifyApp(QWidget):
         anim.setEndValue(rect)
         anim.start(QPropertyAnimation.DeletionPolicy.DeleteWhenStopped)
 
-    #Undoes the last sort by moving files back to root
+    #Undoes the last sort by moving its files back to their original paths
     def undo_sort(self):
-        confirm = QMessageBox.question(self, "Undo Sort", "Are you sure you want to move all songs back to the root folder?",
+        confirm = QMessageBox.question(self, "Undo Sort", "Are you sure you want to move the songs from the last sort back to where they were?",
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if confirm != QMessageBox.StandardButton.Yes:
             return
 
-        moved = 0
-        files = scan_folder(self.folder_path)
-
-        for file_path in files:
-            if os.path.dirname(file_path) == self.folder_path:
-                continue
-            dest_path = os.path.join(self.folder_path, os.path.basename(file_path))
-            try:
-                shutil.move(file_path, dest_path)
-                moved += 1
-                self.output_box.append(f"↩️ {os.path.basename(file_path)} → root")
-            except Exception as e:
-                self.output_box.append(f"❌ Failed to move: {file_path} ({e})")
-
-        delete_empty_folders(self.folder_path)
-        self.undo_button.setEnabled(False)
-        self.output_box.append(f"Undo complete. {moved} files returned to root.")
-        delete_empty_folders(self.folder_path)
\ No newline at end of file
+        moved = undo_last_sort(self.folder_path, self.cache,
+                               on_progress=self.output_box.log_event)
+        self.undo_button.setEnabled(find_undoable(self.folder_path) is not None)
+        self.output_box.append(f"Undo complete. {moved or 0} files returned to their original folders.")
+        if self.stats_panel.isVisible():
+            refresh_stats(self)
\ No newline at end of file
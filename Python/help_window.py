@@ -18,12 +18,12 @@ class HelpWindow(QDialog):
             <li><b>Choose sort criteria</b> like Artist, Genre, BPM, etc. You can drag to change order.</li>
             <li><b>Preview Sort</b> to see what will happen.</li>
             <li><b>Click Sort</b> to move files into sorted folders.</li>
-            <li><b>Undo Sort</b> will return all files to the root folder.</li>
+            <li><b>Undo Sort</b> moves the files from the last sort back to exactly where they were.</li>
             <li><b>Stats Panel</b> shows a breakdown of your music library.</li>
         </ol>
         <p>If your genres are mismatched, enable genre cleaning or check your file metadata manually.</p>
         <hr>
-        <p><i>Supported formats:</i> MP3, WAV, FLAC, AIFF</p>
+        <p><i>Supported formats:</i> MP3, WAV, FLAC, AIFF, M4A, OGG, Opus</p>
         """)
 
         self.close_button = QPushButton("Close")
@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import time
+
+from Python.profiling import NULL_PROFILER
+
+JOURNAL_DIR = os.path.join(".sortify", "journal")
+
+#"done" records are fsynced in batches; recovery re-checks unconfirmed moves against the filesystem
+SYNC_EVERY = 64
+
+#Flushes a directory's entries to disk, so a file created, renamed into or out of it survives a power cut
+#Windows cannot open directories and some network filesystems refuse the call; there it is skipped
+def fsync_dir(path):
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+#Creates directory and any missing parents; returns the existing directories that gained a new entry
+def make_dirs(directory):
+    missing = []
+    while directory and not os.path.isdir(directory):
+        missing.append(directory)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    if missing:
+        os.makedirs(missing[0], exist_ok=True)
+    return [os.path.dirname(path) for path in missing]
+
+#Creates every directory of a batch, parents first, then fsyncs each directory that gained an entry once
+#Returns (ready, new): the directories that now exist and those of them that had to be created
+#A directory that cannot be created is left out, so replay retries it and reports the error per move
+def make_all_dirs(directories):
+    ready, new, changed = set(), set(), set()
+    for directory in sorted(set(directories)):
+        existed = os.path.isdir(directory)
+        try:
+            changed.update(make_dirs(directory))
+        except OSError:
+            continue
+        ready.add(directory)
+        if not existed:
+            new.add(directory)
+    for directory in changed:
+        fsync_dir(directory)
+    return ready, new
+
+#Returns the folder holding move journals for a library root
+def journal_dir(folder_path):
+    return os.path.join(folder_path, JOURNAL_DIR)
+
+#Moves a file, using an atomic rename when source and destination share a device
+#Never replaces another file: plans give clashing names suffixes, so an occupied destination means the folder
+#changed after planning
+def move_atomic(src, dst):
+    if os.path.lexists(dst) and not os.path.samefile(src, dst):
+        raise FileExistsError(f"{dst} already exists")
+    try:
+        same_device = os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev
+    except OSError:
+        same_device = False
+    if same_device:
+        os.replace(src, dst)
+    else:
+        shutil.move(src, dst)
+
+class JournalWriter:
+    #Opens an existing journal for appending
+    #Directories touched by moves are fsynced with the next batch of "done" records, before those records
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._dirty_dirs = set()
+
+    #Starts a new journal and durably records every planned (src, dst) move before any file is touched
+    @classmethod
+    def create(cls, folder_path, kind, moves, undoes=None):
+        directory = journal_dir(folder_path)
+        parents = make_dirs(directory)
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() % 1_000_000_000:09d}"
+        writer = cls(os.path.join(directory, f"{stamp}-{kind}.jsonl"))
+        writer.write({"op": "begin", "kind": kind, "folder": folder_path, "undoes": undoes, "time": time.time()})
+        for seq, (src, dst) in enumerate(moves):
+            writer.write({"op": "move", "seq": seq, "src": src, "dst": dst})
+        writer.sync()
+        #The journal's own directory entry, and those of any folders made for it, must outlive a crash too
+        for path in [directory] + parents:
+            fsync_dir(path)
+        writer.journal = {"path": writer.path, "name": os.path.basename(writer.path), "kind": kind,
+                          "folder": folder_path, "undoes": undoes,
+                          "moves": [(seq, src, dst) for seq, (src, dst) in enumerate(moves)],
+                          "done": set(), "closed": None}
+        return writer
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+
+    def sync(self):
+        for directory in self._dirty_dirs:
+            fsync_dir(directory)
+        self._dirty_dirs.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    #dirs are the directories the move changed; a durable "done" record then implies a durable move
+    def record_done(self, seq, dirs=()):
+        self._dirty_dirs.update(dirs)
+        self.write({"op": "done", "seq": seq})
+        if self._unsynced >= SYNC_EVERY:
+            self.sync()
+
+    #Flushes and closes without a final record, so the journal stays interrupted and can be finished or rolled back later
+    def suspend(self):
+        self.sync()
+        self._file.close()
+
+    #Marks the journal finished ("commit") or abandoned after a rollback ("abort")
+    def close(self, op="commit"):
+        self.write({"op": op, "time": time.time()})
+        self.sync()
+        self._file.close()
+
+#Parses a journal into its header, ordered moves, completed sequence numbers and final state
+def read_journal(path):
+    state = {"path": path, "name": os.path.basename(path), "kind": None, "folder": None, "undoes": None,
+             "moves": [], "done": set(), "closed": None}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                #A torn final line from a crash mid-write carries no completed work
+                break
+            op = record.get("op")
+            if op == "begin":
+                state.update(kind=record["kind"], folder=record["folder"], undoes=record.get("undoes"))
+            elif op == "move":
+                state["moves"].append((record["seq"], record["src"], record["dst"]))
+            elif op == "done":
+                state["done"].add(record["seq"])
+            elif op in ("commit", "abort"):
+                state["closed"] = op
+    return state
+
+#Returns every journal for a library root, oldest first
+def list_journals(folder_path):
+    directory = journal_dir(folder_path)
+    if not os.path.isdir(directory):
+        return []
+    return [read_journal(os.path.join(directory, name)) for name in sorted(os.listdir(directory))
+            if name.endswith(".jsonl")]
+
+#Returns journals that were never committed or aborted, newest first
+def find_interrupted(folder_path):
+    return [j for j in reversed(list_journals(folder_path)) if j["closed"] is None]
+
+#Returns the most recent committed sort that has not been undone yet
+def find_undoable(folder_path):
+    journals = list_journals(folder_path)
+    undone = {j["undoes"] for j in journals if j["kind"] == "undo" and j["closed"] == "commit"}
+    for journal in reversed(journals):
+        if journal["kind"] == "sort" and journal["closed"] == "commit" and journal["name"] not in undone:
+            return journal
+    return None
+
+#Moves that have happened; for an interrupted journal this includes unconfirmed ones the filesystem shows as completed
+def completed_moves(journal):
+    moves = []
+    for seq, src, dst in journal["moves"]:
+        unconfirmed = journal["closed"] is None and os.path.exists(dst) and not os.path.exists(src)
+        if seq in journal["done"] or unconfirmed:
+            moves.append((seq, src, dst))
+    return moves
+
+#Performs every not-yet-done move; when recovering, moves the filesystem shows already happened count as done
+#Yields (seq, src, dst, error) per move so callers can report progress; stops early once should_stop() is True
+#created names destination directories the caller has already made, see make_all_dirs
+def replay(writer, journal, on_move=None, recovering=False, profiler=NULL_PROFILER, should_stop=None, created=()):
+    created = set(created)
+    for seq, src, dst in journal["moves"]:
+        if seq in journal["done"]:
+            continue
+        if should_stop and should_stop():
+            return
+        error = None
+        try:
+            changed = ()
+            if os.path.exists(src):
+                directory = os.path.dirname(dst)
+                changed = [os.path.dirname(src), directory]
+                if directory not in created:
+                    with profiler.span("makedirs", src):
+                        changed += make_dirs(directory)
+                    created.add(directory)
+                with profiler.span("move", src):
+                    move_atomic(src, dst)
+                if on_move:
+                    on_move(src, dst)
+            elif not (recovering and os.path.exists(dst)):
+                raise FileNotFoundError(f"{src} no longer exists")
+            with profiler.span("journal", src):
+                writer.record_done(seq, changed)
+        except Exception as e:
+            error = str(e)
+        yield seq, src, dst, error
@@ -0,0 +1,93 @@
+import re
+
+import numpy as np
+
+KEY_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+FLAT_NAMES = {'Db': 1, 'Eb': 3, 'Gb': 6, 'Ab': 8, 'Bb': 10, 'Cb': 11, 'Fb': 4, 'E#': 5, 'B#': 0}
+UNKNOWN_KEY = "Unknown Key"
+KEY_NOTATIONS = ("camelot", "open_key", "standard")
+
+#Tracks whose best profile correlates below this (Pearson r) are reported as UNKNOWN_KEY
+MIN_KEY_CONFIDENCE = 0.5
+
+#Krumhansl-Kessler probe-tone profiles for C major and C minor
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+#Rows of x with zero mean and unit length, so a dot product is a Pearson correlation
+def standardize(x):
+    x = x - x.mean(axis=-1, keepdims=True)
+    norm = np.linalg.norm(x, axis=-1, keepdims=True)
+    return np.divide(x, norm, out=np.zeros_like(x), where=norm > 0)
+
+#24 x 12 matrix of every rotation: rows 0-11 are C..B major, rows 12-23 are C..B minor
+KEY_PROFILES = standardize(np.array([np.roll(profile, tonic) for profile in (MAJOR_PROFILE, MINOR_PROFILE)
+                                     for tonic in range(12)], dtype=float))
+
+#Classifies an (n, 12) matrix of mean chroma vectors with one matrix product
+#Returns (key indices, confidences); the index is -1 where confidence is below min_confidence
+def classify_keys(chroma, min_confidence=MIN_KEY_CONFIDENCE):
+    correlations = standardize(np.atleast_2d(np.asarray(chroma, dtype=float))) @ KEY_PROFILES.T
+    best = correlations.argmax(axis=1)
+    confidence = correlations[np.arange(len(best)), best]
+    return np.where(confidence >= min_confidence, best, -1), confidence
+
+def is_minor(index):
+    return index >= 12
+
+#ID3 TKEY style name: "C#", "Am"
+def key_label(index):
+    return KEY_NAMES[index % 12] + ("m" if is_minor(index) else "")
+
+def camelot(index):
+    number = (7 * (index % 12) + (5 if is_minor(index) else 8)) % 12 or 12
+    return f"{number}{'A' if is_minor(index) else 'B'}"
+
+def open_key(index):
+    number = (int(camelot(index)[:-1]) - 8) % 12 + 1
+    return f"{number}{'m' if is_minor(index) else 'd'}"
+
+def standard_name(index):
+    return f"{KEY_NAMES[index % 12]} {'minor' if is_minor(index) else 'major'}"
+
+STANDARD_PATTERN = re.compile(r"^([A-Ga-g])\s*([#♯b♭]?)\s*(m|min|minor|maj|major)?$", re.IGNORECASE)
+CAMELOT_PATTERN = re.compile(r"^(1[0-2]|0?[1-9])\s*([AaBb])$")
+OPEN_KEY_PATTERN = re.compile(r"^(1[0-2]|0?[1-9])\s*([MmDd])$")
+CAMELOT_INDEX = {}
+OPEN_KEY_INDEX = {}
+for _index in range(24):
+    CAMELOT_INDEX[camelot(_index)] = _index
+    OPEN_KEY_INDEX[open_key(_index)] = _index
+
+#Reads a key written in standard ("Am", "C# major", "Ebm"), Camelot ("8A") or Open Key ("1m") notation
+#Returns the key index (0-11 major, 12-23 minor) or None when the text is not a key
+def parse_key(text):
+    text = str(text or "").strip()
+    match = CAMELOT_PATTERN.match(text)
+    if match:
+        return CAMELOT_INDEX[f"{int(match.group(1))}{match.group(2).upper()}"]
+    match = OPEN_KEY_PATTERN.match(text)
+    if match:
+        return OPEN_KEY_INDEX[f"{int(match.group(1))}{match.group(2).lower()}"]
+    match = STANDARD_PATTERN.match(text)
+    if not match:
+        return None
+    letter, accidental, quality = match.groups()
+    name = letter.upper() + accidental.replace("♯", "#").replace("♭", "b")
+    #"b" alone after a letter is a flat, never "B"
+    pitch_class = KEY_NAMES.index(name) if name in KEY_NAMES else FLAT_NAMES.get(name)
+    if pitch_class is None:
+        return None
+    minor = bool(quality) and quality.lower() in ("m", "min", "minor") and quality != "M"
+    return pitch_class + (12 if minor else 0)
+
+#Folder name for a key in the chosen notation; text that is not a key is kept as it was
+def format_key(text, notation="camelot"):
+    index = parse_key(text)
+    if index is None:
+        return str(text) if text else UNKNOWN_KEY
+    if notation == "open_key":
+        return open_key(index)
+    if notation == "standard":
+        return standard_name(index)
+    return camelot(index)
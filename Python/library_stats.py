@@ -0,0 +1,122 @@
+import html
+import os
+from collections import Counter
+
+from Python.catalog import BPM_BIN_WIDTH, TrackCatalog
+from Python.genres import genre_normalizer
+from Python.metadata import get_metadata
+from Python.tag_readers import TAG_READ_AHEAD, TAG_THREADS
+from Python.utils import iter_music_files, map_concurrent
+
+#Panels list at most this many genres/artists; the rest are summarised as "… and N more"
+TOP_N = 25
+
+class LibraryStats:
+    #Keeps one TrackCatalog row per file so refreshes only re-read changed files and aggregates are vectorised
+    #Genres are counted under the folder names the sort would give them
+    def __init__(self, folder_path, bpm_width=BPM_BIN_WIDTH, key_notation="camelot"):
+        self.folder_path = folder_path
+        self.catalog = TrackCatalog()
+        self.genres = genre_normalizer()
+        self.bpm_width = bpm_width
+        self.key_notation = key_notation
+
+    #Re-reads only new or changed files and drops vanished ones; returns (changed, removed)
+    #on_batch(changed_so_far) is called every batch_size changes so callers can show partial results
+    #Files are stat'ed and read by tag_threads threads, since on a network share each is a round trip
+    #Once should_stop() returns True no further files are read, and tracks not reached yet are kept as they were
+    def refresh(self, cache=None, files=None, on_batch=None, batch_size=500, tag_threads=TAG_THREADS,
+                read_ahead=TAG_READ_AHEAD, should_stop=None):
+        if files is None:
+            files = iter_music_files(self.folder_path)
+        catalog = self.catalog
+        seen = set()
+        changed = 0
+        stopped = False
+
+        def read(path):
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            if catalog.signature(path) == (st.st_size, st.st_mtime_ns):
+                return None
+            meta = cache.lookup(path) if cache else None
+            if meta is None:
+                meta = get_metadata(path, read_ahead)
+                if cache:
+                    cache.store(path, meta)
+            return meta, st.st_size, st.st_mtime_ns
+
+        def listed():
+            nonlocal stopped
+            for path in files:
+                if should_stop and should_stop():
+                    stopped = True
+                    return
+                seen.add(path)
+                yield path
+
+        for path, record in map_concurrent(read, listed(), tag_threads):
+            if record is None:
+                continue
+            catalog.add(path, *record)
+            changed += 1
+            if on_batch and changed % batch_size == 0:
+                on_batch(changed)
+
+        if stopped:
+            return changed, 0
+        removed = [path for path in catalog.rows if path not in seen]
+        for path in removed:
+            catalog.remove(path)
+        return changed, len(removed)
+
+    #Returns every aggregate the panel and the CLI show
+    def summary(self):
+        catalog = self.catalog
+        return {"files": len(catalog), "total_size": catalog.total_size(), "duration": catalog.total_duration(),
+                "genres": catalog.genre_counts(self.genres.normalize), "artists": catalog.artist_counts(),
+                "keys": catalog.key_counts(self.key_notation), "bpm_ranges": catalog.bpm_histogram(self.bpm_width)}
+
+    #Renders the aggregates as panel HTML, listing at most top_n genres, artists and keys
+    def render_html(self, top_n=TOP_N):
+        summary = self.summary()
+        seconds, timed = summary["duration"]
+        parts = ["<h3>📊 Library Stats</h3>",
+                 f"<p><b>🎧 Tracks:</b> {summary['files']}<br>",
+                 f"<b>💾 Total Size:</b> {format_bytes(summary['total_size'])}"]
+        if timed:
+            parts.append(f"<br><b>⏱️ Playing Time:</b> {format_duration(seconds)} ({timed} tracks timed)")
+        parts.append("</p>")
+        sections = (("🎵 Genres", list(summary["genres"].items())), ("🎤 Artists", list(summary["artists"].items())),
+                    ("🎹 Keys", list(summary["keys"].items())), ("🔊 BPM Ranges", list(summary["bpm_ranges"].items())))
+        for title, items in sections:
+            parts.append(f"<p><b>{title}:</b><br>")
+            for name, count in items[:top_n]:
+                parts.append(f"{html.escape(str(name))}: {count}<br>")
+            if len(items) > top_n:
+                parts.append(f"<i>… and {len(items) - top_n} more</i><br>")
+            parts.append("</p>")
+        return "".join(parts)
+
+#Counts genres, artists and bpm ranges from files
+def compute_statistics(file_paths, cache=None, tag_threads=TAG_THREADS, read_ahead=TAG_READ_AHEAD):
+    stats = LibraryStats(None)
+    stats.refresh(cache, file_paths, tag_threads=tag_threads, read_ahead=read_ahead)
+    catalog = stats.catalog
+    return (Counter(catalog.genre_counts(stats.genres.normalize)), Counter(catalog.artist_counts()),
+            Counter(catalog.bpm_histogram()))
+
+#Formats seconds as hours and minutes, e.g. "312 h 05 min"
+def format_duration(seconds):
+    minutes = int(seconds // 60)
+    return f"{minutes // 60} h {minutes % 60:02d} min"
+
+#Formats file size into readable units
+def format_bytes(size_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024.0
+    return f"{size_bytes:.1f} TB"
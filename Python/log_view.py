@@ -0,0 +1,143 @@
+import shutil
+import tempfile
+from collections import deque
+
+from PyQt6.QtWidgets import QWidget, QListView, QComboBox, QPushButton, QHBoxLayout, QVBoxLayout, QFileDialog
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QTimer, pyqtSignal
+
+from Python.progress import ProgressFeed
+
+#Rows kept in the view; older rows scroll out but stay in the exported log
+LOG_CAPACITY = 10000
+FRAME_RATE = 30
+STATUS_ROLE = Qt.ItemDataRole.UserRole
+STATUS_FILTERS = (("All", ""), ("Moved", "moved"), ("Skipped", "skipped"), ("Errors", "error"),
+                  ("Duplicates", "duplicate"))
+
+class LogModel(QAbstractListModel):
+    #Ring buffer of (status, line) rows; the oldest rows drop off once capacity is reached
+    def __init__(self, capacity=LOG_CAPACITY):
+        super().__init__()
+        self.capacity = capacity
+        self.rows = deque()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        status, line = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return line
+        if role == STATUS_ROLE:
+            return status
+        return None
+
+    #Adds a batch of rows with one insert (and at most one removal) notification
+    def extend(self, rows):
+        rows = rows[-self.capacity:]
+        if not rows:
+            return
+        overflow = len(self.rows) + len(rows) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self.rows.popleft()
+            self.endRemoveRows()
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows.clear()
+        self.endResetModel()
+
+class LogView(QWidget):
+    progress = pyqtSignal(int, int)
+
+    #Output log: a virtualised list fed from a ProgressFeed at a fixed frame rate, with status filter and export
+    #Every line is also spooled to a temporary file so export covers the whole run, not just the visible rows
+    def __init__(self):
+        super().__init__()
+        self.feed = ProgressFeed()
+        self.model = LogModel()
+        self.spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+        self.proxy = QSortFilterProxyModel()
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterRole(STATUS_ROLE)
+
+        self.list_view = QListView()
+        self.list_view.setModel(self.proxy)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.list_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+
+        self.filter_box = QComboBox()
+        for label, _ in STATUS_FILTERS:
+            self.filter_box.addItem(label)
+        self.filter_box.currentIndexChanged.connect(self.set_filter)
+        self.export_button = QPushButton("💾 Export Log")
+        self.export_button.setStyleSheet("QPushButton:hover { background-color: #444; color: white; }")
+        self.export_button.clicked.connect(self.export_log)
+
+        bar = QHBoxLayout()
+        bar.addWidget(self.filter_box)
+        bar.addStretch()
+        bar.addWidget(self.export_button)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(bar)
+        layout.addWidget(self.list_view)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000 // FRAME_RATE)
+        self.timer.timeout.connect(self.drain)
+        self.timer.start()
+
+    #Queues a message; multi-line messages become one row per line
+    def append(self, message, status="info"):
+        self.feed.post(status, message)
+
+    #GUI-thread engine callback for undo and recovery
+    def log_event(self, event):
+        self.feed.post_event(event)
+
+    #Moves everything posted since the last frame into the model in one batch
+    def drain(self):
+        entries, progress = self.feed.take()
+        if entries:
+            at_bottom = self.list_view.verticalScrollBar().value() == self.list_view.verticalScrollBar().maximum()
+            rows = [(status, line) for status, message in entries for line in str(message).split("\n")]
+            self.spool.writelines(line + "\n" for _, line in rows)
+            self.model.extend(rows)
+            if at_bottom:
+                self.list_view.scrollToBottom()
+        if progress is not None:
+            self.progress.emit(*progress)
+
+    def clear(self):
+        self.feed.take()
+        self.model.clear()
+        self.spool.seek(0)
+        self.spool.truncate()
+
+    def set_filter(self, index):
+        status = STATUS_FILTERS[index][1]
+        self.proxy.setFilterRegularExpression(f"^{status}$" if status else "")
+
+    #Writes the complete log of the current run to a text file
+    def export_log(self):
+        self.drain()
+        path, _ = QFileDialog.getSaveFileName(self, "Export Log", "sortify-log.txt", "Text Files (*.txt)")
+        if not path:
+            return
+        self.spool.flush()
+        self.spool.seek(0)
+        with open(path, "w", encoding="utf-8") as f:
+            shutil.copyfileobj(self.spool, f)
+        self.spool.seek(0, 2)
@@ -1,65 +1,204 @@
 import os
+import time
 import librosa
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, TXXX
+import numpy as np
+import soundfile as sf
+
+from Python.fingerprint import compute_fingerprint, encode_fingerprint
+from Python.keys import UNKNOWN_KEY, classify_keys, key_label
+from Python.tag_readers import TAG_READ_AHEAD, read_tags
+
+#Every track is decoded once, mono, at this rate for all audio features
+ANALYSIS_SR = 22050
+
+#Fast mode defaults: one 45 s window from the middle of the track
+EXCERPT_DURATION = 45.0
+EXCERPT_COUNT = 1
+
+#Tracks at least this long are analysed block by block instead of being decoded whole
+STREAM_MIN_SECONDS = 600
+STREAM_BLOCK_FRAMES = 256
+#Onset frames per tempogram chunk on the streaming path; a whole-track tempogram holds a few hundred lags for
+#every frame, which grows with track length
+TEMPOGRAM_CHUNK_FRAMES = 1024
+#Autocorrelation window of the tempo estimate in seconds, librosa's default
+TEMPO_WINDOW_SECONDS = 8.0
+
+#Returns (offset, duration) windows spread evenly through a track, the whole track if it is short
+def excerpt_windows(total_duration, duration=EXCERPT_DURATION, count=EXCERPT_COUNT):
+    if total_duration <= duration * count:
+        return [(0.0, None)]
+    windows = []
+    for n in range(count):
+        centre = total_duration * (n + 1) / (count + 1)
+        windows.append((max(0.0, centre - duration / 2), duration))
+    return windows
+
+#Decodes the whole track, or only the excerpt windows when excerpt=(seconds, count) is given
+def decode_audio(file_path, excerpt=None):
+    if excerpt is None:
+        return [librosa.load(file_path, sr=ANALYSIS_SR, mono=True)[0]]
+    total_duration = librosa.get_duration(path=file_path)
+    buffers = []
+    for offset, duration in excerpt_windows(total_duration, *excerpt):
+        y, _ = librosa.load(file_path, sr=ANALYSIS_SR, mono=True, offset=offset, duration=duration)
+        buffers.append(y)
+    return buffers
+
+#Returns True when soundfile can block-read the file and it is long enough to be worth streaming
+def should_stream(file_path):
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        return False
+    return info.duration >= STREAM_MIN_SECONDS
+
+#Tempo of an onset envelope as librosa.beat.beat_track estimates it: the peak of the mean tempogram under
+#librosa's prior around 120 BPM. The tempogram is built a chunk at a time, each chunk overlapping its neighbours by
+#half a window so every column matches the whole-track one, and only the running column sum is kept
+def chunked_tempo(onset_env, sr, hop_length, chunk=TEMPOGRAM_CHUNK_FRAMES):
+    win_length = int(librosa.time_to_frames(TEMPO_WINDOW_SECONDS, sr=sr, hop_length=hop_length))
+    before, after = win_length // 2, win_length - win_length // 2
+    total = np.zeros(win_length)
+    for start in range(0, len(onset_env), chunk):
+        end = min(start + chunk, len(onset_env))
+        low, high = max(0, start - before), min(len(onset_env), end + after)
+        tg = librosa.feature.tempogram(onset_envelope=onset_env[low:high], sr=sr, hop_length=hop_length,
+                                       win_length=win_length)
+        total += tg[:, start - low:end - low].sum(axis=1)
+    mean = total / max(len(onset_env), 1)
+    return float(librosa.feature.tempo(tg=mean[:, np.newaxis], sr=sr, hop_length=hop_length, aggregate=None)[0])
+
+#Computes BPM/key/fingerprint block by block from soundfile reads so peak memory stays flat for any track length
+#Works at the native rate with FFT/hop sizes scaled to match the 22.05 kHz analysis frame rate
+def analyze_audio_streaming(file_path, features=("BPM", "Key"), block_length=STREAM_BLOCK_FRAMES, classify=True):
+    sr = librosa.get_samplerate(file_path)
+    ratio = sr / ANALYSIS_SR
+    hop_length = int(round(512 * ratio))
+    n_fft = 1 << int(np.ceil(np.log2(2048 * ratio)))
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+    stream = librosa.stream(file_path, block_length=block_length, frame_length=n_fft,
+                            hop_length=hop_length, mono=True, fill_value=0)
+
+    decode_time = 0.0
+    feature_time = 0.0
+    #Shares of feature_time spent on the BPM and key branches (the STFT is shared by both)
+    bpm_time = 0.0
+    key_time = 0.0
+    onset_blocks = []
+    prev_db = None
+    chroma_sum = np.zeros(12)
+    chroma_frames = 0
+    #One mean chroma column per block is fine enough for the fingerprint's 16 segments
+    chroma_blocks = []
+    onset_needed = "BPM" in features or "Fingerprint" in features
+    chroma_needed = "Key" in features or "Fingerprint" in features
+    tick = time.perf_counter()
+    for y_block in stream:
+        read = time.perf_counter()
+        decode_time += read - tick
+
+        power = np.abs(librosa.stft(y_block, n_fft=n_fft, hop_length=hop_length, center=False)) ** 2
+        split = time.perf_counter()
+        if onset_needed:
+            #Spectral flux over log-mel bands, carrying the last frame so block edges are seamless
+            db = librosa.power_to_db(mel_basis @ power)
+            if prev_db is not None:
+                db = np.hstack([prev_db, db])
+            onset_blocks.append(np.maximum(0.0, np.diff(db, axis=1)).mean(axis=0))
+            prev_db = db[:, -1:]
+            bpm_time += time.perf_counter() - split
+            split = time.perf_counter()
+        if chroma_needed:
+            chroma = librosa.feature.chroma_stft(S=power, sr=sr, n_fft=n_fft, tuning=0.0)
+            block_sum = librosa.feature.chroma_cens(C=chroma).sum(axis=1)
+            chroma_sum += block_sum
+            chroma_frames += chroma.shape[1]
+            chroma_blocks.append(block_sum / max(chroma.shape[1], 1))
+            key_time += time.perf_counter() - split
+
+        tick = time.perf_counter()
+        feature_time += tick - read
+
+    start = time.perf_counter()
+    result = {}
+    onset_env = np.concatenate(onset_blocks) if onset_blocks else np.zeros(1)
+    if "BPM" in features:
+        result["BPM"] = round(chunked_tempo(onset_env, sr, hop_length), 2)
+        bpm_time += time.perf_counter() - start
+    if "Key" in features:
+        result.update(key_features(chroma_sum / max(chroma_frames, 1), classify))
+    if "Fingerprint" in features:
+        chroma = np.stack(chroma_blocks, axis=1) if chroma_blocks else np.zeros((12, 1))
+        result["Fingerprint"] = encode_fingerprint(compute_fingerprint(chroma, onset_env))
+
+    result["mode"] = "stream"
+    result["decode_time"] = decode_time
+    result["feature_time"] = feature_time + time.perf_counter() - start
+    result["bpm_time"] = bpm_time
+    result["key_time"] = key_time
+    return result
+
+#Returns the mean chroma vector and, unless the caller classifies in batches, the key it points to
+def key_features(mean_chroma, classify=True):
+    result = {"Chroma": [round(float(v), 5) for v in mean_chroma]}
+    if classify:
+        index, confidence = classify_keys(mean_chroma)
+        result["Key"] = key_label(int(index[0])) if index[0] >= 0 else UNKNOWN_KEY
+        result["KeyConfidence"] = round(float(confidence[0]), 3)
+    return result
+
+#Decodes a file once and computes only the requested features ("BPM", "Key" and/or "Fingerprint")
+#The fingerprint reuses the onset envelope and chroma of the BPM and key branches
+#Long files are streamed automatically unless streaming is forced on or off
+#With classify=False the key is left to the caller, which gets the mean "Chroma" vector to classify in a batch
+def analyze_audio(file_path, features=("BPM", "Key"), excerpt=None, streaming=None, classify=True):
+    if excerpt is None and (streaming or (streaming is None and should_stream(file_path))):
+        return analyze_audio_streaming(file_path, features, classify=classify)
+
+    start = time.perf_counter()
+    buffers = decode_audio(file_path, excerpt)
+    decoded = time.perf_counter()
+
+    result = {}
+    onset_envs = []
+    if "BPM" in features or "Fingerprint" in features:
+        onset_envs = [librosa.onset.onset_strength(y=y, sr=ANALYSIS_SR) for y in buffers]
+    if "BPM" in features:
+        tempos = []
+        for onset_env in onset_envs:
+            tempo, _ = librosa.beat.beat_track(sr=ANALYSIS_SR, onset_envelope=onset_env)
+            tempos.append(float(np.atleast_1d(tempo)[0]))
+        result["BPM"] = round(float(np.median(tempos)), 2)
+    tracked = time.perf_counter()
+    if "Key" in features or "Fingerprint" in features:
+        chroma = np.concatenate([librosa.feature.chroma_cens(y=y, sr=ANALYSIS_SR) for y in buffers], axis=1)
+        if "Key" in features:
+            result.update(key_features(chroma.mean(axis=1), classify))
+        if "Fingerprint" in features:
+            result["Fingerprint"] = encode_fingerprint(compute_fingerprint(chroma, np.concatenate(onset_envs)))
+    finished = time.perf_counter()
+
+    result["mode"] = "full" if excerpt is None else "excerpt"
+    result["decode_time"] = decoded - start
+    result["feature_time"] = finished - decoded
+    result["bpm_time"] = tracked - decoded
+    result["key_time"] = finished - tracked
+    return result
 
 #Gets bpm from files in selected folder
-def get_bpm(file_path):
-    y, sr = librosa.load(file_path, sr=None)
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-    tempo, _ = librosa.beat.beat_track(y=y, sr=sr, onset_envelope=onset_env)
-    return round(float(tempo[0]), 2)
-
-#Gets musical key from audio using chroma features
-def get_key(file_path):
-    y, sr = librosa.load(file_path, sr=None)
-    chroma = librosa.feature.chroma_cens(y=y, sr=sr)
-    chroma_mean = chroma.mean(axis=1)
-    key_idx = chroma_mean.argmax()
-    key_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    return key_names[key_idx]
-
-#Writes bpm value into mp3 metadata tag
-def update_bpm_metadata(file_path, bpm):
-    if not file_path.lower().endswith(".mp3"):
-        return
-    audio = MP3(file_path, ID3=ID3)
-    if not audio.tags:
-        audio.tags = ID3()
-    audio.tags.add(TXXX(encoding=3, desc="BPM", text=str(bpm)))
-    audio.save()
-
-#Extracts metadata from supported audio formats
-def get_metadata(file_path):
+def get_bpm(file_path, excerpt=None):
+    return analyze_audio(file_path, ("BPM",), excerpt)["BPM"]
+
+#Gets the musical key ("Am", "F#") from audio by matching mean chroma against major/minor key profiles
+def get_key(file_path, excerpt=None):
+    return analyze_audio(file_path, ("Key",), excerpt)["Key"]
+
+#Extracts metadata from supported audio formats, fetching read_ahead bytes of the file in its first read
+def get_metadata(file_path, read_ahead=TAG_READ_AHEAD):
     metadata = {"filename": os.path.basename(file_path), "path": file_path}
     try:
-        if file_path.lower().endswith(".mp3"):
-            audio = MP3(file_path, ID3=ID3)
-            if audio.tags:
-                for tag in audio.tags.values():
-                    try:
-                        if hasattr(tag, "desc") and tag.desc.lower() == "bpm":
-                            metadata["BPM"] = float(tag.text[0])
-                        elif hasattr(tag, "text"):
-                            if tag.FrameID == "TPE1":
-                                metadata["Artist"] = tag.text[0]
-                            elif tag.FrameID == "TCON":
-                                metadata["Genre"] = tag.text[0]
-                    except Exception:
-                        continue
-
-        elif file_path.lower().endswith(".flac"):
-            from mutagen.flac import FLAC
-            audio = FLAC(file_path)
-            metadata["Artist"] = audio.get("artist", ["Unknown Artist"])[0]
-            metadata["Genre"] = audio.get("genre", ["Unknown Genre"])[0]
-
-        elif file_path.lower().endswith(".aiff"):
-            from mutagen.aiff import AIFF
-            audio = AIFF(file_path)
-            metadata["Artist"] = audio.get("TPE1", ["Unknown Artist"])[0]
-            metadata["Genre"] = audio.get("TCON", ["Unknown Genre"])[0]
-
+        metadata.update(read_tags(file_path, read_ahead) or {})
     except Exception as e:
         metadata["error"] = str(e)
-    return metadata
\ No newline at end of file
+    return metadata
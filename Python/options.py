@@ -0,0 +1,51 @@
+from dataclasses import dataclass, replace
+
+from Python.tag_readers import TAG_READ_AHEAD, TAG_THREADS
+
+#Settings that change where files end up; checkpoints record these so a resumed job plans as it started
+PLAN_SETTINGS = ("sort_order", "bpm_enabled", "excerpt", "key_notation", "find_duplicates", "duplicates_folder",
+                 "identical")
+
+@dataclass(frozen=True)
+class SortOptions:
+    #Every setting of a sort, preview, views update or watch; the GUI, the CLI and checkpoints build one and
+    #SortEngine reads it
+    #excerpt is (seconds, count) to analyse excerpts instead of whole tracks, or None
+    #key_notation names Key folders: "camelot" (8A), "open_key" (1m) or "standard" (A minor)
+    #find_duplicates fingerprints every track and reports repeated recordings after planning;
+    #with duplicates_folder the extra copies are planned into Duplicates/ instead of beside the kept copy
+    #A file whose bytes already sit at its destination is not moved; with identical="link" it becomes a hardlink
+    #Files needing audio analysis are analysed shortest first, except those under the analyse_first paths
+    #Detected BPM and key are written back to the files' tags after each run unless write_tags is False
+    #Tags are read by tag_threads threads, each fetching read_ahead bytes per file in its first read
+    sort_order: tuple = ()
+    bpm_enabled: bool = False
+    excerpt: tuple = None
+    key_notation: str = "camelot"
+    find_duplicates: bool = False
+    duplicates_folder: bool = False
+    identical: str = "skip"
+    analyse_first: tuple = ()
+    workers: int = 1
+    write_tags: bool = True
+    tag_threads: int = TAG_THREADS
+    read_ahead: int = TAG_READ_AHEAD
+
+    #Lists from the GUI, argparse or JSON become tuples, so equal settings compare equal
+    def __post_init__(self):
+        object.__setattr__(self, "sort_order", tuple(self.sort_order or ()))
+        object.__setattr__(self, "excerpt", tuple(self.excerpt) if self.excerpt else None)
+        object.__setattr__(self, "analyse_first", tuple(self.analyse_first or ()))
+
+    #The PLAN_SETTINGS values as a JSON-ready dict
+    def plan_settings(self):
+        settings = {name: getattr(self, name) for name in PLAN_SETTINGS}
+        settings["sort_order"] = list(self.sort_order)
+        settings["excerpt"] = list(self.excerpt) if self.excerpt else None
+        return settings
+
+    #Returns these options with the plan settings taken from settings, e.g. a checkpoint's header
+    #A setting missing there takes its default, which is what it was before it was recorded
+    def with_plan_settings(self, settings):
+        defaults = SortOptions()
+        return replace(self, **{name: settings.get(name, getattr(defaults, name)) for name in PLAN_SETTINGS})
@@ -0,0 +1,56 @@
+import json
+import os
+from collections import namedtuple
+
+PLAN_VERSION = 1
+
+#One planned move: where the file is, where it goes, and the folder path that explains why
+PlanEntry = namedtuple("PlanEntry", ["source", "destination", "reason"])
+
+class SortPlan:
+    #Creates an empty move plan for a library root and sort order
+    #links lists (source, kept) pairs of byte-identical files to replace with hardlinks once the moves are done
+    #tags maps analysed files to the detected BPM/key values to write into them after the moves
+    def __init__(self, folder_path, sort_order, entries=None, links=None, tags=None):
+        self.folder_path = folder_path
+        self.sort_order = list(sort_order)
+        self.entries = list(entries or [])
+        self.links = [tuple(link) for link in links or []]
+        self.tags = dict(tags or {})
+
+    def add(self, source, destination, reason):
+        self.entries.append(PlanEntry(source, destination, reason))
+
+    def __len__(self):
+        return len(self.entries)
+
+    #Directories the plan needs to exist before files can be moved
+    def directories(self):
+        return {os.path.dirname(entry.destination) for entry in self.entries}
+
+    def to_dict(self):
+        return {
+            "version": PLAN_VERSION,
+            "folder_path": self.folder_path,
+            "sort_order": self.sort_order,
+            "entries": [entry._asdict() for entry in self.entries],
+            "links": [list(link) for link in self.links],
+            "tags": self.tags,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"unsupported sort plan version: {data.get('version')}")
+        entries = [PlanEntry(e["source"], e["destination"], e["reason"]) for e in data["entries"]]
+        return cls(data["folder_path"], data["sort_order"], entries, data.get("links"), data.get("tags"))
+
+    #Writes the plan as JSON so it can be reviewed and applied later
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
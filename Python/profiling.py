@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+TRACE_DIR = os.path.join(".sortify", "traces")
+SLOWEST_FILES = 10
+
+#Shared do-nothing span, so disabled profiling costs one method call per stage
+NULL_SPAN = nullcontext()
+
+class NullProfiler:
+    enabled = False
+
+    def span(self, stage, file_path=None):
+        return NULL_SPAN
+
+    def add(self, stage, seconds, file_path=None, start=None, pid=None):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+class Span:
+    __slots__ = ("profiler", "stage", "file_path", "start")
+
+    def __init__(self, profiler, stage, file_path):
+        self.profiler = profiler
+        self.stage = stage
+        self.file_path = file_path
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.stage, time.perf_counter() - self.start, self.file_path, self.start)
+        return False
+
+class StageProfiler:
+    enabled = True
+
+    #Totals time and calls per stage and per file; with trace=True also keeps every span for a Chrome trace
+    #Start times are time.perf_counter() values, which share one clock across analysis worker processes
+    def __init__(self, trace=False):
+        self.stages = defaultdict(lambda: [0, 0.0])
+        self.files = defaultdict(lambda: defaultdict(float))
+        self.events = [] if trace else None
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    #Times a with-block as one call of stage
+    def span(self, stage, file_path=None):
+        return Span(self, stage, file_path)
+
+    #Records a stage timed elsewhere, e.g. inside an analysis worker process
+    def add(self, stage, seconds, file_path=None, start=None, pid=None):
+        with self.lock:
+            totals = self.stages[stage]
+            totals[0] += 1
+            totals[1] += seconds
+            if file_path is not None:
+                self.files[file_path][stage] += seconds
+            if self.events is not None and start is not None:
+                event = {"name": stage, "cat": "sortify", "ph": "X", "ts": round((start - self.origin) * 1e6),
+                         "dur": round(seconds * 1e6), "pid": pid or os.getpid(), "tid": pid or os.getpid()}
+                if file_path is not None:
+                    event["args"] = {"file": file_path}
+                self.events.append(event)
+
+    #Returns per-stage totals (slowest stage first) and the files that took longest overall
+    def summary(self, top_n=SLOWEST_FILES):
+        with self.lock:
+            stages = {stage: {"calls": calls, "seconds": round(seconds, 4)}
+                      for stage, (calls, seconds) in sorted(self.stages.items(), key=lambda item: -item[1][1])}
+            totals = sorted(((sum(stages_of.values()), path, stages_of) for path, stages_of in self.files.items()),
+                            key=lambda item: -item[0])[:top_n]
+        slowest = [{"file": path, "seconds": round(total, 4),
+                    "stages": {stage: round(seconds, 4) for stage, seconds in stages_of.items()}}
+                   for total, path, stages_of in totals]
+        return {"stages": stages, "slowest_files": slowest}
+
+    #Writes the recorded spans as Chrome trace-event JSON (open in chrome://tracing or Perfetto)
+    def write_trace(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.lock:
+            events = list(self.events or [])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+#Default trace location for a run on folder_path
+def trace_path(folder_path, kind="sort"):
+    return os.path.join(folder_path, TRACE_DIR, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+#Turns a profile summary into the lines shown at the end of a run
+def format_profile(profile):
+    lines = ["⏱️ Time per stage:"]
+    for stage, totals in profile["stages"].items():
+        lines.append(f"   {stage.replace('_', ' ')}: {totals['seconds']:.2f}s over {totals['calls']} calls")
+    if profile["slowest_files"]:
+        lines.append("🐢 Slowest files:")
+        for entry in profile["slowest_files"]:
+            parts = ", ".join(f"{stage.replace('_', ' ')} {seconds:.2f}s" for stage, seconds in entry["stages"].items())
+            lines.append(f"   {entry['seconds']:.2f}s {os.path.basename(entry['file'])} ({parts})")
+    return "\n".join(lines)
@@ -0,0 +1,30 @@
+import threading
+
+from Python.engine import event_status, format_event
+
+class ProgressFeed:
+    #Thread-safe buffer between workers and the log: workers post freely, the GUI takes everything once per frame
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        self.progress = None
+
+    def post(self, status, message, done=None, discovered=None):
+        with self.lock:
+            self.entries.append((status, message))
+            if done is not None:
+                self.progress = (done, discovered)
+
+    #Posts an engine event; with_progress also moves the progress bar, for events that carry a done count
+    def post_event(self, event, with_progress=False):
+        if with_progress and "done" in event:
+            self.post(event_status(event), format_event(event), event["done"], event.get("discovered", event["done"]))
+        else:
+            self.post(event_status(event), format_event(event))
+
+    #Returns (entries, latest progress or None) posted since the last call
+    def take(self):
+        with self.lock:
+            entries, self.entries = self.entries, []
+            progress, self.progress = self.progress, None
+        return entries, progress
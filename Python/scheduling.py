@@ -0,0 +1,128 @@
+import heapq
+import os
+import queue
+import threading
+
+from Python.analysis import required_features
+from Python.metadata import get_metadata
+from Python.utils import map_concurrent
+
+#A stream near 320 kbps; used to guess playing time when the audio header cannot be read
+BYTES_PER_SECOND = 40_000
+
+#How long the analysis tier waits for the tag tier before checking for cancellation again
+TIER_POLL = 0.05
+
+#Playing time guessed from the file size, for files whose header gives none
+def size_duration(file_path):
+    try:
+        return os.path.getsize(file_path) / BYTES_PER_SECOND
+    except OSError:
+        return float("inf")
+
+#True when file_path is one of paths or lies inside one of them
+def under_any(file_path, paths):
+    file_path = os.path.abspath(file_path)
+    return any(file_path == path or file_path.startswith(path + os.sep) for path in paths)
+
+class TagTier:
+    #First of the two scheduling tiers: a helper thread looks up the cache or reads tags for each file as the scan
+    #finds it, with up to engine.tag_threads reads in flight. Files the tags fully place are handed over at once
+    #through take_ready(); files still needing audio analysis wait in a priority queue, files under analyse_first
+    #ahead of the rest and then shortest first
+    #engine supplies lookup(), sort_order, bpm_enabled, find_duplicates, tag_threads, read_ahead and profiler
+    def __init__(self, engine, files, analyse_first=()):
+        self.engine = engine
+        self.analyse_first = [os.path.abspath(path) for path in analyse_first]
+        self.placed = 0
+        self.queued = 0
+        self.finished = False
+        self.stopping = False
+        self._error = None
+        self._ready = queue.Queue()
+        self._heap = []
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, args=(files,), daemon=True)
+        self._thread.start()
+
+    def _run(self, files):
+        try:
+            for _, result in map_concurrent(self._read, self._numbered(files), self.engine.tag_threads):
+                if result is not None:
+                    self._sort(*result)
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._changed:
+                self.finished = True
+                self._changed.notify_all()
+
+    def _numbered(self, files):
+        for i, file_path in enumerate(files):
+            if self.stopping:
+                return
+            yield i, file_path
+
+    #Runs on the tag threads: returns (index, path, meta, fresh, priority), priority None when the tags place the
+    #file, or None for a file that has gone
+    def _read(self, item):
+        i, file_path = item
+        if self.stopping or not os.path.exists(file_path):
+            return None
+        engine = self.engine
+        meta = engine.lookup(file_path)
+        fresh = meta is None
+        if fresh:
+            with engine.profiler.span("tags", file_path):
+                meta = get_metadata(file_path, engine.read_ahead)
+        priority = None
+        if "error" not in meta and required_features(meta, engine.sort_order, engine.bpm_enabled,
+                                                     engine.find_duplicates):
+            #The tag readers take the playing time from the audio header; older cache entries lack it
+            duration = meta.get("Duration")
+            priority = (not under_any(file_path, self.analyse_first), duration or size_duration(file_path), i)
+        return i, file_path, meta, fresh, priority
+
+    def _sort(self, i, file_path, meta, fresh, priority):
+        with self._changed:
+            if priority is None:
+                self.placed += 1
+                self._ready.put((i, file_path, meta, fresh))
+            else:
+                self.queued += 1
+                heapq.heappush(self._heap, (priority, file_path, meta))
+            self._changed.notify_all()
+
+    #Yields every (index, path, meta, fresh) result the tags settled since the last call
+    def take_ready(self):
+        while True:
+            try:
+                yield self._ready.get_nowait()
+            except queue.Empty:
+                return
+
+    #Returns the queued (index, path, meta) with the highest priority, or None when nothing is waiting
+    def pop(self):
+        with self._changed:
+            if not self._heap:
+                return None
+            (_, _, i), file_path, meta = heapq.heappop(self._heap)
+            return i, file_path, meta
+
+    #True once every file has been read and every result handed over
+    def exhausted(self):
+        with self._changed:
+            done = self.finished and not self._heap and self._ready.empty()
+        if done and self._error is not None:
+            raise self._error
+        return done
+
+    #Blocks until the tag tier produces something new, for at most timeout seconds
+    def wait(self, timeout=TIER_POLL):
+        with self._changed:
+            if not self.finished and not self._heap and self._ready.empty():
+                self._changed.wait(timeout)
+
+    def stop(self):
+        self.stopping = True
+        self._thread.join(TIER_POLL)
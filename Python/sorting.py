@@ -1,82 +1,110 @@
-import os
-import shutil
 import traceback
+from dataclasses import replace
 from PyQt6.QtCore import QThread, pyqtSignal
 
-from Python.genre_aliases import GENRE_ALIASES
-from Python.metadata import get_metadata, get_bpm, get_key, update_bpm_metadata
-from Python.utils import sanitize_filename, delete_empty_folders
+from Python.engine import SortEngine, format_summary
+from Python.progress import ProgressFeed
+from Python.profiling import StageProfiler, trace_path
+from Python.watch import watch_folder
 
 class SortWorker(QThread):
-    update_progress = pyqtSignal(int, str)
     finished = pyqtSignal(str)
 
 #Initializes the sort worker thread with all parameters
-    def __init__(self, files, folder_path, sort_order, bpm_enabled, preview):
+#Per-file progress goes to feed rather than a signal, so the GUI can pick it up once per frame
+    def __init__(self, files, folder_path, options, preview, cache=None, plan=None, feed=None, profile=False,
+                 checkpoint=None):
         super().__init__()
+        self.feed = feed or ProgressFeed()
         self.files = files
-        self.folder_path = folder_path
-        self.sort_order = sort_order
-        self.bpm_enabled = bpm_enabled
         self.preview = preview
-        self.last_sort_map = {}
-
-#Sorts songs into genres despite metadata aliases
-    def build_sort_path(self, meta):
-        parts = []
-        for crit in self.sort_order:
-            if crit == "Artist":
-                parts.append(meta.get("Artist", "Unknown Artist"))
-            elif crit == "Genre":
-                genre = str(meta.get("Genre", "Unknown Genre")).strip().lower()
-                parts.append(GENRE_ALIASES.get(genre, genre.title()))
-            elif crit == "BPM Range":
-                bpm = meta.get("BPM")
-                parts.append(f"{int(bpm // 10) * 10}-{int(bpm // 10) * 10 + 9} BPM" if bpm else "Unknown BPM")
-            elif crit == "Alphabetical":
-                char = meta["filename"][0].upper()
-                parts.append(char if char.isalpha() else "#")
-            elif crit == "Key":
-                parts.append(meta.get("Key", "Unknown Key"))
-        return os.path.join(*parts)
-
-#Builds destination path based on metadata and selected sort order
+        self.plan = plan
+        self.cancelled = False
+        self.profiler = StageProfiler(trace=True) if profile else None
+        self.engine = SortEngine(folder_path, options, cache, on_progress=self.emit_event, profiler=self.profiler,
+                                 checkpoint=checkpoint)
+        self.last_sort_map = self.engine.last_sort_map
+
+#Stops the run after the current file; progress so far is kept for a resume
+    def cancel(self):
+        self.engine.cancel()
+
+#Posts engine events to the feed along with (processed, discovered) progress
+#Run-wide notices such as "tier" or "aliases_ignored" carry no count and leave the bar alone
+    def emit_event(self, event):
+        self.feed.post_event(event, with_progress="done" in event)
+
+#Runs the sort engine off the GUI thread, applying a previewed plan as-is when one was given
     def run(self):
         try:
-            for i, file_path in enumerate(self.files):
-                if not os.path.exists(file_path):
-                    continue
-                meta = get_metadata(file_path)
-                if "error" in meta:
-                    self.update_progress.emit(i + 1, f"⚠️ Skipped: {meta['filename']} (metadata error: {meta['error']})")
-                    continue
-
-                if "BPM Range" in self.sort_order and ("BPM" not in meta) and self.bpm_enabled:
-                    meta["BPM"] = get_bpm(file_path)
-                    if file_path.lower().endswith(".mp3"):
-                        update_bpm_metadata(file_path, meta["BPM"])
-
-                if "Key" in self.sort_order:
-                    meta["Key"] = get_key(file_path)
-
-                folder_structure = self.build_sort_path(meta)
-                destination_dir = os.path.join(self.folder_path, folder_structure)
-                os.makedirs(destination_dir, exist_ok=True)
-
-                sanitized_name = sanitize_filename(os.path.basename(file_path))
-                dest_path = os.path.join(destination_dir, sanitized_name)
-
-                if self.preview:
-                    self.update_progress.emit(i + 1, f"\U0001F4C2 {meta['filename']} → {folder_structure}")
-                else:
-                    shutil.move(file_path, dest_path)
-                    self.last_sort_map[file_path] = dest_path
-                    self.update_progress.emit(i + 1, f"\u2705 Moved: {meta['filename']} → {folder_structure}")
-
-            msg = "\nPreview Complete." if self.preview else "\n\u2705 Sorting Complete."
-            if not self.preview:
-                delete_empty_folders(self.folder_path)
-            self.finished.emit(msg)
+            if self.plan is not None:
+                summary = self.engine.apply(self.plan)
+                if self.profiler:
+                    summary["profile"] = self.profiler.summary()
+            else:
+                self.plan, summary = self.engine.run(self.files, self.preview)
+            if self.profiler:
+                summary["trace"] = self.profiler.write_trace(trace_path(self.engine.folder_path))
+            self.cancelled = summary.get("cancelled", False)
+            self.finished.emit(format_summary(summary))
         except Exception as e:
             error_msg = traceback.format_exc()
-            self.finished.emit(f"\n\u274C Error: {e}\n{error_msg}")
+            self.finished.emit(f"\n❌ Error: {e}\n{error_msg}")
+
+class ViewWorker(QThread):
+    finished = pyqtSignal(str)
+
+#Analyses a folder and updates its link views off the GUI thread; no file is moved
+    def __init__(self, files, folder_path, layouts, options, cache=None, feed=None):
+        super().__init__()
+        self.feed = feed or ProgressFeed()
+        self.files = files
+        self.layouts = layouts
+        self.cancelled = False
+        self.engine = SortEngine(folder_path, replace(options, sort_order=layouts[0]), cache,
+                                 on_progress=self.emit_event)
+
+    def cancel(self):
+        self.engine.cancel()
+
+#Unlink events carry no progress, every other event moves the bar
+    def emit_event(self, event):
+        self.feed.post_event(event, with_progress="done" in event)
+
+    def run(self):
+        try:
+            summary = self.engine.run_views(self.files, self.layouts)
+            self.cancelled = summary.get("cancelled", False)
+            self.finished.emit(format_summary(summary))
+        except Exception as e:
+            error_msg = traceback.format_exc()
+            self.finished.emit(f"\n❌ Error: {e}\n{error_msg}")
+
+class WatchWorker(QThread):
+    batch_done = pyqtSignal(str)
+    finished = pyqtSignal(str)
+
+#Watches a folder and sorts new arrivals in batches until stop() is called
+    def __init__(self, folder_path, options, cache=None, feed=None):
+        super().__init__()
+        self.feed = feed or ProgressFeed()
+        self.stopping = False
+        self.engine = SortEngine(folder_path, options, cache, on_progress=self.emit_event)
+
+    def emit_event(self, event):
+        self.feed.post_event(event)
+
+    def stop(self):
+        self.stopping = True
+        self.engine.cancel()
+
+    def run(self):
+        try:
+            watch_folder(self.engine, on_batch=self.emit_batch, should_stop=lambda: self.stopping)
+            self.finished.emit("\n👀 Stopped watching.")
+        except Exception as e:
+            error_msg = traceback.format_exc()
+            self.finished.emit(f"\n❌ Error: {e}\n{error_msg}")
+
+    def emit_batch(self, plan, summary):
+        self.batch_done.emit(f"📥 New arrivals: {summary['moved']} sorted, {summary['skipped']} skipped.")
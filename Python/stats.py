@@ -1,8 +1,40 @@
-import os
-from collections import Counter
+from PyQt6.QtCore import QThread, pyqtSignal
 
-from Python.metadata import get_metadata
-from Python.utils import scan_folder
+from Python.library_stats import LibraryStats
+from Python.tag_readers import TAG_THREADS
+
+READING_HTML = "<h3>📊 Library Stats</h3><p>⏳ Reading library…</p>"
+
+class StatsWorker(QThread):
+    updated = pyqtSignal(str)
+    finished = pyqtSignal(str)
+
+    #Refreshes a LibraryStats off the GUI thread, emitting rendered HTML as batches come in
+    #The stats are only rendered on this thread while it runs; last_html keeps the latest render for the GUI
+    def __init__(self, library_stats, cache=None, tag_threads=TAG_THREADS):
+        super().__init__()
+        self.library_stats = library_stats
+        self.cache = cache
+        self.tag_threads = tag_threads
+        self.stopping = False
+        self.last_html = READING_HTML
+
+    #Stops reading after the files already in flight; the stats keep what was read so far
+    def stop(self):
+        self.stopping = True
+
+    def publish(self, signal):
+        self.last_html = self.library_stats.render_html()
+        signal.emit(self.last_html)
+
+    def run(self):
+        try:
+            self.library_stats.refresh(self.cache, on_batch=lambda _: self.publish(self.updated),
+                                       tag_threads=self.tag_threads, should_stop=lambda: self.stopping)
+            self.publish(self.finished)
+        except Exception as e:
+            self.last_html = f"<p>❌ Could not compute stats: {e}</p>"
+            self.finished.emit(self.last_html)
 
 #Toggles the stats panel on and off
 def toggle_stats_panel(app):
@@ -14,53 +46,24 @@ def toggle_stats_panel(app):
         app.stats_panel.setVisible(True)
         app.stats_button.setText("❌ Hide Stats")
 
-#Refreshes statistics panel content from current folder
+#Shows the cached aggregates straight away and updates only changed files in the background
 def refresh_stats(app):
-    files = scan_folder(app.folder_path)
-    genre_counts, artist_counts, bpm_ranges = compute_statistics(files)
-    total_size = compute_total_size(files)
-
-    html = "<h3>📊 Library Stats</h3>"
-    html += f"<p><b>💾 Total Size:</b> {format_bytes(total_size)}</p>"
-
-    html += "<p><b>🎵 Genres:</b><br>"
-    for genre, count in genre_counts.items():
-        html += f"{genre}: {count}<br>"
-    html += "</p><p><b>🎤 Artists:</b><br>"
-    for artist, count in artist_counts.items():
-        html += f"{artist}: {count}<br>"
-    html += "</p><p><b>🔊 BPM Ranges:</b><br>"
-    for bpm, count in bpm_ranges.items():
-        html += f"{bpm}: {count}<br>"
-    html += "</p>"
-
-    app.stats_panel.setHtml(html)
-
-#Counts genres, artists and bpm ranges from files
-def compute_statistics(file_paths):
-    genre_counts = Counter()
-    artist_counts = Counter()
-    bpm_ranges = Counter()
-    for path in file_paths:
-        meta = get_metadata(path)
-        genre = meta.get("Genre", "Unknown Genre")
-        artist = meta.get("Artist", "Unknown Artist")
-        bpm = meta.get("BPM")
-        genre_counts[genre] += 1
-        artist_counts[artist] += 1
-        if bpm:
-            range_key = f"{(int(bpm) // 10) * 10}-{(int(bpm) // 10) * 10 + 9} BPM"
-            bpm_ranges[range_key] += 1
-    return genre_counts, artist_counts, bpm_ranges
-
-#Sums up total file sizes for stats panel
-def compute_total_size(file_paths):
-    return sum(os.path.getsize(path) for path in file_paths if os.path.exists(path))
+    if not app.folder_path:
+        app.stats_panel.setHtml("<h3>📊 Library Stats</h3><p>No folder selected.</p>")
+        return
+    worker = app.stats_worker
+    if worker is not None and worker.isRunning():
+        #The worker is still writing to its LibraryStats, so only the HTML it rendered itself is safe to show
+        same_folder = worker.library_stats.folder_path == app.folder_path
+        app.stats_panel.setHtml(worker.last_html if same_folder else READING_HTML)
+        return
+    if app.library_stats is None or app.library_stats.folder_path != app.folder_path:
+        app.library_stats = LibraryStats(app.folder_path)
+        app.stats_panel.setHtml(READING_HTML)
+    else:
+        app.stats_panel.setHtml(app.library_stats.render_html())
 
-#Formats file size into readable units
-def format_bytes(size_bytes):
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} TB"
+    app.stats_worker = StatsWorker(app.library_stats, app.cache, app.tag_threads_spinbox.value())
+    app.stats_worker.updated.connect(app.stats_panel.setHtml)
+    app.stats_worker.finished.connect(app.stats_panel.setHtml)
+    app.stats_worker.start()
@@ -0,0 +1,360 @@
+import io
+import os
+import struct
+
+from mutagen.id3 import ID3, TCON, Frames, ID3NoHeaderError
+
+#Tag readers by file extension; each takes an open binary file and returns a dict with any of Artist, Genre,
+#BPM and Key, plus Duration in seconds when the audio header it passes on the way gives the playing time
+TAG_READERS = {}
+
+#Bytes fetched by the first read of a file. Tags sit in the header, so on a network share the parser's many
+#small reads and seeks are then served from memory instead of costing a round trip each
+TAG_READ_AHEAD = 128 * 1024
+
+#Tag reads wait on the disk or network rather than the CPU, so this many run at once on threads
+TAG_THREADS = 16
+
+#Only these ID3 frames are parsed, everything else (APIC artwork, lyrics, ...) stays as raw bytes
+ID3_FRAMES = {name: Frames[name] for name in ("TPE1", "TCON", "TBPM", "TKEY", "TXXX")}
+
+#Registers a reader function for one or more file extensions
+def register_reader(*extensions):
+    def decorator(reader):
+        for extension in extensions:
+            TAG_READERS[extension.lower()] = reader
+        return reader
+    return decorator
+
+#Returns the reader for a file, or None for formats without tag support
+def reader_for(file_path):
+    return TAG_READERS.get(os.path.splitext(file_path)[1].lower())
+
+#Opens a file with a read_ahead byte buffer and parses its tags; returns None for formats without tag support
+def read_tags(file_path, read_ahead=TAG_READ_AHEAD):
+    reader = reader_for(file_path)
+    if reader is None:
+        return None
+    with open(file_path, "rb", buffering=max(read_ahead, io.DEFAULT_BUFFER_SIZE)) as f:
+        return reader(f)
+
+def parse_bpm(value):
+    try:
+        bpm = float(str(value).strip())
+    except ValueError:
+        return None
+    return bpm if bpm > 0 else None
+
+#Maps parsed ID3 frames onto Sortify fields
+def id3_fields(tags):
+    fields = {}
+    for frame in tags.getall("TPE1")[:1]:
+        if frame.text:
+            fields["Artist"] = str(frame.text[0])
+    for frame in tags.getall("TCON")[:1]:
+        genres = frame.genres
+        if genres:
+            fields["Genre"] = genres[0]
+    for frame in tags.getall("TBPM")[:1]:
+        if frame.text and parse_bpm(frame.text[0]):
+            fields["BPM"] = parse_bpm(frame.text[0])
+    for frame in tags.getall("TKEY")[:1]:
+        if frame.text and str(frame.text[0]).strip():
+            fields["Key"] = str(frame.text[0]).strip()
+    for frame in tags.getall("TXXX"):
+        desc = frame.desc.lower()
+        if not frame.text:
+            continue
+        if desc == "bpm" and parse_bpm(frame.text[0]):
+            fields["BPM"] = parse_bpm(frame.text[0])
+        elif desc in ("initialkey", "key") and "Key" not in fields and str(frame.text[0]).strip():
+            fields["Key"] = str(frame.text[0]).strip()
+    return fields
+
+#Parses an ID3v2 tag from an open file or from the bytes of an embedded ID3 chunk
+def read_id3(source, load_v1=True):
+    try:
+        tags = ID3(source, known_frames=ID3_FRAMES, translate=False, load_v1=load_v1)
+    except ID3NoHeaderError:
+        return {}
+    return id3_fields(tags)
+
+#Maps Vorbis comments (lower-cased keys) onto Sortify fields
+def vorbis_fields(comments):
+    fields = {}
+    if comments.get("artist"):
+        fields["Artist"] = comments["artist"]
+    if comments.get("genre"):
+        fields["Genre"] = comments["genre"]
+    bpm = parse_bpm(comments.get("bpm") or comments.get("tempo") or "")
+    if bpm:
+        fields["BPM"] = bpm
+    key = comments.get("initialkey") or comments.get("key")
+    if key and key.strip():
+        fields["Key"] = key.strip()
+    return fields
+
+#Decodes a VORBIS_COMMENT block, keeping the first value of each key
+def parse_vorbis_comment(data):
+    vendor_length = struct.unpack_from("<I", data, 0)[0]
+    offset = 4 + vendor_length
+    count = struct.unpack_from("<I", data, offset)[0]
+    offset += 4
+    comments = {}
+    for _ in range(count):
+        length = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        key, _, value = data[offset:offset + length].decode("utf-8", "replace").partition("=")
+        comments.setdefault(key.lower(), value)
+        offset += length
+    return comments
+
+#Playing time from a FLAC STREAMINFO block: a 20-bit sample rate and a 36-bit sample count
+def streaminfo_duration(data):
+    packed = int.from_bytes(data[10:18], "big")
+    sample_rate, samples = packed >> 44, packed & ((1 << 36) - 1)
+    return samples / sample_rate if sample_rate and samples else None
+
+#Walks FLAC metadata blocks and reads only STREAMINFO and VORBIS_COMMENT, seeking past PICTURE and the rest
+@register_reader(".flac")
+def read_flac_tags(f):
+    marker = f.read(4)
+    if marker[:3] == b"ID3":
+        #Some taggers prepend an ID3v2 block; its size is a 28-bit synchsafe integer
+        header = marker + f.read(6)
+        size = 0
+        for byte in header[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        f.seek(10 + size)
+        marker = f.read(4)
+    if marker != b"fLaC":
+        raise ValueError("not a FLAC file")
+    fields = {}
+    while True:
+        header = f.read(4)
+        if len(header) < 4:
+            return fields
+        last = header[0] & 0x80
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 0:
+            duration = streaminfo_duration(f.read(length))
+            if duration:
+                fields["Duration"] = duration
+        elif block_type == 4:
+            fields.update(vorbis_fields(parse_vorbis_comment(f.read(length))))
+            return fields
+        else:
+            f.seek(length, io.SEEK_CUR)
+        if last:
+            return fields
+
+#Yields (chunk id, size) of IFF-style chunks, leaving the file positioned at each chunk's data
+def iter_chunks(f, end, byteorder):
+    position = f.tell()
+    while position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        chunk_id, size = header[:4], int.from_bytes(header[4:], byteorder)
+        yield chunk_id, size
+        position += 8 + size + (size & 1)
+
+#Decodes the 80-bit extended float an AIFF COMM chunk stores its sample rate in
+def extended_float(data):
+    exponent = int.from_bytes(data[:2], "big") & 0x7FFF
+    mantissa = int.from_bytes(data[2:10], "big")
+    return mantissa * 2.0 ** (exponent - 16383 - 63) if exponent else 0.0
+
+#Reads an embedded ID3 chunk (WAV/AIFF) or a RIFF LIST/INFO chunk (WAV), and the playing time from the format
+#chunk and the size of the audio chunk, which is seeked past rather than read
+def read_iff_tags(f, form, types, byteorder):
+    fields = {}
+    info = {}
+    byte_rate = data_size = duration = None
+    header = f.read(12)
+    if header[:4] != form or header[8:12] not in types:
+        raise ValueError(f"not a {types[0].decode()} file")
+    end = 8 + int.from_bytes(header[4:8], byteorder)
+    for chunk_id, size in iter_chunks(f, end, byteorder):
+        if chunk_id == b"fmt ":
+            byte_rate = int.from_bytes(f.read(12)[8:12], "little")
+        elif chunk_id == b"data":
+            data_size = size
+        elif chunk_id == b"COMM":
+            comm = f.read(18)
+            sample_rate = extended_float(comm[8:18])
+            if sample_rate:
+                duration = int.from_bytes(comm[2:6], "big") / sample_rate
+        elif chunk_id in (b"ID3 ", b"id3 "):
+            fields = read_id3(io.BytesIO(f.read(size)), load_v1=False)
+        elif chunk_id == b"LIST" and f.read(4) == b"INFO":
+            data = f.read(size - 4)
+            offset = 0
+            while offset + 8 <= len(data):
+                sub_id = data[offset:offset + 4]
+                sub_size = int.from_bytes(data[offset + 4:offset + 8], "little")
+                value = data[offset + 8:offset + 8 + sub_size].split(b"\0", 1)[0].decode("latin-1").strip()
+                if value:
+                    info[sub_id] = value
+                offset += 8 + sub_size + (sub_size & 1)
+    if b"IART" in info:
+        fields.setdefault("Artist", info[b"IART"])
+    if b"IGNR" in info:
+        fields.setdefault("Genre", info[b"IGNR"])
+    if byte_rate and data_size:
+        duration = data_size / byte_rate
+    if duration:
+        fields["Duration"] = duration
+    return fields
+
+#Reads the ID3 tag, then the playing time from the first MPEG frame header (and its Xing/VBRI header, or the
+#file size for CBR files without one); mutagen's MPEGInfo reads no further than that
+@register_reader(".mp3")
+def read_mp3_tags(f):
+    from mutagen.mp3 import HeaderNotFoundError, MPEGInfo
+    fields = read_id3(f)
+    try:
+        duration = MPEGInfo(f).length
+    except HeaderNotFoundError:
+        duration = None
+    if duration and duration > 0:
+        fields["Duration"] = duration
+    return fields
+
+@register_reader(".wav")
+def read_wav_tags(f):
+    return read_iff_tags(f, b"RIFF", (b"WAVE",), "little")
+
+@register_reader(".aiff", ".aif")
+def read_aiff_tags(f):
+    return read_iff_tags(f, b"FORM", (b"AIFF", b"AIFC"), "big")
+
+#Yields (atom type, data start, end) of MP4 atoms up to end, or to the end of the file when end is None,
+#leaving the file positioned at each atom's data
+def iter_atoms(f, end=None):
+    position = f.tell()
+    while end is None or position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, atom = int.from_bytes(header[:4], "big"), header[4:]
+        start = position + 8
+        if size == 1:
+            extended = f.read(8)
+            if len(extended) < 8:
+                return
+            size, start = int.from_bytes(extended, "big"), position + 16
+        elif size == 0:
+            #Runs to the end of its parent; only ever the last atom
+            if end is None:
+                end = f.seek(0, io.SEEK_END)
+            yield atom, start, end
+            return
+        if size < start - position:
+            raise ValueError("corrupt MP4 atom")
+        yield atom, start, position + size
+        position += size
+
+#Descends through nested atoms; returns (data start, end) of the last one in path, or None when it is missing
+def find_atom(f, path):
+    end = None
+    for name in path:
+        for atom, start, end in iter_atoms(f, end):
+            if atom == name:
+                break
+        else:
+            return None
+        if atom == b"meta" and f.read(8)[4:8] != b"hdlr":
+            #ISO meta atoms carry a version and flags before their children; QuickTime ones do not
+            start += 4
+        f.seek(start)
+    return start, end
+
+#Reads the child atoms of one ilst item into {type: bytes after the header}, keeping the first of each
+def read_mp4_item(f, end):
+    children = {}
+    for atom, start, stop in iter_atoms(f, end):
+        if atom not in children:
+            children[atom] = f.read(stop - start)
+    return children
+
+#Playing time from moov/mvhd: a time scale and a duration in its units, 32-bit in version 0 and 64-bit in version 1
+def read_mp4_duration(f):
+    f.seek(0)
+    found = find_atom(f, (b"moov", b"mvhd"))
+    if found is None:
+        return None
+    data = f.read(32)
+    if data[:1] == b"\x01":
+        scale, length = int.from_bytes(data[20:24], "big"), int.from_bytes(data[24:32], "big")
+    else:
+        scale, length = int.from_bytes(data[12:16], "big"), int.from_bytes(data[16:20], "big")
+    return length / scale if scale and length else None
+
+#ilst items holding Sortify fields; freeform "----" items are matched by their name child
+MP4_ITEMS = {b"\xa9ART", b"\xa9gen", b"gnre", b"tmpo", b"----"}
+MP4_KEY_NAMES = ("initialkey", "key")
+
+#Walks moov/udta/meta/ilst and reads only the items Sortify uses, seeking past covr artwork, the sample
+#tables and the audio itself; mvhd beside them gives the playing time
+@register_reader(".m4a", ".mp4")
+def read_mp4_tags(f):
+    fields = {}
+    duration = read_mp4_duration(f)
+    if duration:
+        fields["Duration"] = duration
+    f.seek(0)
+    found = find_atom(f, (b"moov", b"udta", b"meta", b"ilst"))
+    if found is None:
+        return fields
+    values = {}
+    keys = {}
+    for atom, start, stop in iter_atoms(f, found[1]):
+        if atom not in MP4_ITEMS or atom in values:
+            continue
+        children = read_mp4_item(f, stop)
+        #A data atom holds a version/type word and a locale word before the value
+        value = children.get(b"data", b"")[8:]
+        if atom == b"----":
+            name = children.get(b"name", b"")[4:].decode("utf-8", "replace").lower()
+            if children.get(b"mean", b"")[4:] == b"com.apple.iTunes" and name in MP4_KEY_NAMES:
+                keys.setdefault(name, value)
+        else:
+            values[atom] = value
+    if values.get(b"\xa9ART"):
+        fields["Artist"] = values[b"\xa9ART"].decode("utf-8", "replace")
+    if values.get(b"\xa9gen"):
+        fields["Genre"] = values[b"\xa9gen"].decode("utf-8", "replace")
+    elif values.get(b"gnre"):
+        #Old-style genre: a 1-based ID3v1 genre number
+        number = int.from_bytes(values[b"gnre"][:2], "big")
+        if 0 < number <= len(TCON.GENRES):
+            fields["Genre"] = TCON.GENRES[number - 1]
+    if values.get(b"tmpo"):
+        bpm = int.from_bytes(values[b"tmpo"], "big")
+        if bpm:
+            fields["BPM"] = float(bpm)
+    for name in MP4_KEY_NAMES:
+        key = keys.get(name, b"").decode("utf-8", "replace").strip()
+        if key:
+            fields["Key"] = key
+            break
+    return fields
+
+@register_reader(".ogg", ".oga", ".opus")
+def read_ogg_tags(f):
+    #mutagen.File picks Vorbis, Opus or FLAC-in-Ogg from the stream header
+    from mutagen import File
+    audio = File(f)
+    if audio is None:
+        raise ValueError("not an Ogg file")
+    comments = {}
+    for key, value in audio.tags or []:
+        comments.setdefault(key.lower(), value)
+    fields = vorbis_fields(comments)
+    if audio.info.length:
+        fields["Duration"] = audio.info.length
+    return fields
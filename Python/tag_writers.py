@@ -0,0 +1,131 @@
+import os
+
+from Python.profiling import NULL_PROFILER
+from Python.tag_readers import read_tags
+
+#Tag writers by file extension; each stores any of BPM and Key given in values
+TAG_WRITERS = {}
+
+#Registers a writer function for one or more file extensions
+def register_writer(*extensions):
+    def decorator(writer):
+        for extension in extensions:
+            TAG_WRITERS[extension.lower()] = writer
+        return writer
+    return decorator
+
+#Returns the writer for a file, or None for formats Sortify cannot tag
+def writer_for(file_path):
+    return TAG_WRITERS.get(os.path.splitext(file_path)[1].lower())
+
+#Adds BPM (TBPM + TXXX:BPM) and key (TKEY) frames to an ID3 tag object
+def set_id3_values(tags, values):
+    from mutagen.id3 import TBPM, TKEY, TXXX
+    if "BPM" in values:
+        tags.setall("TBPM", [TBPM(encoding=3, text=[str(int(round(values["BPM"])))])])
+        tags.add(TXXX(encoding=3, desc="BPM", text=[f"{values['BPM']:g}"]))
+    if "Key" in values:
+        tags.setall("TKEY", [TKEY(encoding=3, text=[values["Key"]])])
+
+@register_writer(".mp3")
+def write_mp3_tags(file_path, values):
+    from mutagen.id3 import ID3, ID3NoHeaderError
+    try:
+        tags = ID3(file_path)
+    except ID3NoHeaderError:
+        tags = ID3()
+    set_id3_values(tags, values)
+    tags.save(file_path)
+
+#WAV and AIFF keep their ID3 tag in a chunk; mutagen rewrites just that chunk
+@register_writer(".wav", ".aiff", ".aif")
+def write_chunk_id3_tags(file_path, values):
+    if file_path.lower().endswith(".wav"):
+        from mutagen.wave import WAVE as Container
+    else:
+        from mutagen.aiff import AIFF as Container
+    audio = Container(file_path)
+    if audio.tags is None:
+        audio.add_tags()
+    set_id3_values(audio.tags, values)
+    audio.save()
+
+@register_writer(".flac", ".ogg", ".oga", ".opus")
+def write_vorbis_tags(file_path, values):
+    from mutagen import File
+    audio = File(file_path)
+    if audio.tags is None:
+        audio.add_tags()
+    if "BPM" in values:
+        audio.tags["BPM"] = [f"{values['BPM']:g}"]
+    if "Key" in values:
+        audio.tags["INITIALKEY"] = [values["Key"]]
+    audio.save()
+
+@register_writer(".m4a", ".mp4")
+def write_mp4_tags(file_path, values):
+    from mutagen.mp4 import MP4, MP4FreeForm
+    audio = MP4(file_path)
+    if audio.tags is None:
+        audio.add_tags()
+    if "BPM" in values:
+        audio.tags["tmpo"] = [int(round(values["BPM"]))]
+    if "Key" in values:
+        audio.tags["----:com.apple.iTunes:initialkey"] = [MP4FreeForm(values["Key"].encode("utf-8"))]
+    audio.save()
+
+#Drops values the file already stores, so unchanged files are never rewritten
+def changed_values(file_path, values):
+    try:
+        stored = read_tags(file_path) or {}
+    except Exception:
+        stored = {}
+    changed = {}
+    if "BPM" in values and (stored.get("BPM") is None or abs(stored["BPM"] - values["BPM"]) >= 0.01):
+        changed["BPM"] = values["BPM"]
+    if "Key" in values and stored.get("Key") != values["Key"]:
+        changed["Key"] = values["Key"]
+    return changed
+
+class WriteBackQueue:
+    #Collects detected BPM/key per file during analysis and writes each file at most once afterwards
+    #pending starts the queue with values collected earlier, such as a sort plan's tags
+    def __init__(self, pending=None):
+        self.pending = dict(pending or {})
+
+    def add(self, file_path, values):
+        if writer_for(file_path) is not None and values:
+            self.pending.setdefault(file_path, {}).update(values)
+
+    def __len__(self):
+        return len(self.pending)
+
+    #Returns the queued values and empties the queue, for a sort plan to carry until it is applied
+    def take(self):
+        pending, self.pending = self.pending, {}
+        return pending
+
+    #Writes every queued file; moved maps queued paths to where the files live now
+    #on_written(path) runs after each successful write, on_error(path, error) after each failure
+    def flush(self, moved=None, on_written=None, on_error=None, profiler=NULL_PROFILER):
+        result = {"tags_written": 0, "tags_unchanged": 0, "tag_errors": 0}
+        pending, self.pending = self.pending, {}
+        for file_path, values in pending.items():
+            current_path = (moved or {}).get(file_path, file_path)
+            try:
+                with profiler.span("tag_compare", file_path):
+                    changed = changed_values(current_path, values)
+                if not changed:
+                    result["tags_unchanged"] += 1
+                    continue
+                with profiler.span("tag_write", file_path):
+                    writer_for(current_path)(current_path, changed)
+            except Exception as e:
+                result["tag_errors"] += 1
+                if on_error:
+                    on_error(current_path, str(e))
+                continue
+            result["tags_written"] += 1
+            if on_written:
+                on_written(current_path)
+        return result
@@ -1,22 +1,132 @@
 import os
+import queue
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+MUSIC_EXTENSIONS = (".mp3", ".wav", ".flac", ".aiff", ".aif", ".m4a", ".mp4", ".ogg", ".oga", ".opus")
+
+#Folders that never hold a library's music: OS/NAS housekeeping and Sortify's own journal
+SYSTEM_DIRS = {"$recycle.bin", "system volume information", "@eadir", "#recycle", "__macosx", "lost+found"}
+
+#Link views live here under the library root; hardlinks look like real files, so scans must not enter it
+VIEWS_DIR = "Sortify Views"
+
+#True for hidden folders, OS/NAS housekeeping folders and link views the scanner should not enter
+def is_skipped_dir(name):
+    return name.startswith(".") or name.lower() in SYSTEM_DIRS or name == VIEWS_DIR
+
+#True for files with a music extension, ignoring macOS "._" resource-fork companions
+def is_music_file(name, extensions=MUSIC_EXTENSIONS):
+    return name.lower().endswith(extensions) and not name.startswith("._")
+
+#Lazily yields music files under folder as they are found, so work can start before the scan ends
+def iter_music_files(folder, extensions=MUSIC_EXTENSIONS, follow_symlinks=False, skip_hidden=True):
+    extensions = tuple(ext.lower() for ext in extensions)
+    visited = set()
+    pending = [folder]
+    while pending:
+        directory = pending.pop()
+        try:
+            if follow_symlinks:
+                #Symlinked folders can form loops, so each real directory is only entered once
+                st = os.stat(directory)
+                if (st.st_dev, st.st_ino) in visited:
+                    continue
+                visited.add((st.st_dev, st.st_ino))
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        subdirs = []
+        with entries:
+            for entry in entries:
+                name = entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        if skip_hidden and is_skipped_dir(name):
+                            continue
+                        subdirs.append(entry.path)
+                    elif name.lower().endswith(extensions) and entry.is_file(follow_symlinks=follow_symlinks):
+                        if not (skip_hidden and name.startswith("._")):
+                            yield entry.path
+                except OSError:
+                    continue
+        pending.extend(reversed(subdirs))
 
 #Recursively finds all music files in the selected folder
 def scan_folder(folder):
-    music_files = []
-    for root, _, files in os.walk(folder):
-        for file in files:
-            if file.lower().endswith((".mp3", ".wav", ".flac", ".aiff")):
-                music_files.append(os.path.join(root, file))
-    return music_files
-
-#Removes all empty folders from the selected root
-def delete_empty_folders(folder):
-    for root, dirs, _ in os.walk(folder, topdown=False):
-        for dir_name in dirs:
-            dir_path = os.path.join(root, dir_name)
-            if not os.listdir(dir_path):
-                os.rmdir(dir_path)
+    return list(iter_music_files(folder))
+
+class BackgroundScan:
+    #Runs a file iterator on a helper thread and hands files over as they are discovered
+    def __init__(self, files):
+        self.discovered = 0
+        self.finished = False
+        self._error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(files,), daemon=True)
+        self._thread.start()
+
+    def _run(self, files):
+        try:
+            for file_path in files:
+                self.discovered += 1
+                self._queue.put(file_path)
+        except Exception as e:
+            self._error = e
+        finally:
+            self.finished = True
+            self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            file_path = self._queue.get()
+            if file_path is None:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield file_path
+
+#Waits for at least one of the pending futures and yields (item, result) for every finished one
+def collect_finished(pending):
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        yield pending.pop(future), future.result()
+
+#Calls func on each item from a pool of threads and yields (item, result) in the order they finish
+#At most concurrency calls are in flight, so a long scan is consumed as it goes rather than queued up front;
+#with concurrency 1 everything runs on the calling thread
+def map_concurrent(func, items, concurrency):
+    if concurrency <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = {}
+        try:
+            for item in items:
+                pending[pool.submit(func, item)] = item
+                if len(pending) >= concurrency:
+                    yield from collect_finished(pending)
+            while pending:
+                yield from collect_finished(pending)
+        finally:
+            for future in pending:
+                future.cancel()
+
+#Removes the given folders, and then their parents, once they are empty, never going above root
+def prune_empty_dirs(directories, root):
+    root = os.path.abspath(root)
+    for directory in sorted(set(directories), key=lambda d: d.count(os.sep), reverse=True):
+        directory = os.path.abspath(directory)
+        while directory != root and directory.startswith(root + os.sep):
+            try:
+                os.rmdir(directory)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
 
 #Replaces some characters in filenames
 def sanitize_filename(filename):
@@ -0,0 +1,127 @@
+import json
+import os
+
+from Python.utils import VIEWS_DIR, prune_empty_dirs, sanitize_filename
+
+VIEW_MANIFEST_DIR = os.path.join(".sortify", "views")
+LINK_KINDS = ("symlink", "hardlink")
+
+#Windows only allows symlinks with developer mode or admin rights, hardlinks always work on NTFS
+DEFAULT_LINK_KIND = "hardlink" if os.name == "nt" else "symlink"
+
+#Folder name of a view, e.g. "Genre - BPM Range"
+def view_name(sort_order):
+    return " - ".join(sort_order)
+
+def view_root(folder_path, sort_order):
+    return os.path.join(folder_path, VIEWS_DIR, view_name(sort_order))
+
+def manifest_path(folder_path, sort_order):
+    return os.path.join(folder_path, VIEW_MANIFEST_DIR, f"{view_name(sort_order)}.json")
+
+#Reads what a view looked like after its last update; a missing or unreadable manifest is an empty view
+def load_manifest(folder_path, sort_order):
+    try:
+        with open(manifest_path(folder_path, sort_order), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"sort_order": list(sort_order), "link": None, "links": {}}
+
+#Writes the manifest through a temporary file so a crash never leaves it half written
+def save_manifest(folder_path, sort_order, link_kind, links):
+    path = manifest_path(folder_path, sort_order)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"sort_order": list(sort_order), "link": link_kind, "links": links}, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+#Returns the sort orders of every view built in a library so far
+def find_views(folder_path):
+    directory = os.path.join(folder_path, VIEW_MANIFEST_DIR)
+    if not os.path.isdir(directory):
+        return []
+    layouts = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    layouts.append(json.load(f)["sort_order"])
+            except (OSError, ValueError, KeyError):
+                continue
+    return layouts
+
+#Maps each link path (relative to the view root) to its source file, given (source, folder) pairs
+#Sources are taken in path order, so clashing names get the same " (2)" suffixes on every run
+def desired_links(entries):
+    links = {}
+    for source, folder in sorted(entries):
+        stem, ext = os.path.splitext(sanitize_filename(os.path.basename(source)))
+        relative = os.path.join(folder, stem + ext)
+        n = 2
+        while relative in links:
+            relative = os.path.join(folder, f"{stem} ({n}){ext}")
+            n += 1
+        links[relative] = source
+    return links
+
+def make_link(source, link, link_kind):
+    os.makedirs(os.path.dirname(link), exist_ok=True)
+    if link_kind == "hardlink":
+        os.link(source, link)
+    else:
+        #Relative targets keep the view working when the whole library is moved or mounted elsewhere
+        os.symlink(os.path.relpath(source, os.path.dirname(link)), link)
+
+def remove_link(link):
+    if os.path.islink(link) or os.path.isfile(link):
+        os.remove(link)
+
+#Brings one view in line with entries, touching only links whose file or folder changed since the last update
+#Returns counts of links added, removed and kept, and of links that could not be made
+def update_view(folder_path, sort_order, entries, link_kind=DEFAULT_LINK_KIND, on_progress=None):
+    on_progress = on_progress or (lambda event: None)
+    root = view_root(folder_path, sort_order)
+    manifest = load_manifest(folder_path, sort_order)
+    #Switching between symlinks and hardlinks replaces every link
+    previous = manifest["links"] if manifest["link"] == link_kind else {}
+    stale = manifest["links"] if manifest["link"] != link_kind else {}
+    wanted = desired_links(entries)
+    summary = {"links_added": 0, "links_removed": 0, "links_kept": 0, "link_errors": 0}
+    touched = set()
+    links = {}
+
+    for relative, source in list(previous.items()) + list(stale.items()):
+        if relative in previous and wanted.get(relative) == source:
+            continue
+        link = os.path.join(root, relative)
+        try:
+            remove_link(link)
+        except OSError:
+            pass
+        touched.add(os.path.dirname(link))
+        summary["links_removed"] += 1
+        on_progress({"event": "unlinked", "file": source, "filename": os.path.basename(relative),
+                     "folder": os.path.dirname(relative), "dest": link})
+
+    for done, (relative, source) in enumerate(wanted.items(), 1):
+        link = os.path.join(root, relative)
+        if previous.get(relative) == source and os.path.lexists(link):
+            links[relative] = source
+            summary["links_kept"] += 1
+            continue
+        event = {"done": done, "discovered": len(wanted), "file": source, "filename": os.path.basename(relative),
+                 "folder": os.path.dirname(relative), "dest": link}
+        try:
+            remove_link(link)
+            make_link(source, link, link_kind)
+        except OSError as e:
+            summary["link_errors"] += 1
+            on_progress(dict(event, event="link_failed", error=str(e)))
+            continue
+        links[relative] = source
+        summary["links_added"] += 1
+        on_progress(dict(event, event="linked"))
+
+    save_manifest(folder_path, sort_order, link_kind, links)
+    prune_empty_dirs(touched, root)
+    return summary
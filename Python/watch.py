@@ -0,0 +1,158 @@
+import os
+import time
+
+from Python.utils import is_music_file, is_skipped_dir
+
+#A new file is only sorted once its size and mtime have not changed for this long
+SETTLE_SECONDS = 2.0
+POLL_INTERVAL = 2.0
+MAX_BATCH = 200
+
+#Files rewritten in place (retagged, re-exported under the same name) leave their directory's mtime alone
+#Catching them means stat'ing every known file, which costs as much as the library is large, so it is opt-in;
+#this is the suggested cadence when it is switched on
+FILE_CHECK_INTERVAL = 30.0
+
+def file_signature(st):
+    return st.st_size, st.st_mtime_ns
+
+class FolderWatcher:
+    #Remembers every directory's mtime and every music file's signature under folder
+    #Only directories whose mtime changed are re-listed on a poll, so cost does not grow with library size
+    #With file_check_interval, known files are also stat'ed every that many seconds to catch ones changed in place
+    def __init__(self, folder, settle_seconds=SETTLE_SECONDS, max_batch=MAX_BATCH, file_check_interval=None):
+        self.folder = folder
+        self.settle_seconds = settle_seconds
+        self.max_batch = max_batch
+        self.file_check_interval = file_check_interval
+        self.last_file_check = time.monotonic()
+        self.dirs = {}
+        self.dir_files = {}
+        self.files = {}
+        self.pending = {}
+        self.ready = []
+        self.rescan(folder, report=False)
+
+    #Lists directory and any subfolders not seen before; returns new or changed music files
+    def rescan(self, directory, report=True):
+        found = []
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                st = os.stat(current)
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                self.forget(current)
+                continue
+            self.dirs[current] = st.st_mtime_ns
+            present = set()
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not is_skipped_dir(entry.name) and entry.path not in self.dirs:
+                            stack.append(entry.path)
+                    elif is_music_file(entry.name) and entry.is_file(follow_symlinks=False):
+                        present.add(entry.path)
+                        signature = file_signature(entry.stat(follow_symlinks=False))
+                        if self.files.get(entry.path) != signature:
+                            self.files[entry.path] = signature
+                            if report:
+                                found.append(entry.path)
+                except OSError:
+                    continue
+            for path in self.dir_files.get(current, set()) - present:
+                self.files.pop(path, None)
+                self.pending.pop(path, None)
+            self.dir_files[current] = present
+        return found
+
+    #Drops a vanished directory and everything remembered below it
+    def forget(self, directory):
+        prefix = directory + os.sep
+        for known in [d for d in self.dirs if d == directory or d.startswith(prefix)]:
+            del self.dirs[known]
+            for path in self.dir_files.pop(known, set()):
+                self.files.pop(path, None)
+                self.pending.pop(path, None)
+
+    #Records files Sortify itself just moved so they are not reported as new arrivals
+    def mark_known(self, paths):
+        for path in paths:
+            try:
+                self.files[path] = file_signature(os.stat(path))
+            except OSError:
+                continue
+            self.dir_files.setdefault(os.path.dirname(path), set()).add(path)
+            self.pending.pop(path, None)
+
+    #Returns known files whose size or mtime changed although their directory did not
+    def changed_in_place(self):
+        changed = []
+        for path, signature in list(self.files.items()):
+            if path in self.pending:
+                continue
+            try:
+                current = file_signature(os.stat(path))
+            except OSError:
+                #A vanished file is dropped when its directory is re-listed
+                continue
+            if current != signature:
+                self.files[path] = current
+                changed.append(path)
+        return changed
+
+    #Returns the next batch of new or changed files that have finished writing, or [] when none is ready yet
+    def poll(self, now=None):
+        now = time.monotonic() if now is None else now
+        for directory, mtime in list(self.dirs.items()):
+            if directory not in self.dirs:
+                continue
+            try:
+                changed = os.stat(directory).st_mtime_ns != mtime
+            except OSError:
+                self.forget(directory)
+                continue
+            if changed:
+                for path in self.rescan(directory):
+                    self.pending[path] = (self.files[path], now)
+        if self.file_check_interval is not None and now - self.last_file_check >= self.file_check_interval:
+            self.last_file_check = now
+            for path in self.changed_in_place():
+                self.pending[path] = (self.files[path], now)
+
+        for path, (signature, since) in list(self.pending.items()):
+            try:
+                current = file_signature(os.stat(path))
+            except OSError:
+                del self.pending[path]
+                continue
+            if current != signature:
+                self.files[path] = current
+                self.pending[path] = (current, now)
+            elif now - since >= self.settle_seconds:
+                del self.pending[path]
+                self.ready.append(path)
+
+        #Arrivals are batched: flush once nothing is still being written, or the batch is full
+        if self.ready and (not self.pending or len(self.ready) >= self.max_batch):
+            batch, self.ready = self.ready[:self.max_batch], self.ready[self.max_batch:]
+            return batch
+        return []
+
+#Sorts new arrivals batch by batch through engine until should_stop() returns True
+#on_batch(plan, summary) is called after each batch has been applied; file_check_interval, see FolderWatcher
+def watch_folder(engine, interval=POLL_INTERVAL, settle_seconds=SETTLE_SECONDS, on_batch=None, should_stop=None,
+                 file_check_interval=None):
+    watcher = FolderWatcher(engine.folder_path, settle_seconds, file_check_interval=file_check_interval)
+    while not (should_stop and should_stop()):
+        batch = watcher.poll()
+        if batch:
+            plan, summary = engine.run(batch, preview=False)
+            #Moved files and files that stayed put may both have had tags written back, which is not a change
+            watcher.mark_known([entry.destination for entry in plan.entries] + batch)
+            if on_batch:
+                on_batch(plan, summary)
+            continue
+        time.sleep(interval)
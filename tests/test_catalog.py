@@ -0,0 +1,70 @@
+import math
+
+from Python.catalog import UNKNOWN_ARTIST, UNKNOWN_GENRE, TrackCatalog, bpm_range_label
+from Python.genres import GenreNormalizer
+
+def test_bpm_range_label():
+    assert bpm_range_label(120.0) == "120-129 BPM"
+    assert bpm_range_label(129.4) == "120-129 BPM"
+    #Binned as the integer BPM tag written back for it will read
+    assert bpm_range_label(129.6) == "130-139 BPM"
+    assert bpm_range_label(87.5, width=5) == "85-89 BPM"
+
+#Grows past its starting capacity and aggregates only live rows
+def test_counts_and_totals():
+    catalog = TrackCatalog(capacity=2)
+    catalog.add("/m/a.mp3", {"Artist": "A", "Genre": "House", "BPM": 124.0, "Key": "Am", "Duration": 300.0}, 10)
+    catalog.add("/m/b.mp3", {"Artist": "A", "Genre": "House", "BPM": 128.5, "Key": "8A"}, 20)
+    catalog.add("/m/c.mp3", {"Genre": "Techno", "BPM": 131.0, "Key": "C", "Duration": 60.0}, 30)
+    catalog.add("/m/d.mp3", {"Artist": "B"}, 40)
+    catalog.add("/m/e.mp3", {"Artist": "B", "Genre": "Techno"}, 50)
+    assert len(catalog) == 5
+    assert catalog.artist_counts() == {"A": 2, "B": 2, UNKNOWN_ARTIST: 1}
+    assert catalog.genre_counts() == {"House": 2, "Techno": 2, UNKNOWN_GENRE: 1}
+    #"Am" and "8A" are the same key
+    assert catalog.key_counts() == {"8A": 2, "8B": 1, "Unknown Key": 2}
+    assert catalog.key_counts("standard")["A minor"] == 2
+    assert catalog.bpm_histogram() == {"120-129 BPM": 2, "130-139 BPM": 1}
+    assert catalog.total_size() == 150
+    assert catalog.total_duration() == (360.0, 2)
+
+#Removed rows drop out of every aggregate and are reused by the next add
+def test_remove_and_reuse():
+    catalog = TrackCatalog()
+    catalog.add("/m/a.mp3", {"Genre": "House", "BPM": 124.0}, 10)
+    catalog.add("/m/b.mp3", {"Genre": "Techno", "BPM": 133.0}, 20)
+    row = catalog.rows["/m/a.mp3"]
+    catalog.remove("/m/a.mp3")
+    assert "/m/a.mp3" not in catalog
+    assert catalog.genre_counts() == {"Techno": 1}
+    assert catalog.total_size() == 20
+    assert catalog.add("/m/c.mp3", {"Genre": "Disco"}, 5) == row
+    assert catalog.genre_counts() == {"Techno": 1, "Disco": 1}
+
+#Adding a known path again updates its row instead of adding another
+def test_update_in_place():
+    catalog = TrackCatalog()
+    row = catalog.add("/m/a.mp3", {"Genre": "House"}, 10, 111)
+    assert catalog.add("/m/a.mp3", {"Genre": "Techno", "BPM": 140.0}, 12, 222) == row
+    assert len(catalog) == 1
+    assert catalog.genre_name(row) == "Techno"
+    assert catalog.signature("/m/a.mp3") == (12, 222)
+    assert catalog.signature("/m/missing.mp3") is None
+
+def test_missing_values():
+    catalog = TrackCatalog()
+    row = catalog.add("/m/a.mp3", {})
+    assert catalog.artist_name(row) is None
+    assert math.isnan(catalog.bpm[row])
+    assert catalog.bpm_histogram() == {}
+    assert catalog.total_duration() == (0.0, 0)
+
+#Aliases and multi-genre tags count under the folder genre the sort would use
+def test_genre_counts_normalized():
+    catalog = TrackCatalog()
+    catalog.add("/m/a.mp3", {"Genre": "DnB"})
+    catalog.add("/m/b.mp3", {"Genre": "Drum & Bass / Jungle"})
+    catalog.add("/m/c.mp3", {"Genre": "deep house"})
+    catalog.add("/m/d.mp3", {})
+    normalize = GenreNormalizer(user_aliases={}).normalize
+    assert catalog.genre_counts(normalize) == {"Drum & Bass": 2, "House": 1, UNKNOWN_GENRE: 1}
@@ -0,0 +1,40 @@
+import os
+
+from Python import checkpoint as checkpoints
+from Python.checkpoint import JobCheckpoint, find_checkpoints
+from Python.options import SortOptions
+
+def make_track(folder):
+    path = os.path.join(folder, "a.mp3")
+    with open(path, "wb") as f:
+        f.write(b"a")
+    return path
+
+def test_sort_checkpoint_resumes_and_leaves_no_folders(tmp_path):
+    folder = str(tmp_path)
+    track = make_track(folder)
+    job = JobCheckpoint.create(folder, SortOptions(["Genre"], bpm_enabled=True), preview=False)
+    job.record(track, {"Genre": "House", "BPM": 124.0})
+    job.close()
+    found = find_checkpoints(folder)
+    assert [saved.path for saved in found] == [job.path]
+    assert found[0].resume_options(SortOptions()).bpm_enabled
+    assert found[0].lookup(track)["Genre"] == "House"
+    found[0].discard()
+    assert find_checkpoints(folder) == []
+    assert os.listdir(folder) == ["a.mp3"]
+
+#A preview keeps its checkpoint in the config directory, never in the library
+def test_preview_checkpoint_stays_out_of_the_library(tmp_path, monkeypatch):
+    config = tmp_path / "config"
+    config.mkdir()
+    monkeypatch.setattr(checkpoints, "default_config_dir", lambda: str(config))
+    folder = str(tmp_path / "library")
+    os.mkdir(folder)
+    make_track(folder)
+    job = JobCheckpoint.create(folder, SortOptions(["Genre"]), preview=True)
+    job.close()
+    assert os.listdir(folder) == ["a.mp3"]
+    assert [saved.path for saved in find_checkpoints(folder)] == [job.path]
+    job.discard()
+    assert os.listdir(config) == []
@@ -0,0 +1,57 @@
+import os
+
+from Python.collisions import ContentHasher, resolve_collisions
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+#Different files planned onto one name get " (2)" style suffixes, in source path order
+def test_clashing_names_get_suffixes(tmp_path):
+    a = write(tmp_path / "a" / "x.mp3", b"first")
+    b = write(tmp_path / "b" / "x.mp3", b"second")
+    c = write(tmp_path / "c" / "x.mp3", b"third")
+    dest = str(tmp_path / "House" / "x.mp3")
+    destinations, identical = resolve_collisions([(c, dest), (a, dest), (b, dest)], ContentHasher())
+    assert destinations == {a: dest, b: str(tmp_path / "House" / "x (2).mp3"),
+                            c: str(tmp_path / "House" / "x (3).mp3")}
+    assert identical == {}
+
+#Names differing only in case clash too, since many music drives are case-insensitive
+def test_case_insensitive_clash(tmp_path):
+    a = write(tmp_path / "a" / "Song.mp3", b"one")
+    b = write(tmp_path / "b" / "song.mp3", b"two")
+    destinations, _ = resolve_collisions([(a, str(tmp_path / "Pop" / "Song.mp3")),
+                                          (b, str(tmp_path / "Pop" / "song.mp3"))], ContentHasher())
+    assert destinations[b] == str(tmp_path / "Pop" / "song (2).mp3")
+
+#A different file already at the destination is never overwritten
+def test_existing_file_is_kept(tmp_path):
+    existing = write(tmp_path / "Rock" / "x.mp3", b"already here")
+    source = write(tmp_path / "in" / "x.mp3", b"new arrival!")
+    destinations, identical = resolve_collisions([(source, existing)], ContentHasher())
+    assert destinations == {source: str(tmp_path / "Rock" / "x (2).mp3")}
+    assert identical == {}
+
+#A source whose bytes already sit at its destination, on disk or as another planned source, is not moved
+def test_identical_bytes_are_not_moved(tmp_path):
+    existing = write(tmp_path / "Rock" / "x.mp3", b"same bytes")
+    copy = write(tmp_path / "in" / "x.mp3", b"same bytes")
+    a = write(tmp_path / "a" / "y.mp3", b"twin")
+    b = write(tmp_path / "b" / "y.mp3", b"twin")
+    dest = str(tmp_path / "Rock" / "y.mp3")
+    destinations, identical = resolve_collisions([(copy, existing), (a, dest), (b, dest)], ContentHasher())
+    assert destinations == {a: dest}
+    assert identical == {copy: existing, b: a}
+
+def test_hasher_compares_head_tail_and_middle(tmp_path):
+    size = 512 * 1024
+    a = write(tmp_path / "a.bin", b"\0" * size)
+    b = write(tmp_path / "b.bin", b"\0" * (size // 2) + b"\1" + b"\0" * (size // 2 - 1))
+    c = write(tmp_path / "c.bin", b"\0" * size)
+    hasher = ContentHasher()
+    assert hasher.partial(a) == hasher.partial(b)
+    assert not hasher.identical(a, b)
+    assert hasher.identical(a, c)
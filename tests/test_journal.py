@@ -0,0 +1,82 @@
+import os
+
+from Python.journal import (JournalWriter, completed_moves, find_interrupted, find_undoable, read_journal, replay,
+                            journal_dir, make_all_dirs)
+
+#Creates small files under folder and returns the (source, destination) moves that sort them into Genre folders
+def make_library(folder, names=("a.mp3", "b.mp3", "c.mp3")):
+    moves = []
+    for n, name in enumerate(names):
+        src = os.path.join(folder, name)
+        with open(src, "wb") as f:
+            f.write(name.encode())
+        moves.append((src, os.path.join(folder, "House" if n % 2 else "Techno", name)))
+    return moves
+
+def test_replay_moves_every_file_and_commits(tmp_path):
+    folder = str(tmp_path)
+    moves = make_library(folder)
+    writer = JournalWriter.create(folder, "sort", moves)
+    results = list(replay(writer, writer.journal))
+    writer.close()
+    assert [error for _, _, _, error in results] == [None, None, None]
+    for src, dst in moves:
+        assert not os.path.exists(src) and os.path.exists(dst)
+    journal = read_journal(writer.path)
+    assert journal["closed"] == "commit"
+    assert journal["done"] == {0, 1, 2}
+    assert find_interrupted(folder) == []
+    assert find_undoable(folder)["path"] == writer.path
+
+#A move whose source has gone is reported and not recorded as done
+def test_missing_source_is_reported(tmp_path):
+    folder = str(tmp_path)
+    moves = make_library(folder)
+    os.remove(moves[1][0])
+    writer = JournalWriter.create(folder, "sort", moves)
+    results = list(replay(writer, writer.journal))
+    writer.close()
+    assert results[1][3] is not None
+    assert read_journal(writer.path)["done"] == {0, 2}
+
+#A crash between a rename and its "done" record leaves a journal whose moves the filesystem still accounts for
+def test_interrupted_journal(tmp_path):
+    folder = str(tmp_path)
+    moves = make_library(folder)
+    writer = JournalWriter.create(folder, "sort", moves)
+    next(replay(writer, writer.journal))
+    writer.suspend()
+    #Second move happened on disk but its record never made it; a torn line follows
+    os.makedirs(os.path.dirname(moves[1][1]), exist_ok=True)
+    os.replace(*moves[1])
+    with open(writer.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "do')
+    interrupted = find_interrupted(folder)
+    assert [journal["path"] for journal in interrupted] == [writer.path]
+    assert interrupted[0]["done"] == {0}
+    assert [seq for seq, _, _ in completed_moves(interrupted[0])] == [0, 1]
+    assert find_undoable(folder) is None
+
+def test_replay_stops_when_asked(tmp_path):
+    folder = str(tmp_path)
+    moves = make_library(folder)
+    writer = JournalWriter.create(folder, "sort", moves)
+    done = list(replay(writer, writer.journal, should_stop=lambda: os.path.exists(moves[0][1])))
+    writer.suspend()
+    assert len(done) == 1
+    assert os.path.exists(moves[1][0]) and os.path.exists(moves[2][0])
+
+#Journals live in the library's .sortify folder, which scans skip
+def test_journal_location(tmp_path):
+    writer = JournalWriter.create(str(tmp_path), "sort", [])
+    writer.close()
+    assert os.path.dirname(writer.path) == journal_dir(str(tmp_path))
+
+def test_make_all_dirs_reports_new_directories(tmp_path):
+    existing = tmp_path / "House"
+    existing.mkdir()
+    nested = str(tmp_path / "Techno" / "120-129 BPM")
+    ready, new = make_all_dirs([str(existing), nested, nested])
+    assert ready == {str(existing), nested}
+    assert new == {nested}
+    assert os.path.isdir(nested)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from Python.keys import (MAJOR_PROFILE, MINOR_PROFILE, UNKNOWN_KEY, camelot, classify_keys, format_key, key_label,
+                         open_key, parse_key, standard_name)
+
+#(key index, Camelot, Open Key, standard name); 0-11 are C..B major, 12-23 C..B minor
+KNOWN_KEYS = [
+    (0, "8B", "1d", "C major"),
+    (21, "8A", "1m", "A minor"),
+    (7, "9B", "2d", "G major"),
+    (16, "9A", "2m", "E minor"),
+    (5, "7B", "12d", "F major"),
+    (14, "7A", "12m", "D minor"),
+    (6, "2B", "7d", "F# major"),
+    (15, "2A", "7m", "D# minor"),
+    (11, "1B", "6d", "B major"),
+    (20, "1A", "6m", "G# minor"),
+]
+
+@pytest.mark.parametrize("index, camelot_name, open_key_name, standard", KNOWN_KEYS)
+def test_notations(index, camelot_name, open_key_name, standard):
+    assert camelot(index) == camelot_name
+    assert open_key(index) == open_key_name
+    assert standard_name(index) == standard
+
+#Every key read back from each notation it can be written in is the same key
+@pytest.mark.parametrize("index", range(24))
+def test_round_trip(index):
+    for name in (camelot(index), open_key(index), standard_name(index), key_label(index)):
+        assert parse_key(name) == index
+
+def test_every_notation_is_a_bijection():
+    for notation in (camelot, open_key, standard_name, key_label):
+        assert len({notation(index) for index in range(24)}) == 24
+
+@pytest.mark.parametrize("text, index", [
+    ("Am", 21), ("A minor", 21), ("a min", 21), ("08A", 21), ("8a", 21), ("1m", 21),
+    ("Ebm", 15), ("E♭m", 15), ("Bb", 10), ("C# major", 1), ("C♯", 1), ("12B", 4), ("12d", 5), ("6d", 11),
+])
+def test_parse_key_spellings(text, index):
+    assert parse_key(text) == index
+
+@pytest.mark.parametrize("text", ["", None, "H", "13A", "0B", "Unknown Key", "House"])
+def test_parse_key_rejects_non_keys(text):
+    assert parse_key(text) is None
+
+def test_format_key():
+    assert format_key("Am") == "8A"
+    assert format_key("8A", "open_key") == "1m"
+    assert format_key("1m", "standard") == "A minor"
+    assert format_key("not a key") == "not a key"
+    assert format_key(None) == UNKNOWN_KEY
+
+#A chroma vector shaped like a rotated key profile is classified as that key, all in one batch
+def test_classify_keys_batch():
+    expected = [0, 7, 12 + 9, 12 + 4]
+    chroma = [np.roll(MAJOR_PROFILE, 0), np.roll(MAJOR_PROFILE, 7), np.roll(MINOR_PROFILE, 9),
+              np.roll(MINOR_PROFILE, 4)]
+    indices, confidences = classify_keys(chroma)
+    assert indices.tolist() == expected
+    assert np.allclose(confidences, 1.0)
+
+#Flat or silent chroma matches no key well enough and comes back as -1
+def test_classify_keys_low_confidence():
+    indices, confidences = classify_keys([np.ones(12), np.zeros(12)])
+    assert indices.tolist() == [-1, -1]
+    assert (confidences < 0.5).all()
@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+#Peak RSS comes from getrusage, which Windows lacks
+pytest.importorskip("resource")
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("librosa", minversion="0.10")
+
+#Just past STREAM_MIN_SECONDS, so the file takes the streaming path without making the test slow
+MINUTES = 11
+SAMPLE_RATE = 48000
+TEMPO = 124.0
+#Decoding the whole file as float32 takes about 120 MB; streaming it should stay well below this
+BUDGET_MB = 64
+
+#Analyses the file in a fresh interpreter and prints its mode and peak RSS growth, so memory held by earlier
+#tests in this process does not hide the growth
+MEASURE = """
+import json, resource, sys
+from Python.metadata import analyze_audio
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+#Warms up librosa/numba so their one-off allocations are not billed to the analysis
+analyze_audio(sys.argv[1], ("BPM", "Key"), excerpt=(5.0, 1))
+baseline = peak_rss_mb()
+result = analyze_audio(sys.argv[1], ("BPM", "Key"))
+print(json.dumps({"mode": result["mode"], "bpm": result["BPM"], "growth_mb": peak_rss_mb() - baseline}))
+"""
+
+#Writes a long click track over an A tone one second at a time, so generating it stays cheap
+def write_synthetic_track(path, minutes, sr, bpm):
+    beat_every = int(sr * 60 / bpm)
+    click = np.hanning(int(sr * 0.01)).astype(np.float32)
+    t = np.arange(sr) / sr
+    with sf.SoundFile(path, "w", samplerate=sr, channels=1, subtype="PCM_16") as f:
+        for second in range(int(minutes * 60)):
+            offset = second * sr
+            block = 0.2 * np.sin(2 * np.pi * 440.0 * (t + second)).astype(np.float32)
+            for start in range(-offset % beat_every, sr, beat_every):
+                end = min(sr, start + len(click))
+                block[start:end] += click[:end - start]
+            f.write(block)
+
+def test_long_file_is_streamed_within_budget(tmp_path):
+    path = str(tmp_path / "long_mix.wav")
+    write_synthetic_track(path, MINUTES, SAMPLE_RATE, TEMPO)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    child = subprocess.run([sys.executable, "-c", MEASURE, path], cwd=root, capture_output=True, text=True,
+                           check=True)
+    report = json.loads(child.stdout.strip().splitlines()[-1])
+    assert report["mode"] == "stream"
+    assert report["growth_mb"] < BUDGET_MB
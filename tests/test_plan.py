@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from Python.plan import SortPlan
+
+from test_journal import make_library
+
+def make_plan(folder):
+    plan = SortPlan(folder, ["Genre"])
+    for src, dst in make_library(folder):
+        plan.add(src, dst, os.path.basename(os.path.dirname(dst)))
+    plan.tags[plan.entries[0].source] = {"BPM": 128.0, "Key": "8A"}
+    return plan
+
+def test_save_and_load_keep_tags(tmp_path):
+    plan = make_plan(str(tmp_path))
+    path = str(tmp_path / "plan.json")
+    plan.save(path)
+    loaded = SortPlan.load(path)
+    assert loaded.entries == plan.entries
+    assert loaded.tags == plan.tags
+
+#Tags travel in the plan and are written into the files where apply moved them
+def test_apply_writes_tags_after_the_moves(tmp_path):
+    engine = pytest.importorskip("Python.engine")
+    pytest.importorskip("mutagen")
+    from Python.tag_readers import read_tags
+    folder = str(tmp_path)
+    plan = make_plan(folder)
+    summary = engine.SortEngine(folder, engine.SortOptions(["Genre"])).apply(plan)
+    assert summary["moved"] == 3
+    assert summary["tags_written"] == 1
+    moved = plan.entries[0].destination
+    assert read_tags(moved)["BPM"] == 128.0
+    assert read_tags(moved)["Key"] == "8A"
+
+def test_apply_without_write_tags_leaves_files_alone(tmp_path):
+    engine = pytest.importorskip("Python.engine")
+    folder = str(tmp_path)
+    plan = make_plan(folder)
+    summary = engine.SortEngine(folder, engine.SortOptions(["Genre"], write_tags=False)).apply(plan)
+    assert summary["moved"] == 3
+    assert "tags_written" not in summary
+    with open(plan.entries[0].destination, "rb") as f:
+        assert f.read() == b"a.mp3"
+
+def test_directories(tmp_path):
+    folder = str(tmp_path)
+    plan = make_plan(folder)
+    assert plan.directories() == {os.path.join(folder, "House"), os.path.join(folder, "Techno")}
+
+#A destination folder made up front but left empty because its move failed is pruned again
+def test_apply_prunes_unused_new_directories(tmp_path):
+    engine = pytest.importorskip("Python.engine")
+    folder = str(tmp_path)
+    plan = make_plan(folder)
+    os.remove(plan.entries[1].source)
+    summary = engine.SortEngine(folder, engine.SortOptions(["Genre"], write_tags=False)).apply(plan)
+    assert summary["moved"] == 2 and summary["failed"] == 1
+    assert not os.path.exists(os.path.dirname(plan.entries[1].destination))
+    assert os.path.isdir(os.path.dirname(plan.entries[0].destination))
@@ -0,0 +1,67 @@
+import pytest
+
+#The feed formats events with the engine, which imports the audio analysis stack
+engine = pytest.importorskip("Python.engine")
+
+from Python import genres
+from Python.progress import ProgressFeed
+
+#One event of every kind the engine, the views and undo report while a worker runs
+#Per-file events carry a done count; run-wide notices such as tier and aliases_ignored do not
+FILE = {"file": "/lib/a.mp3", "filename": "a.mp3", "folder": "House", "dest": "/lib/House/a.mp3"}
+EVENTS = [
+    dict(FILE, event="planned", done=1, discovered=4),
+    dict(FILE, event="planned", done=2, discovered=4, decode_time=0.5, feature_time=0.25),
+    dict(FILE, event="skipped", done=3, discovered=4, stage="tags", error="bad header"),
+    dict(FILE, event="moved", done=1, discovered=4),
+    dict(FILE, event="failed", done=2, discovered=4, error="permission denied"),
+    dict(FILE, event="restored", done=1),
+    dict(FILE, event="duplicate", done=1, keeper="/lib/b.mp3"),
+    dict(FILE, event="identical", done=1, keeper="/lib/House/a.mp3"),
+    dict(FILE, event="renamed", done=1, dest="/lib/House/a (2).mp3"),
+    dict(FILE, event="tag_failed", done=1, error="read-only"),
+    dict(FILE, event="linked", done=1),
+    dict(FILE, event="link_failed", done=1, error="cross-device link"),
+    dict(FILE, event="read", done=1),
+    dict(FILE, event="unlinked"),
+    {"event": "tier", "placed": 3, "queued": 1},
+    {"event": "aliases_ignored", "error": "/config/genre_aliases.json: bad JSON"},
+]
+
+def test_every_status_kind_has_a_sample():
+    assert set(engine.EVENT_STATUS) <= {event["event"] for event in EVENTS}
+
+@pytest.mark.parametrize("event", EVENTS, ids=[event["event"] for event in EVENTS])
+def test_post_event_with_progress(event):
+    feed = ProgressFeed()
+    feed.post_event(event, with_progress=True)
+    entries, progress = feed.take()
+    assert entries == [(engine.event_status(event), engine.format_event(event))]
+    if "done" in event:
+        assert progress == (event["done"], event.get("discovered", event["done"]))
+    else:
+        assert progress is None
+
+def test_notice_keeps_last_progress():
+    feed = ProgressFeed()
+    feed.post_event(EVENTS[0], with_progress=True)
+    feed.post_event({"event": "tier", "placed": 1, "queued": 3}, with_progress=True)
+    entries, progress = feed.take()
+    assert len(entries) == 2
+    assert progress == (1, 4)
+    assert feed.take() == ([], None)
+
+def test_broken_alias_file_reaches_the_feed(tmp_path, monkeypatch):
+    config = tmp_path / "config"
+    config.mkdir()
+    (config / "genre_aliases.json").write_text("{not json", encoding="utf-8")
+    monkeypatch.setattr(genres, "default_config_dir", lambda: str(config))
+    monkeypatch.setattr(genres, "_default_normalizer", None)
+    feed = ProgressFeed()
+    sorter = engine.SortEngine(str(tmp_path), engine.SortOptions(["Genre"]),
+                               on_progress=lambda event: feed.post_event(event, with_progress=True))
+    sorter.run([], preview=True)
+    entries, progress = feed.take()
+    assert entries[0][0] == "error"
+    assert "genre_aliases.json" in entries[0][1]
+    assert progress is None
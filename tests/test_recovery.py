@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from Python.journal import JournalWriter, find_interrupted, find_undoable, read_journal, replay
+
+from test_journal import make_library
+
+#The engine imports the audio analysis stack, though undo and recovery never use it
+engine = pytest.importorskip("Python.engine")
+
+
+def interrupt_after_first_move(folder):
+    moves = make_library(folder)
+    writer = JournalWriter.create(folder, "sort", moves)
+    next(replay(writer, writer.journal))
+    writer.suspend()
+    return moves, writer.path
+
+def test_recover_rolls_forward(tmp_path):
+    folder = str(tmp_path)
+    moves, path = interrupt_after_first_move(folder)
+    assert engine.recover_interrupted(folder, roll_forward=True) == 1
+    for src, dst in moves:
+        assert not os.path.exists(src) and os.path.exists(dst)
+    assert read_journal(path)["closed"] == "commit"
+    assert find_interrupted(folder) == []
+
+def test_recover_rolls_back(tmp_path):
+    folder = str(tmp_path)
+    moves, path = interrupt_after_first_move(folder)
+    assert engine.recover_interrupted(folder, roll_forward=False) == 1
+    for src, dst in moves:
+        assert os.path.exists(src) and not os.path.exists(dst)
+    assert read_journal(path)["closed"] == "abort"
+    #Folders the interrupted sort created are removed again
+    assert not os.path.exists(os.path.dirname(moves[0][1]))
+
+def test_undo_last_sort(tmp_path):
+    folder = str(tmp_path)
+    moves = make_library(folder)
+    writer = JournalWriter.create(folder, "sort", moves)
+    list(replay(writer, writer.journal))
+    writer.close()
+    events = []
+    assert engine.undo_last_sort(folder, on_progress=events.append) == 3
+    for src, dst in moves:
+        assert os.path.exists(src) and not os.path.exists(dst)
+    assert [event["event"] for event in events] == ["restored"] * 3
+    #An undone sort cannot be undone twice
+    assert find_undoable(folder) is None
+    assert engine.undo_last_sort(folder) is None
@@ -0,0 +1,63 @@
+import struct
+import wave
+
+import pytest
+
+pytest.importorskip("mutagen")
+
+from Python.tag_readers import read_tags
+
+def atom(name, payload=b""):
+    return struct.pack(">I", 8 + len(payload)) + name + payload
+
+def chunk(name, payload, byteorder):
+    return name + len(payload).to_bytes(4, byteorder) + payload + b"\0" * (len(payload) & 1)
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+#Ten seconds of 44.1 kHz audio, tagged with an artist
+def test_flac_duration_from_streaminfo(tmp_path):
+    packed = (44100 << 44) | (1 << 41) | (15 << 36) | 441000
+    streaminfo = b"\0" * 10 + packed.to_bytes(8, "big") + b"\0" * 16
+    comment = struct.pack("<I", 0) + struct.pack("<I", 1) + struct.pack("<I", 8) + b"artist=A"
+    data = b"fLaC" + b"\x00" + len(streaminfo).to_bytes(3, "big") + streaminfo
+    data += b"\x84" + len(comment).to_bytes(3, "big") + comment
+    fields = read_tags(write(tmp_path / "a.flac", data))
+    assert fields == {"Artist": "A", "Duration": 10.0}
+
+def test_wav_duration_from_format_and_data_size(tmp_path):
+    path = str(tmp_path / "a.wav")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(b"\0" * 8000 * 4 * 3)
+    assert read_tags(path)["Duration"] == 3.0
+
+def test_aiff_duration_from_comm(tmp_path):
+    #8000 Hz as an 80-bit extended float: 8000 = 2^12 * 1.953125
+    rate = (16383 + 12).to_bytes(2, "big") + (8000 << (63 - 12)).to_bytes(8, "big")
+    comm = struct.pack(">hIh", 1, 16000, 16) + rate
+    body = b"AIFF" + chunk(b"COMM", comm, "big") + chunk(b"SSND", b"\0" * 8 + b"\0" * 32000, "big")
+    fields = read_tags(write(tmp_path / "a.aiff", b"FORM" + len(body).to_bytes(4, "big") + body))
+    assert fields["Duration"] == 2.0
+
+def test_mp4_duration_from_mvhd(tmp_path):
+    mvhd = atom(b"mvhd", b"\0" * 12 + struct.pack(">II", 600, 3000) + b"\0" * 80)
+    item = atom(b"\xa9ART", atom(b"data", b"\0\0\0\x01\0\0\0\0" + b"Artist"))
+    meta = atom(b"meta", b"\0\0\0\0" + atom(b"hdlr", b"\0" * 25) + atom(b"ilst", item))
+    data = atom(b"ftyp", b"M4A \0\0\0\0") + atom(b"moov", mvhd + atom(b"udta", meta)) + atom(b"mdat", b"\0" * 64)
+    fields = read_tags(write(tmp_path / "a.m4a", data))
+    assert fields == {"Artist": "Artist", "Duration": 5.0}
+
+#A constant bitrate stream without a Xing header is timed from its size: 100 frames of 128 kbps at 44.1 kHz
+def test_mp3_duration_from_frame_header(tmp_path):
+    frame = b"\xff\xfb\x90\x00" + b"\0" * 413
+    fields = read_tags(write(tmp_path / "a.mp3", frame * 100))
+    assert fields["Duration"] == pytest.approx(100 * 1152 / 44100, abs=0.01)
+
+def test_no_duration_without_audio_header(tmp_path):
+    assert "Duration" not in read_tags(write(tmp_path / "a.mp3", b"\0" * 64))